@@ -0,0 +1,233 @@
+"""
+액세스 토큰 로컬 검증 - 요청마다 Supabase Auth(/auth/v1/user)를 호출하지 않도록 JWT 서명을 직접 확인
+
+- HS256: 프로젝트 JWT 시크릿(SUPABASE_JWT_SECRET)
+- RS256/ES256: 프로젝트 JWKS(/auth/v1/.well-known/jwks.json), 캐시 후 주기적 갱신, 모르는 kid가 오면 즉시 재조회(키 교체 대응)
+- 검증된 클레임은 짧은 TTL로 캐시 (토큰 만료 시각을 넘기지 않음)
+- 검증 수단이 없거나(시크릿/JWKS 없음, PyJWT 미설치) 판단할 수 없으면 None → 호출 측이 원격 조회로 대체
+- 서명 불일치·만료 등 명백히 잘못된 토큰은 InvalidTokenError
+
+주의: 로컬 검증은 로그아웃 등으로 폐기된 세션을 토큰 만료 전까지 알아채지 못한다.
+
+벤치마크 (원격 조회 대역 서버 vs 로컬 검증):
+    python auth_tokens.py [원격 지연 ms]
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import http_client
+import tracing
+from task_registry import TaskRegistry
+
+try:
+    import jwt
+    from jwt import PyJWK
+except ImportError:  # PyJWT 미설치 시 원격 조회만 사용
+    jwt = None
+    PyJWK = None
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+AUTH_LOCAL_VERIFY = os.getenv("AUTH_LOCAL_VERIFY", "1") != "0"
+AUTH_JWKS_URL = os.getenv("AUTH_JWKS_URL") or (
+    f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json" if SUPABASE_URL else None
+)
+AUTH_JWT_AUDIENCE = os.getenv("AUTH_JWT_AUDIENCE", "authenticated")
+JWKS_CACHE_TTL = float(os.getenv("JWKS_CACHE_TTL", "3600"))
+JWKS_MIN_REFRESH_INTERVAL = 60.0  # 모르는 kid로 인한 재조회 최소 간격
+AUTH_CLAIMS_CACHE_TTL = float(os.getenv("AUTH_CLAIMS_CACHE_TTL", "30"))
+JWT_LEEWAY_SECONDS = 30
+
+ASYMMETRIC_ALGORITHMS = {"RS256", "ES256"}
+
+
+class InvalidTokenError(Exception):
+    """서명/만료/대상(aud) 검증 실패"""
+
+
+def claims_to_user(claims: dict) -> dict:
+    """JWT 클레임 → /auth/v1/user 응답과 같은 모양의 사용자 dict (필요한 필드만)"""
+    return {
+        "id": claims["sub"],
+        "aud": claims.get("aud"),
+        "role": claims.get("role"),
+        "email": claims.get("email"),
+        "phone": claims.get("phone"),
+        "app_metadata": claims.get("app_metadata") or {},
+        "user_metadata": claims.get("user_metadata") or {},
+        "is_anonymous": claims.get("is_anonymous", False),
+    }
+
+
+class TokenVerifier:
+    def __init__(
+        self,
+        jwt_secret: str | None = SUPABASE_JWT_SECRET,
+        jwks_url: str | None = AUTH_JWKS_URL,
+        audience: str | None = AUTH_JWT_AUDIENCE,
+        claims_ttl: float = AUTH_CLAIMS_CACHE_TTL,
+        enabled: bool = AUTH_LOCAL_VERIFY,
+    ):
+        self.jwt_secret = jwt_secret
+        self.jwks_url = jwks_url
+        self.audience = audience
+        self.claims_ttl = claims_ttl
+        self.enabled = enabled and jwt is not None
+        self._keys: dict[str, object] = {}
+        self._keys_fetched_at = 0.0
+        self._keys_lock = threading.Lock()
+        self._claims = TaskRegistry("auth_claims", max_entries=10000, ttl=max(claims_ttl, 0.001))
+        self.stats = {"local": 0, "cached": 0, "fallback": 0, "rejected": 0}
+
+    # ===== JWKS =====
+
+    def _fetch_jwks(self) -> dict[str, object]:
+        response = http_client.get_sync_client().get(self.jwks_url, timeout=5)
+        response.raise_for_status()
+        payload = response.json()
+        keys = {}
+        for jwk in payload.get("keys", []):
+            try:
+                keys[jwk.get("kid") or ""] = PyJWK(jwk).key
+            except Exception as e:
+                tracing.log(f"JWKS key skipped ({jwk.get('kid')}): {e}", level="warning")
+        return keys
+
+    def _signing_key(self, kid: str) -> object | None:
+        if not self.jwks_url:
+            return None
+        now = time.monotonic()
+        with self._keys_lock:
+            stale = now - self._keys_fetched_at > JWKS_CACHE_TTL
+            unknown = kid not in self._keys and now - self._keys_fetched_at > JWKS_MIN_REFRESH_INTERVAL
+            if stale or unknown:
+                try:
+                    self._keys = self._fetch_jwks()
+                except Exception as e:
+                    # 조회 실패 시 기존 키 유지 (없으면 원격 조회로 대체)
+                    tracing.log(f"JWKS fetch failed: {e}", level="warning")
+                self._keys_fetched_at = now
+            return self._keys.get(kid)
+
+    # ===== 검증 =====
+
+    def cached(self, token: str) -> dict | None:
+        """이미 검증해 캐시된 사용자 (I/O 없음 - 이벤트 루프에서 바로 호출 가능)"""
+        if not self.enabled:
+            return None
+        cached = self._claims.get(hashlib.sha256(token.encode("utf-8")).hexdigest())
+        if cached is not None:
+            self.stats["cached"] += 1
+        return cached
+
+    def verify(self, token: str) -> dict | None:
+        """
+        검증된 사용자 dict, 로컬로 판단할 수 없으면 None. 잘못된 토큰이면 InvalidTokenError.
+        JWKS 조회(동기 HTTP)가 있을 수 있으므로 비동기 코드에서는 스레드로 호출
+        """
+        if not self.enabled:
+            return None
+
+        cached = self.cached(token)
+        if cached is not None:
+            return cached
+        cache_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.PyJWTError as e:
+            self.stats["rejected"] += 1
+            raise InvalidTokenError(str(e))
+
+        algorithm = header.get("alg")
+        if algorithm == "HS256" and self.jwt_secret:
+            key = self.jwt_secret
+        elif algorithm in ASYMMETRIC_ALGORITHMS:
+            key = self._signing_key(header.get("kid") or "")
+        else:
+            key = None
+        if key is None:
+            self.stats["fallback"] += 1
+            return None
+
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=[algorithm],
+                audience=self.audience,
+                leeway=JWT_LEEWAY_SECONDS,
+                options={"require": ["exp", "sub"], "verify_aud": bool(self.audience)},
+            )
+        except jwt.PyJWTError as e:
+            self.stats["rejected"] += 1
+            raise InvalidTokenError(str(e))
+
+        user = claims_to_user(claims)
+        self.stats["local"] += 1
+        ttl = min(self.claims_ttl, claims["exp"] - time.time())
+        if ttl > 0:
+            self._claims.set(cache_key, user, ttl=ttl)
+        return user
+
+
+if __name__ == "__main__":
+    # ===== 벤치마크: 원격 /auth/v1/user 대역 서버 vs 로컬 검증 =====
+    import statistics
+    import sys
+    import urllib.request
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    remote_latency = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.03
+    secret = "bench-secret-" + "x" * 32
+    token = jwt.encode(
+        {"sub": "user-1", "aud": "authenticated", "role": "authenticated", "exp": int(time.time()) + 3600},
+        secret,
+        algorithm="HS256",
+    )
+
+    class AuthStandIn(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(remote_latency)  # Supabase Auth 왕복 지연 흉내
+            body = json.dumps({"id": "user-1", "aud": "authenticated"}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), AuthStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    remote_url = f"http://127.0.0.1:{server.server_port}/auth/v1/user"
+
+    def remote_lookup() -> dict:
+        request = urllib.request.Request(remote_url, headers={"Authorization": f"Bearer {token}"})
+        with urllib.request.urlopen(request, timeout=20) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def bench(label: str, fn, rounds: int) -> None:
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(
+            f"{label:<28} p50 {statistics.median(timings):8.3f} ms   "
+            f"p99 {timings[int(len(timings) * 0.99) - 1]:8.3f} ms"
+        )
+
+    uncached = TokenVerifier(jwt_secret=secret, jwks_url=None, claims_ttl=0)
+    cached = TokenVerifier(jwt_secret=secret, jwks_url=None, claims_ttl=30)
+    print(f"remote stand-in latency: {remote_latency * 1000:.0f} ms")
+    bench("remote /auth/v1/user", remote_lookup, 50)
+    bench("local verify (no cache)", lambda: uncached.verify(token), 2000)
+    bench("local verify (claims cache)", lambda: cached.verify(token), 2000)
+    server.shutdown()
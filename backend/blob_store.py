@@ -0,0 +1,230 @@
+"""
+녹취 본문 블롭 저장소 - 긴 raw_text / corrected_text 를 압축해 객체 저장소에 두고 행에는 참조만 남김
+
+- 본문(UTF-8)을 BLOB_FRAME_BYTES 단위 프레임으로 나눠 프레임마다 따로 압축(zstd, 없으면 zlib)해 이어 붙임
+  → 참조(ref)에 프레임별 압축 길이를 적어 두면 원문 바이트 범위에 해당하는 프레임만 읽어 풀 수 있다
+- 백엔드: supabase (Supabase Storage, Range 요청) / local (파일 시스템, 개발·테스트용)
+  기본은 BLOB_STORE_BUCKET 을 설정했을 때만 supabase, 아니면 꺼짐(본문을 행에 그대로 저장)
+- 참조 모양: {"store", "key", "codec", "size", "frame_bytes", "frames": [압축 길이, ...]}
+
+테스트: python -m pytest -q tests/test_blob_store.py
+"""
+
+import os
+import pathlib
+import tempfile
+import urllib.parse
+import zlib
+
+import http_client
+
+try:
+    import zstandard
+except ImportError:  # zstandard 미설치 시 zlib 사용 (참조에 codec 기록)
+    zstandard = None
+
+BLOB_STORE_BUCKET = os.getenv("BLOB_STORE_BUCKET", "")
+# supabase | local | off. 버킷이 없는 배포에서 업로드가 매번 실패하지 않도록 버킷 설정 시에만 supabase 가 기본
+BLOB_STORE_BACKEND = os.getenv("BLOB_STORE_BACKEND", "supabase" if BLOB_STORE_BUCKET else "off").lower()
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", "/tmp/mallog24_blobs")
+# 이 크기(UTF-8 바이트) 이상인 본문만 블롭으로 옮김
+BLOB_OFFLOAD_MIN_BYTES = int(os.getenv("BLOB_OFFLOAD_MIN_BYTES", "16384"))
+BLOB_FRAME_BYTES = 256 * 1024
+ZSTD_LEVEL = 9
+ZLIB_LEVEL = 6
+
+DEFAULT_CODEC = "zstd" if zstandard is not None else "zlib"
+
+
+class BlobNotFoundError(Exception):
+    """참조된 블롭이 저장소에 없음"""
+
+
+# ===== 압축 =====
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return zlib.compress(data, ZLIB_LEVEL)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd 블롭을 읽으려면 zstandard 패키지가 필요합니다.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def encode_frames(data: bytes, codec: str = DEFAULT_CODEC, frame_bytes: int = BLOB_FRAME_BYTES) -> tuple[bytes, list[int]]:
+    """본문 → (프레임별 압축본을 이어 붙인 바이트, 프레임별 압축 길이)"""
+    chunks = []
+    for start in range(0, len(data), frame_bytes):
+        chunks.append(_compress(data[start:start + frame_bytes], codec))
+    return b"".join(chunks), [len(chunk) for chunk in chunks]
+
+
+# ===== 백엔드 =====
+
+class LocalBlobBackend:
+    name = "local"
+
+    def __init__(self, root: str = BLOB_STORE_DIR):
+        self.root = pathlib.Path(root)
+
+    def _path(self, key: str) -> pathlib.Path:
+        path = (self.root / key).resolve()
+        if self.root.resolve() not in path.parents:
+            raise ValueError(f"잘못된 블롭 키: {key}")
+        return path
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 임시 파일에 쓰고 교체 (읽는 쪽이 반쯤 쓰인 파일을 보지 않도록)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            pathlib.Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def read(self, key: str, offset: int = 0, length: int | None = None) -> bytes:
+        try:
+            with open(self._path(key), "rb") as f:
+                f.seek(offset)
+                return f.read() if length is None else f.read(length)
+        except FileNotFoundError:
+            raise BlobNotFoundError(key)
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+
+class SupabaseBlobBackend:
+    """Supabase Storage REST API (공유 HTTP 풀 사용, 부분 읽기는 Range 헤더)"""
+
+    name = "supabase"
+
+    def __init__(self, url: str | None = None, key: str | None = None, bucket: str | None = None):
+        # 버킷 미설정이어도 예전에 저장한 참조(store="supabase")는 기존 transcripts 버킷에서 읽음
+        bucket = bucket or BLOB_STORE_BUCKET or "transcripts"
+        url = url or os.getenv("SUPABASE_URL") or ""
+        self.base_url = f"{url.rstrip('/')}/storage/v1/object/{bucket}"
+        self.key = key or os.getenv("SUPABASE_KEY") or ""
+
+    def _headers(self, extra: dict | None = None) -> dict:
+        headers = {"Authorization": f"Bearer {self.key}", "apikey": self.key}
+        headers.update(extra or {})
+        return headers
+
+    def _url(self, key: str) -> str:
+        return f"{self.base_url}/{urllib.parse.quote(key)}"
+
+    def put(self, key: str, data: bytes) -> None:
+        response = http_client.get_sync_client().post(
+            self._url(key),
+            content=data,
+            headers=self._headers({"Content-Type": "application/octet-stream", "x-upsert": "true"}),
+        )
+        response.raise_for_status()
+
+    def read(self, key: str, offset: int = 0, length: int | None = None) -> bytes:
+        extra = {}
+        if offset or length is not None:
+            end = "" if length is None else str(offset + length - 1)
+            extra["Range"] = f"bytes={offset}-{end}"
+        response = http_client.get_sync_client().get(self._url(key), headers=self._headers(extra))
+        if response.status_code in (400, 404):
+            raise BlobNotFoundError(key)
+        response.raise_for_status()
+        data = response.content
+        if response.status_code == 200 and extra:
+            # Range 를 무시하고 전체를 준 경우
+            data = data[offset:] if length is None else data[offset:offset + length]
+        return data
+
+    def delete(self, key: str) -> None:
+        response = http_client.get_sync_client().delete(self._url(key), headers=self._headers())
+        if response.status_code not in (200, 204, 400, 404):
+            response.raise_for_status()
+
+
+def _create_backend(name: str):
+    if name == "local":
+        return LocalBlobBackend()
+    if name == "supabase":
+        return SupabaseBlobBackend()
+    return None
+
+
+# ===== 저장소 =====
+
+class BlobStore:
+    def __init__(self, backend=None, min_bytes: int = BLOB_OFFLOAD_MIN_BYTES, codec: str = DEFAULT_CODEC):
+        self.backend = backend
+        self.min_bytes = min_bytes
+        self.codec = codec
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def should_offload(self, text: str | None) -> bool:
+        # 글자 수 × 3 이 UTF-8 바이트 상한이라, 확실히 작은 본문은 인코딩 없이 걸러냄
+        return self.enabled and bool(text) and len(text) * 3 >= self.min_bytes and len(text.encode("utf-8")) >= self.min_bytes
+
+    def put_text(self, key: str, text: str) -> dict:
+        data = text.encode("utf-8")
+        stored, frames = encode_frames(data, self.codec)
+        self.backend.put(key, stored)
+        return {
+            "store": self.backend.name,
+            "key": key,
+            "codec": self.codec,
+            "size": len(data),
+            "frame_bytes": BLOB_FRAME_BYTES,
+            "frames": frames,
+        }
+
+    def _backend_for(self, ref: dict):
+        if self.backend is not None and self.backend.name == ref.get("store"):
+            return self.backend
+        backend = _create_backend(ref.get("store"))
+        if backend is None:
+            raise RuntimeError(f"알 수 없는 블롭 저장소: {ref.get('store')}")
+        return backend
+
+    def read_range(self, ref: dict, start: int = 0, end: int | None = None) -> bytes:
+        """원문 바이트 [start, end) 만 읽음 - 해당 프레임의 압축본만 가져와 푼다"""
+        size = ref["size"]
+        end = size if end is None else min(end, size)
+        if start >= end:
+            return b""
+        frame_bytes = ref["frame_bytes"]
+        frames = ref["frames"]
+        first, last = start // frame_bytes, (end - 1) // frame_bytes
+        stored_offset = sum(frames[:first])
+        stored_length = sum(frames[first:last + 1])
+
+        stored = self._backend_for(ref).read(ref["key"], stored_offset, stored_length)
+        parts = []
+        position = 0
+        for length in frames[first:last + 1]:
+            parts.append(_decompress(stored[position:position + length], ref["codec"]))
+            position += length
+        data = b"".join(parts)
+        base = first * frame_bytes
+        return data[start - base:end - base]
+
+    def read_text(self, ref: dict) -> str:
+        return self.read_range(ref).decode("utf-8")
+
+    def delete(self, ref: dict) -> None:
+        self._backend_for(ref).delete(ref["key"])
+
+
+blob_store = BlobStore(_create_backend(BLOB_STORE_BACKEND))
+
@@ -0,0 +1,155 @@
+"""
+완료된 변환 결과 HTTP 캐시 - 한 번 completed 가 된 결과는 바뀌지 않으므로 강한 ETag + 장기 Cache-Control
+
+- 결과 JSON은 한 번만 직렬화하고 ETag(본문 SHA-256)와 함께 보관
+- Accept-Encoding 에 따라 brotli/gzip 압축본을 만들고 항목에 같이 보관 (같은 결과를 다시 압축하지 않음)
+- If-None-Match 가 ETag와 같으면 304 (본문 없음)
+- 읽기 전용 캐시(completed_results): /api/status 가 완료 결과를 처음 읽을 때 채움.
+  작업을 처리하는 워커는 채우지 않음 (`python -m worker` 는 별도 프로세스라 API 메모리에 닿지 않음)
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+from fastapi import Request, Response
+
+from task_registry import TaskRegistry
+
+try:
+    import brotli
+except ImportError:  # brotli 미설치 시 gzip만 사용
+    brotli = None
+
+COMPLETED_RESULT_CACHE_SIZE = int(os.getenv("COMPLETED_RESULT_CACHE_SIZE", "200"))
+COMPLETED_RESULT_CACHE_TTL = float(os.getenv("COMPLETED_RESULT_CACHE_TTL", "3600"))
+# 이보다 작은 본문은 압축하지 않음 (압축 이득보다 오버헤드가 큼)
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# 인증된 사용자 본인만 보는 응답이라 private (공유 캐시 금지)
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+class CachedBody:
+    """직렬화된 응답 본문 + ETag + 인코딩별 압축본"""
+
+    __slots__ = ("payload", "body", "etag", "_encoded", "_lock")
+
+    def __init__(self, payload: dict):
+        self.payload = payload  # 공유 객체 - 수정하지 말 것
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+        self._encoded: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding: str) -> bytes:
+        if encoding == "identity":
+            return self.body
+        with self._lock:
+            data = self._encoded.get(encoding)
+            if data is None:
+                if encoding == "br":
+                    data = brotli.compress(self.body, quality=BROTLI_QUALITY)
+                else:
+                    data = gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+                self._encoded[encoding] = data
+        return data
+
+
+def negotiate_encoding(accept_encoding: str | None, size: int) -> str:
+    """Accept-Encoding → "br" / "gzip" / "identity" (q=0 은 거부로 처리)"""
+    if not accept_encoding or size < COMPRESSION_MIN_BYTES:
+        return "identity"
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return "identity"
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # 약한 비교 (W/ 접두어 무시) - 304 판정에는 약한 비교가 표준
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates
+
+
+def parse_byte_range(range_header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Range: bytes=a-b / a- / -n → [start, end) (단일 범위만).
+    헤더가 없거나 형식이 잘못됐으면(b < a, 숫자 아님, 여러 범위) None → 헤더를 무시하고 전체 200 (RFC 9110 §14.2).
+    형식은 맞지만 만족할 수 없으면(a >= 크기, -0) ValueError → 416
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    first, dash, last = range_header[6:].strip().partition("-")
+    if not dash or (first and not first.isdigit()) or (last and not last.isdigit()) or not (first or last):
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise ValueError(range_header)
+        return max(size - suffix, 0), size
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError(range_header)
+    end = int(last) + 1 if last else size
+    return start, min(end, size)
+
+
+def cached_response(request: Request, cached: CachedBody) -> Response:
+    """조건부 GET이면 304, 아니면 협상된 인코딩으로 본문 전송"""
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Vary": "Authorization, Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), len(cached.body))
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=cached.encoded(encoding), media_type="application/json", headers=headers)
+
+
+# task_id → (user_id, CachedBody). 최근 완료된 결과만 (LRU + TTL)
+completed_results = TaskRegistry(
+    "completed_results",
+    max_entries=COMPLETED_RESULT_CACHE_SIZE,
+    ttl=COMPLETED_RESULT_CACHE_TTL,
+)
+
+
+def remember_completed(task_id: str, user_id: str, payload: dict) -> CachedBody:
+    cached = CachedBody(payload)
+    completed_results.set(task_id, (user_id, cached))
+    return cached
+
+
+def get_completed(task_id: str, user_id: str) -> CachedBody | None:
+    entry = completed_results.get(task_id)
+    if entry is None or entry[0] != user_id:
+        return None
+    return entry[1]
+
@@ -0,0 +1,214 @@
+"""
+공유 HTTP 클라이언트 - Supabase 등 외부 호출용 연결 풀 (keep-alive, HTTP/2)
+
+- 비동기: 호스트별 httpx.AsyncClient 하나씩 (호스트별 연결 수 제한, 요청마다 TLS 핸드셰이크 반복 방지)
+- 동기: supabase-py(PostgREST)와 JWKS 조회가 함께 쓰는 httpx.Client 하나
+- 요청 지연 히스토그램 + 연결 풀 사용량 (/health 의 outbound_http, /metrics 의 external_call_*)
+"""
+
+import os
+import threading
+import time
+import urllib.parse
+
+import httpx
+
+import metrics
+
+try:
+    import h2  # noqa: F401  (HTTP/2 지원 여부 확인용)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HTTP2_ENABLED = HTTP2_AVAILABLE and os.getenv("HTTP2_ENABLED", "1") != "0"
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20"))
+HTTP_MAX_KEEPALIVE_PER_HOST = int(os.getenv("HTTP_MAX_KEEPALIVE_PER_HOST", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "20"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "5"))
+
+# 지연 히스토그램 구간 상한(ms)
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+
+class LatencyHistogram:
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total_ms = 0.0
+        self.errors = 0
+
+    def observe(self, elapsed_ms: float) -> None:
+        for index, upper in enumerate(self.buckets):
+            if elapsed_ms <= upper:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.total_ms += elapsed_ms
+
+    def quantile(self, q: float) -> float | None:
+        """구간 상한 기준 근사 분위수"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for upper, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return upper
+        return self.buckets[-1]
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "buckets": {("+Inf" if upper == float("inf") else str(upper)): count for upper, count in zip(self.buckets, self.counts)},
+        }
+
+
+_histograms: dict[str, LatencyHistogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def _route_label(request: httpx.Request) -> str:
+    """"GET host/auth/v1/user" 형태 (경로는 앞 3단계까지만, 쿼리 제외)"""
+    path = "/".join(request.url.path.strip("/").split("/")[:3])
+    return f"{request.method} {request.url.host}/{path}"
+
+
+def _service_label(host: str | None) -> str:
+    host = host or ""
+    return "supabase" if host.endswith(".supabase.co") or host.endswith(".supabase.in") else host
+
+
+def _record_call(request: httpx.Request, elapsed_ms: float, status_code: int | None) -> None:
+    service = _service_label(request.url.host)
+    path = "/".join(request.url.path.strip("/").split("/")[:3])
+    if status_code is None:
+        outcome = "error"
+    elif status_code == 429:
+        outcome = "rate_limited"
+        metrics.RATE_LIMITED.inc(service=service)
+    else:
+        outcome = "ok" if status_code < 500 else "error"
+    metrics.CALL_SECONDS.observe(elapsed_ms / 1000, service=service, operation=f"{request.method} {path}", outcome=outcome)
+
+
+def observe(label: str, elapsed_ms: float, error: bool = False) -> None:
+    with _histograms_lock:
+        histogram = _histograms.setdefault(label, LatencyHistogram())
+        if error:
+            histogram.errors += 1
+        else:
+            histogram.observe(elapsed_ms)
+
+
+def _on_request(request: httpx.Request) -> None:
+    request.extensions["started_at"] = time.perf_counter()
+
+
+def _on_response(response: httpx.Response) -> None:
+    started_at = response.request.extensions.get("started_at")
+    if started_at is not None:
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        observe(_route_label(response.request), elapsed_ms)
+        _record_call(response.request, elapsed_ms, response.status_code)
+
+
+async def _on_request_async(request: httpx.Request) -> None:
+    _on_request(request)
+
+
+async def _on_response_async(response: httpx.Response) -> None:
+    _on_response(response)
+
+
+def _client_options() -> dict:
+    return {
+        "http2": HTTP2_ENABLED,
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_PER_HOST,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(
+            connect=HTTP_CONNECT_TIMEOUT,
+            read=HTTP_READ_TIMEOUT,
+            write=HTTP_READ_TIMEOUT,
+            pool=HTTP_POOL_TIMEOUT,
+        ),
+    }
+
+
+_async_clients: dict[str, httpx.AsyncClient] = {}
+_sync_client: httpx.Client | None = None
+_sync_client_lock = threading.Lock()
+
+
+def get_async_client(base_url: str) -> httpx.AsyncClient:
+    """호스트별 공유 비동기 클라이언트 (호스트마다 연결 풀이 따로라 호스트별 연결 수 제한이 된다)"""
+    host = urllib.parse.urlparse(base_url).netloc
+    client = _async_clients.get(host)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            **_client_options(),
+            event_hooks={"request": [_on_request_async], "response": [_on_response_async]},
+        )
+        _async_clients[host] = client
+    return client
+
+
+def get_sync_client() -> httpx.Client:
+    """공유 동기 클라이언트 (supabase-py, JWKS 조회). 여러 스레드에서 같이 써도 안전"""
+    global _sync_client
+    with _sync_client_lock:
+        if _sync_client is None:
+            _sync_client = httpx.Client(
+                **_client_options(),
+                event_hooks={"request": [_on_request], "response": [_on_response]},
+            )
+    return _sync_client
+
+
+async def request(method: str, url: str, **kwargs) -> httpx.Response:
+    """공유 풀로 비동기 요청. 연결 실패/타임아웃도 히스토그램 오류로 집계"""
+    client = get_async_client(url)
+    try:
+        return await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        failed = httpx.Request(method, url)
+        observe(_route_label(failed), 0.0, error=True)
+        _record_call(failed, 0.0, None)
+        raise
+
+
+async def aclose_clients() -> None:
+    for client in list(_async_clients.values()):
+        await client.aclose()
+    _async_clients.clear()
+
+
+def _pool_stats(client) -> dict:
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    return {
+        "connections": len(connections),
+        "idle": sum(1 for connection in connections if connection.is_idle()),
+        "in_use": sum(1 for connection in connections if not connection.is_idle() and not connection.is_closed()),
+        "max_connections": HTTP_MAX_CONNECTIONS_PER_HOST,
+    }
+
+
+def http_metrics() -> dict:
+    with _histograms_lock:
+        latency = {label: histogram.snapshot() for label, histogram in _histograms.items()}
+    pools = {f"async:{host}": _pool_stats(client) for host, client in _async_clients.items()}
+    if _sync_client is not None:
+        pools["sync"] = _pool_stats(_sync_client)
+    return {"http2": HTTP2_ENABLED, "pools": pools, "latency": latency}
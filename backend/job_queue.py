@@ -0,0 +1,422 @@
+"""
+영속 작업 큐 - 변환 작업(task) 대기열
+API 프로세스가 재시작/재배포되어도 대기·처리 중이던 작업이 사라지지 않도록 SQLite에 기록한다.
+
+- enqueue: /api/transcribe 에서 작업 등록
+- claim: 워커가 리스(lease)를 잡고 작업을 가져감
+- heartbeat: 처리 중 리스 연장
+- 리스가 만료된 작업(워커 크래시/재배포)은 다음 claim 때 자동으로 다시 가져간다
+- 어떤 작업을 먼저 가져갈지는 scheduler.FairScheduler 정책(동시 실행 상한, 사용자 공정성, 짧은 작업 우선)을 따른다
+- cancel: 대기 중이면 바로 취소, 처리 중이면 'cancelled'로 바꿔 실행 슬롯을 즉시 반납하고 워커가 감지해 중단
+- schedule_estimate: 대기열 전체 모의 실행 결과를 SCHEDULE_ESTIMATE_TTL 초 동안 재사용
+  (대기 작업마다 상태를 폴링해도 모의 실행은 TTL 당 한 번, 이 프로세스에서 큐가 바뀌면 바로 다시 계산)
+"""
+
+import itertools
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from scheduler import FairScheduler
+
+JOB_QUEUE_DB_PATH = os.getenv("JOB_QUEUE_DB_PATH") or os.path.join(tempfile.gettempdir(), "mallog24_jobs.db")
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "120"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# 대기 순번/예상 시작 시각 재사용 시간(초, 0이면 매번 계산). 다른 프로세스의 변경은 이 시간만큼 늦게 반영
+SCHEDULE_ESTIMATE_TTL = float(os.getenv("SCHEDULE_ESTIMATE_TTL", "2"))
+
+ACTIVE_JOB_STATUSES = ("queued", "processing")
+
+
+class JobQueue(ABC):
+    """작업 큐 인터페이스"""
+
+    @abstractmethod
+    def enqueue(self, task_id: str, user_id: str, payload: dict, duration_seconds: float | None = None) -> None:
+        ...
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease_seconds: int = JOB_LEASE_SECONDS) -> dict | None:
+        ...
+
+    @abstractmethod
+    def heartbeat(self, task_id: str, worker_id: str, lease_seconds: int = JOB_LEASE_SECONDS) -> bool:
+        ...
+
+    @abstractmethod
+    def fail_exhausted(self) -> list[dict]:
+        ...
+
+    @abstractmethod
+    def complete(self, task_id: str, worker_id: str, status: str = "completed", error: str | None = None) -> None:
+        ...
+
+    @abstractmethod
+    def release(self, task_id: str, worker_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def get(self, task_id: str) -> dict | None:
+        ...
+
+    @abstractmethod
+    def active_payloads(self) -> list[dict]:
+        ...
+
+    @abstractmethod
+    def cancel(self, task_id: str) -> str | None:
+        ...
+
+    @abstractmethod
+    def is_cancelled(self, task_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def schedule_estimate(self, task_id: str) -> dict | None:
+        ...
+
+    @abstractmethod
+    def counts(self) -> dict[str, int]:
+        """대기/처리 중 작업 수 (지표용)"""
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    외부 서비스 없이 동작하는 SQLite 작업 큐.
+    같은 DB 파일을 공유하면 여러 프로세스가 동시에 claim해도 BEGIN IMMEDIATE 로 한 워커만 가져간다.
+    """
+
+    def __init__(
+        self,
+        db_path: str = JOB_QUEUE_DB_PATH,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        scheduler: FairScheduler | None = None,
+        estimate_ttl: float = SCHEDULE_ESTIMATE_TTL,
+    ):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.scheduler = scheduler or FairScheduler()
+        self.estimate_ttl = estimate_ttl
+        self._local = threading.local()
+        # 이 프로세스에서 큐를 바꿀 때마다 올라가는 버전 - 캐시된 모의 실행 결과를 무효화
+        self._versions = itertools.count(1)
+        self._version = 0
+        self._estimates: tuple[int, float, dict[str, dict]] | None = None
+        self._estimates_lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self) -> None:
+        conn = self._connect()
+        conn.executescript(
+            """
+            create table if not exists jobs (
+              task_id text primary key,
+              user_id text not null,
+              status text not null,
+              payload text not null,
+              attempts integer not null default 0,
+              lease_owner text,
+              lease_expires_at real,
+              error text,
+              duration_seconds real,
+              started_at real,
+              finished_at real,
+              created_at real not null,
+              updated_at real not null
+            );
+            create index if not exists idx_jobs_status_created_at on jobs (status, created_at);
+            create table if not exists user_vtime (
+              user_id text primary key,
+              vtime real not null default 0
+            );
+            """
+        )
+        # 이전 버전 DB 호환: 스케줄링 컬럼 추가
+        columns = {row["name"] for row in conn.execute("pragma table_info(jobs)")}
+        for column in ("duration_seconds", "started_at", "finished_at"):
+            if column not in columns:
+                conn.execute(f"alter table jobs add column {column} real")
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row | None) -> dict | None:
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        return job
+
+    def enqueue(self, task_id: str, user_id: str, payload: dict, duration_seconds: float | None = None) -> None:
+        conn = self._connect()
+        now = time.time()
+        conn.execute("begin immediate")
+        try:
+            # 대기 중이던 사용자가 아니면 가상 시간을 현재 활성 사용자 최솟값까지 끌어올림
+            # (한동안 쉬던 사용자가 쌓인 '크레딧'으로 대기열을 독점하지 못하게 함)
+            active = conn.execute(
+                "select 1 from jobs where user_id = ? and status in (?, ?) limit 1",
+                (user_id, *ACTIVE_JOB_STATUSES),
+            ).fetchone()
+            if not active:
+                floor = conn.execute(
+                    """
+                    select min(v.vtime) from user_vtime v
+                    where exists (select 1 from jobs j where j.user_id = v.user_id and j.status in (?, ?))
+                    """,
+                    ACTIVE_JOB_STATUSES,
+                ).fetchone()[0] or 0.0
+                conn.execute(
+                    """
+                    insert into user_vtime (user_id, vtime) values (?, ?)
+                    on conflict(user_id) do update set vtime = max(vtime, excluded.vtime)
+                    """,
+                    (user_id, floor),
+                )
+            conn.execute(
+                """
+                insert into jobs (task_id, user_id, status, payload, duration_seconds, created_at, updated_at)
+                values (?, ?, 'queued', ?, ?, ?, ?)
+                """,
+                (task_id, user_id, json.dumps(payload, ensure_ascii=False), duration_seconds, now, now),
+            )
+            conn.execute("commit")
+        except Exception:
+            conn.execute("rollback")
+            raise
+        self._changed()
+
+    def counts(self) -> dict[str, int]:
+        rows = self._connect().execute(
+            "select status, count(*) as n from jobs where status in (?, ?) group by status", ACTIVE_JOB_STATUSES
+        ).fetchall()
+        counts = dict.fromkeys(ACTIVE_JOB_STATUSES, 0)
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    def _running_by_user(self, conn: sqlite3.Connection, now: float) -> dict[str, int]:
+        rows = conn.execute(
+            """
+            select user_id, count(*) as running from jobs
+            where status = 'processing' and lease_expires_at >= ?
+            group by user_id
+            """,
+            (now,),
+        ).fetchall()
+        return {row["user_id"]: row["running"] for row in rows}
+
+    def _vtimes(self, conn: sqlite3.Connection) -> dict[str, float]:
+        return {row["user_id"]: row["vtime"] for row in conn.execute("select user_id, vtime from user_vtime")}
+
+    def claim(self, worker_id: str, lease_seconds: int = JOB_LEASE_SECONDS) -> dict | None:
+        conn = self._connect()
+        now = time.time()
+        conn.execute("begin immediate")
+        try:
+            # 입장 제어: 전체 동시 실행 상한
+            running_by_user = self._running_by_user(conn, now)
+            if not self.scheduler.has_capacity(sum(running_by_user.values())):
+                conn.execute("commit")
+                return None
+
+            candidates = [
+                dict(row)
+                for row in conn.execute(
+                    """
+                    select task_id, user_id, duration_seconds, created_at from jobs
+                    where status = 'queued' or (status = 'processing' and lease_expires_at < ? and attempts < ?)
+                    """,
+                    (now, self.max_attempts),
+                )
+            ]
+            row = self.scheduler.pick(candidates, running_by_user, self._vtimes(conn))
+            if row is None:
+                conn.execute("commit")
+                return None
+
+            conn.execute(
+                """
+                insert into user_vtime (user_id, vtime) values (?, ?)
+                on conflict(user_id) do update set vtime = vtime + excluded.vtime
+                """,
+                (row["user_id"], self.scheduler.cost(row)),
+            )
+
+            conn.execute(
+                """
+                update jobs set status = 'processing', lease_owner = ?, lease_expires_at = ?,
+                  attempts = attempts + 1, started_at = ?, updated_at = ?
+                where task_id = ?
+                """,
+                (worker_id, now + lease_seconds, now, now, row["task_id"]),
+            )
+            claimed = conn.execute("select * from jobs where task_id = ?", (row["task_id"],)).fetchone()
+            conn.execute("commit")
+        except Exception:
+            conn.execute("rollback")
+            raise
+        self._changed()
+        return self._row_to_job(claimed)
+
+    def fail_exhausted(self) -> list[dict]:
+        """재시도 한도를 넘긴 채 리스가 만료된 작업을 오류로 정리 (반복 크래시 유발 작업 차단)"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("begin immediate")
+        try:
+            rows = conn.execute(
+                "select * from jobs where status = 'processing' and lease_expires_at < ? and attempts >= ?",
+                (now, self.max_attempts),
+            ).fetchall()
+            conn.execute(
+                """
+                update jobs set status = 'error', lease_owner = null, lease_expires_at = null, updated_at = ?,
+                  error = '작업 처리 중 워커가 반복 중단되어 실패했습니다.'
+                where status = 'processing' and lease_expires_at < ? and attempts >= ?
+                """,
+                (now, now, self.max_attempts),
+            )
+            conn.execute("commit")
+        except Exception:
+            conn.execute("rollback")
+            raise
+        if rows:
+            self._changed()
+        return [self._row_to_job(row) for row in rows]
+
+    def heartbeat(self, task_id: str, worker_id: str, lease_seconds: int = JOB_LEASE_SECONDS) -> bool:
+        now = time.time()
+        cursor = self._connect().execute(
+            """
+            update jobs set lease_expires_at = ?, updated_at = ?
+            where task_id = ? and lease_owner = ? and status = 'processing'
+            """,
+            (now + lease_seconds, now, task_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, task_id: str, worker_id: str, status: str = "completed", error: str | None = None) -> None:
+        self._connect().execute(
+            """
+            update jobs set status = ?, error = ?, lease_owner = null, lease_expires_at = null,
+              finished_at = ?, updated_at = ?
+            where task_id = ? and lease_owner = ? and status = 'processing'
+            """,
+            (status, error, time.time(), time.time(), task_id, worker_id),
+        )
+        self._changed()
+
+    def release(self, task_id: str, worker_id: str) -> None:
+        """정상 종료 시 처리 중 작업을 대기열로 되돌림 (재시도 횟수는 차감)"""
+        self._connect().execute(
+            """
+            update jobs set status = 'queued', lease_owner = null, lease_expires_at = null,
+              attempts = max(attempts - 1, 0), updated_at = ?
+            where task_id = ? and lease_owner = ? and status = 'processing'
+            """,
+            (time.time(), task_id, worker_id),
+        )
+        self._changed()
+
+    def cancel(self, task_id: str) -> str | None:
+        """대기/처리 중 작업 취소. 취소 전 상태("queued"/"processing") 반환, 이미 끝났으면 None"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("begin immediate")
+        try:
+            row = conn.execute("select status from jobs where task_id = ?", (task_id,)).fetchone()
+            if not row or row["status"] not in ACTIVE_JOB_STATUSES:
+                conn.execute("commit")
+                return None
+            # 처리 중이던 작업은 lease_owner를 남겨 워커가 자기 작업의 취소를 알아보게 한다
+            conn.execute(
+                """
+                update jobs set status = 'cancelled', lease_expires_at = null, finished_at = ?, updated_at = ?
+                where task_id = ?
+                """,
+                (now, now, task_id),
+            )
+            conn.execute("commit")
+        except Exception:
+            conn.execute("rollback")
+            raise
+        self._changed()
+        return row["status"]
+
+    def is_cancelled(self, task_id: str) -> bool:
+        row = self._connect().execute("select status from jobs where task_id = ?", (task_id,)).fetchone()
+        return bool(row) and row["status"] == "cancelled"
+
+    def get(self, task_id: str) -> dict | None:
+        row = self._connect().execute("select * from jobs where task_id = ?", (task_id,)).fetchone()
+        return self._row_to_job(row)
+
+    def active_payloads(self) -> list[dict]:
+        rows = self._connect().execute(
+            "select payload from jobs where status in (?, ?)", ACTIVE_JOB_STATUSES
+        ).fetchall()
+        return [json.loads(row["payload"]) for row in rows]
+
+    def _seconds_per_audio_second(self, conn: sqlite3.Connection) -> float | None:
+        """최근 완료 작업 50개의 (처리 시간 / 오디오 길이) 평균"""
+        row = conn.execute(
+            """
+            select avg((finished_at - started_at) / duration_seconds) from (
+              select finished_at, started_at, duration_seconds from jobs
+              where status = 'completed' and duration_seconds > 0 and started_at is not null
+              order by finished_at desc limit 50
+            )
+            """
+        ).fetchone()
+        return row[0] if row and row[0] else None
+
+    def _changed(self) -> None:
+        self._version = next(self._versions)
+
+    def schedule_estimate(self, task_id: str) -> dict | None:
+        """대기 중 작업의 대기 순번과 예상 시작 시각 (모의 실행 결과를 estimate_ttl 초 동안 공유)"""
+        with self._estimates_lock:
+            now = time.monotonic()
+            cached = self._estimates
+            if cached is None or cached[0] != self._version or now - cached[1] >= self.estimate_ttl:
+                # 계산 중에 큐가 바뀌면 저장된 버전이 달라져 다음 조회가 다시 계산
+                version = self._version
+                cached = self._estimates = (version, now, self._simulate_schedule())
+        return cached[2].get(task_id)
+
+    def _simulate_schedule(self) -> dict[str, dict]:
+        """활성 작업 전체를 스케줄러로 모의 실행 → task_id 별 대기 순번/예상 시작 시각"""
+        conn = self._connect()
+        now = time.time()
+        rows = [
+            dict(row)
+            for row in conn.execute(
+                """
+                select task_id, user_id, status, duration_seconds, started_at, lease_expires_at, attempts, created_at
+                from jobs where status in (?, ?)
+                """,
+                ACTIVE_JOB_STATUSES,
+            )
+        ]
+        running = [row for row in rows if row["status"] == "processing" and (row["lease_expires_at"] or 0) >= now]
+        queued = [
+            row for row in rows
+            if row["status"] == "queued" or (row not in running and row["attempts"] < self.max_attempts)
+        ]
+        return self.scheduler.simulate(
+            queued, running, self._vtimes(conn), self._seconds_per_audio_second(conn), now
+        )
@@ -0,0 +1,687 @@
+"""
+오프라인 부하 테스트 - 실제 API 크레딧/할당량 없이 처리 용량 측정
+
+- OpenAI(Whisper) / Gemini / Supabase Auth 대역(stand-in) 서버를 이 프로세스에 띄움
+  - 지연(ms, ±jitter), 429 비율, 잘린 응답 비율을 서비스별로 조절
+  - Whisper: text / verbose_json 응답, 잘리면 앞부분만
+  - Gemini: 원본 텍스트를 그대로 돌려주는 교정, 잘리면 finishReason=MAX_TOKENS 와 앞부분만
+  - Supabase: /auth/v1/user (--auth remote 일 때 요청마다 조회됨)
+- API 는 하위 프로세스(uvicorn main:app)로 띄우고, 저장소는 REPOSITORY_BACKEND=sqlite (작업 디렉터리 안)
+- 가상 사용자 --concurrency 명이 /api/transcribe 업로드 → /api/status 폴링을 반복 (총 --jobs 건)
+- 결과
+  - 처리량(jobs/s), 클라이언트 측 업로드/폴링/전체 소요 p50/p95/p99
+  - 단계별 p50/p95/p99: API 가 TRACE_EXPORT_FILE 로 남긴 구간(split, stt.chunk, correct.window, save ...)
+  - 이벤트 루프 지연: API /metrics 의 mallog24_event_loop_lag_seconds (측정 구간 차이, 구간 보간)
+  - 메모리: API 프로세스 RSS 시작/최대/끝 (Linux /proc)
+  - --output 으로 JSON 저장 (git 커밋을 build 로 기록 → 빌드끼리 비교)
+
+사용:
+    python loadtest.py --jobs 40 --concurrency 8 --workers 4
+    python loadtest.py --jobs 100 --concurrency 16 --gemini-429-rate 0.05 --truncate-rate 0.02 --output before.json
+기본 오디오(--audio-seconds 60, 16kHz 무음 WAV)는 24MB 이하라 분할하지 않음. 더 길게 주면 분할에 ffmpeg 필요
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import math
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+TERMINAL_STATUSES = {"completed", "error", "cancelled", "not_found"}
+LOADTEST_JWT_SECRET = "loadtest-stand-in-secret-" + "x" * 16
+METRIC_PREFIX = "mallog24_"
+
+_VOCABULARY = (
+    "오늘 말씀은 렘넌트 7이정표 7망대 7여정 237 나라 5000종족 전도 기도 응답 고난 가운데 은혜 언약 "
+    "하나님 그리스도 성령 현장 치유 다락방 전도자 제자 증거 복음 교회 예배 찬양 축복 회복 "
+).split()
+
+
+# ===== 대역 서버 =====
+
+class StandInStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def inc(self, service: str, key: str) -> None:
+        with self.lock:
+            service_counts = self.counts.setdefault(service, {"requests": 0, "rate_limited": 0, "truncated": 0})
+            service_counts[key] = service_counts.get(key, 0) + 1
+
+
+class StandInConfig:
+    def __init__(self, args: argparse.Namespace):
+        self.latency_ms = {
+            "openai": args.openai_latency_ms,
+            "gemini": args.gemini_latency_ms,
+            "supabase": args.supabase_latency_ms,
+        }
+        self.rate_429 = {"openai": args.openai_429_rate, "gemini": args.gemini_429_rate, "supabase": 0.0}
+        self.gemini_ms_per_kchar = args.gemini_ms_per_kchar
+        self.jitter = args.jitter
+        self.truncate_rate = {"openai": args.truncate_rate, "gemini": args.truncate_rate, "supabase": 0.0}
+        self.transcript_chars = args.transcript_chars
+        self.stats = StandInStats()
+
+
+def _sample_transcript(chars: int, rng: random.Random) -> str:
+    words, length = [], 0
+    while length < chars:
+        word = rng.choice(_VOCABULARY)
+        words.append(word)
+        length += len(word) + 1
+    sentences = [" ".join(words[i:i + 12]) + "." for i in range(0, len(words), 12)]
+    return " ".join(sentences)
+
+
+def _decode_jwt_subject(authorization: str) -> str | None:
+    try:
+        payload = authorization.split()[-1].split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload))["sub"]
+    except Exception:
+        return None
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    service = ""
+    config: StandInConfig = None
+    protocol_version = "HTTP/1.1"
+
+    def _sleep(self, extra_ms: float = 0.0) -> None:
+        base = self.config.latency_ms[self.service] + extra_ms
+        jitter = self.config.jitter
+        time.sleep(max(0.0, base * (1 + random.uniform(-jitter, jitter))) / 1000)
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status: int, payload: dict, headers: dict | None = None) -> None:
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json", headers)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _start(self) -> tuple[bool, bool]:
+        """요청 집계 + 429 / 잘림 여부 결정"""
+        stats = self.config.stats
+        stats.inc(self.service, "requests")
+        if random.random() < self.config.rate_429[self.service]:
+            stats.inc(self.service, "rate_limited")
+            return True, False
+        truncated = random.random() < self.config.truncate_rate[self.service]
+        if truncated:
+            stats.inc(self.service, "truncated")
+        return False, truncated
+
+    def log_message(self, *args):
+        pass
+
+
+class OpenAIStandIn(_StandInHandler):
+    service = "openai"
+
+    def do_POST(self):
+        body = self._read_body()
+        if not self.path.endswith("/audio/transcriptions"):
+            self._json(404, {"error": {"message": f"stand-in does not serve {self.path}"}})
+            return
+        rate_limited, truncated = self._start()
+        self._sleep()
+        if rate_limited:
+            self._json(429, {"error": {
+                "message": "Rate limit reached for whisper-1 (stand-in).",
+                "type": "requests",
+                "code": "rate_limit_exceeded",
+            }}, headers={"retry-after": "1"})
+            return
+        text = _sample_transcript(self.config.transcript_chars, random.Random())
+        if truncated:
+            text = text[: len(text) // 3]
+        if b"verbose_json" in body:
+            pieces = [text[i:i + 60] for i in range(0, len(text), 60)]
+            segments = [
+                {"id": index, "start": index * 5.0, "end": index * 5.0 + 4.5, "text": piece}
+                for index, piece in enumerate(pieces)
+            ]
+            self._json(200, {"task": "transcribe", "language": "korean", "text": text, "segments": segments})
+        else:
+            self._send(200, text.encode("utf-8"), "text/plain; charset=utf-8")
+
+
+_RAW_SECTION_RE = re.compile(r"\[(?:원본 텍스트|Original Text)\]\n(.*)$", re.DOTALL)
+
+
+class GeminiStandIn(_StandInHandler):
+    service = "gemini"
+
+    def do_GET(self):
+        if "/models" in self.path:
+            self._json(200, {"models": [{
+                "name": "models/gemini-2.5-flash",
+                "supportedGenerationMethods": ["generateContent", "countTokens"],
+            }]})
+            return
+        self._json(404, {"error": {"code": 404, "message": f"stand-in does not serve {self.path}"}})
+
+    def do_POST(self):
+        body = self._read_body()
+        if ":generateContent" not in self.path:
+            self._json(404, {"error": {"code": 404, "message": f"stand-in does not serve {self.path}"}})
+            return
+        rate_limited, truncated = self._start()
+        try:
+            request = json.loads(body or b"{}")
+            prompt = "".join(
+                part.get("text", "")
+                for content in request.get("contents", [])
+                for part in content.get("parts", [])
+            )
+        except ValueError:
+            prompt = ""
+        match = _RAW_SECTION_RE.search(prompt)
+        text = match.group(1) if match else prompt
+        self._sleep(len(text) / 1000 * self.config.gemini_ms_per_kchar)
+        if rate_limited:
+            self._json(429, {"error": {
+                "code": 429,
+                "message": "Resource has been exhausted (e.g. check quota). (stand-in)",
+                "status": "RESOURCE_EXHAUSTED",
+            }})
+            return
+        finish_reason = 1  # STOP (enum-encoding=int)
+        if truncated:
+            text = text[: len(text) // 3]
+            finish_reason = 2  # MAX_TOKENS
+        self._json(200, {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": finish_reason}],
+            "usageMetadata": {
+                "promptTokenCount": len(prompt) // 2,
+                "candidatesTokenCount": len(text) // 2,
+                "totalTokenCount": (len(prompt) + len(text)) // 2,
+            },
+        })
+
+
+class SupabaseStandIn(_StandInHandler):
+    service = "supabase"
+
+    def do_GET(self):
+        if self.path.startswith("/auth/v1/.well-known/jwks.json"):
+            self._json(200, {"keys": []})
+            return
+        if not self.path.startswith("/auth/v1/user"):
+            self._json(404, {"message": f"stand-in does not serve {self.path}"})
+            return
+        self._start()
+        self._sleep()
+        user_id = _decode_jwt_subject(self.headers.get("Authorization") or "")
+        if not user_id:
+            self._json(401, {"msg": "invalid JWT"})
+            return
+        self._json(200, {"id": user_id, "aud": "authenticated", "role": "authenticated", "email": f"{user_id}@loadtest.local"})
+
+
+def start_stand_in(handler: type, config: StandInConfig) -> ThreadingHTTPServer:
+    bound = type(handler.__name__, (handler,), {"config": config})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), bound)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name=f"stand-in-{handler.service}", daemon=True).start()
+    return server
+
+
+# ===== 준비: 오디오, 토큰, API 프로세스 =====
+
+def make_wav(path: str, seconds: float, sample_rate: int = 16000) -> None:
+    """16kHz mono 16bit 무음 WAV (크기 = 약 32KB/초)"""
+    frames = int(seconds * sample_rate)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        block = b"\x00\x00" * sample_rate
+        for _ in range(frames // sample_rate):
+            f.writeframes(block)
+        f.writeframes(b"\x00\x00" * (frames % sample_rate))
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def make_token(user_id: str, secret: str = LOADTEST_JWT_SECRET) -> str:
+    """HS256 JWT (--auth local 이면 API 가 이 시크릿으로 직접 검증, remote 면 Supabase 대역 서버로 조회)"""
+    header = _b64url(json.dumps({"alg": "HS256", "typ": "JWT"}).encode("utf-8"))
+    payload = _b64url(json.dumps({
+        "sub": user_id,
+        "aud": "authenticated",
+        "role": "authenticated",
+        "email": f"{user_id}@loadtest.local",
+        "exp": int(time.time()) + 86400,
+    }).encode("utf-8"))
+    signature = hmac.new(secret.encode("utf-8"), f"{header}.{payload}".encode("ascii"), hashlib.sha256).digest()
+    return f"{header}.{payload}.{_b64url(signature)}"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _git_build() -> str:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=BACKEND_DIR, capture_output=True, text=True
+        ).stdout.strip()
+        return f"{commit}{'-dirty' if dirty else ''}"
+    except Exception:
+        return "unknown"
+
+
+def api_environment(args: argparse.Namespace, workdir: str, stand_ins: dict) -> dict:
+    def url(name: str) -> str:
+        return f"http://127.0.0.1:{stand_ins[name].server_port}"
+
+    env = dict(os.environ)
+    env.update({
+        "OPENAI_API_KEY": "loadtest",
+        "OPENAI_BASE_URL": f"{url('openai')}/v1",
+        "GEMINI_API_KEY": "loadtest",
+        "GEMINI_API_ENDPOINT": url("gemini"),
+        "SUPABASE_URL": url("supabase"),
+        "SUPABASE_KEY": "loadtest",
+        "SUPABASE_JWT_SECRET": LOADTEST_JWT_SECRET if args.auth == "local" else "",
+        "REPOSITORY_BACKEND": "sqlite",
+        "REPOSITORY_DB_PATH": os.path.join(workdir, "data.db"),
+        "STATUS_STORE_BACKEND": "sqlite",
+        "STATUS_STORE_DB_PATH": os.path.join(workdir, "status.db"),
+        "JOB_QUEUE_DB_PATH": os.path.join(workdir, "jobs.db"),
+        "WEBHOOK_DB_PATH": os.path.join(workdir, "webhooks.db"),
+        "WRITE_BEHIND_DB_PATH": os.path.join(workdir, "write_journal.db"),
+        "SEARCH_INDEX_DB_PATH": os.path.join(workdir, "search.db"),
+        "SEMANTIC_SEARCH_ENABLED": "0",
+        "BLOB_STORE_BACKEND": "local",
+        "BLOB_STORE_DIR": os.path.join(workdir, "blobs"),
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        "TRACE_EXPORT_FILE": os.path.join(workdir, "spans.jsonl"),
+        "TRACE_EXPORT_URL": "",
+        "TRACE_SAMPLE_RATE": "1",
+        "TRACE_MAX_PER_SECOND": "100000",
+        "METRICS_ENABLED": "1",
+        "METRICS_TOKEN": "",
+        "PROFILE_TOKEN": "",
+        "PROFILE_ALL_JOBS": "0",
+    })
+    if args.workers is not None:
+        env["EMBEDDED_WORKERS"] = str(args.workers)
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return env
+
+
+def _rss_mb(pid: int) -> dict | None:
+    """Linux /proc 의 현재/최대 RSS (MB)"""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return {
+            "rss": int(fields["VmRSS"].split()[0]) / 1024,
+            "hwm": int(fields["VmHWM"].split()[0]) / 1024,
+        }
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+class MemorySampler(threading.Thread):
+    def __init__(self, pid: int, interval: float = 0.5):
+        super().__init__(name="memory-sampler", daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples: list[float] = []
+        self.hwm = 0.0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            usage = _rss_mb(self.pid)
+            if usage:
+                self.samples.append(usage["rss"])
+                self.hwm = max(self.hwm, usage["hwm"])
+            self._stop_event.wait(self.interval)
+
+    def stop(self) -> dict | None:
+        self._stop_event.set()
+        self.join()
+        if not self.samples:
+            return None
+        return {
+            "start_mb": round(self.samples[0], 1),
+            "peak_mb": round(max(max(self.samples), self.hwm), 1),
+            "end_mb": round(self.samples[-1], 1),
+        }
+
+
+# ===== 집계 =====
+
+def percentiles(values: list[float]) -> dict:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def rank(q: float) -> float:
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+    return {
+        "count": len(ordered),
+        "p50": round(rank(0.50), 2),
+        "p95": round(rank(0.95), 2),
+        "p99": round(rank(0.99), 2),
+        "max": round(ordered[-1], 2),
+    }
+
+
+def parse_histogram(text: str, name: str) -> dict:
+    """Prometheus 텍스트에서 라벨 없는 히스토그램 하나 → {le: 누적 수}, sum, count"""
+    buckets, total, count = {}, 0.0, 0
+    full = METRIC_PREFIX + name
+    for line in text.splitlines():
+        if line.startswith(f"{full}_bucket"):
+            le = re.search(r'le="([^"]+)"', line).group(1)
+            buckets[math.inf if le == "+Inf" else float(le)] = float(line.rsplit(" ", 1)[1])
+        elif line.startswith(f"{full}_sum"):
+            total = float(line.rsplit(" ", 1)[1])
+        elif line.startswith(f"{full}_count"):
+            count = int(float(line.rsplit(" ", 1)[1]))
+    return {"buckets": buckets, "sum": total, "count": count}
+
+
+def histogram_delta(before: dict, after: dict) -> dict:
+    return {
+        "buckets": {le: value - before["buckets"].get(le, 0.0) for le, value in after["buckets"].items()},
+        "sum": after["sum"] - before["sum"],
+        "count": after["count"] - before["count"],
+    }
+
+
+def histogram_quantile(histogram: dict, q: float) -> float | None:
+    """구간 안 선형 보간 (Prometheus histogram_quantile 과 같은 방식)"""
+    count = histogram["count"]
+    if count <= 0:
+        return None
+    target = q * count
+    lower_bound, lower_count = 0.0, 0.0
+    for upper in sorted(histogram["buckets"]):
+        cumulative = histogram["buckets"][upper]
+        if cumulative >= target:
+            if upper == math.inf:
+                return lower_bound
+            span = cumulative - lower_count
+            fraction = (target - lower_count) / span if span else 1.0
+            return lower_bound + (upper - lower_bound) * fraction
+        lower_bound, lower_count = upper, cumulative
+    return lower_bound
+
+
+def read_spans(path: str) -> dict[str, list[float]]:
+    durations: dict[str, list[float]] = {}
+    if not os.path.exists(path):
+        return durations
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                span = json.loads(line)
+            except ValueError:
+                continue
+            durations.setdefault(span["name"], []).append(span["duration_ms"])
+    return durations
+
+
+# ===== 부하 =====
+
+class LoadResult:
+    def __init__(self):
+        self.upload_ms: list[float] = []
+        self.poll_ms: list[float] = []
+        self.end_to_end_ms: list[float] = []
+        self.outcomes: dict[str, int] = {}
+        self.http_errors: dict[str, int] = {}
+        self.first_upload: float | None = None
+        self.last_finish: float | None = None
+
+    def outcome(self, status: str) -> None:
+        self.outcomes[status] = self.outcomes.get(status, 0) + 1
+
+    def http_error(self, key: str) -> None:
+        self.http_errors[key] = self.http_errors.get(key, 0) + 1
+
+
+async def run_load(args: argparse.Namespace, base_url: str, audio_path: str) -> LoadResult:
+    result = LoadResult()
+    with open(audio_path, "rb") as f:
+        audio = f.read()
+    tokens = [make_token(f"loadtest-user-{index}") for index in range(args.users or args.concurrency)]
+    job_numbers = iter(range(args.jobs))
+
+    async def virtual_user(slot: int, client: httpx.AsyncClient) -> None:
+        headers = {"Authorization": f"Bearer {tokens[slot % len(tokens)]}"}
+        for _ in job_numbers:
+            started = time.perf_counter()
+            if result.first_upload is None:
+                result.first_upload = started
+            try:
+                response = await client.post(
+                    "/api/transcribe",
+                    headers=headers,
+                    files={"file": ("loadtest.wav", audio, "audio/wav")},
+                    data={"language": args.language, "correct": "true", "transcription_type": args.type},
+                )
+            except httpx.HTTPError as e:
+                result.http_error(f"upload {type(e).__name__}")
+                result.outcome("upload_failed")
+                continue
+            result.upload_ms.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                result.http_error(f"upload {response.status_code}")
+                result.outcome("upload_failed")
+                continue
+            task_id = response.json()["task_id"]
+
+            status = "queued"
+            deadline = started + args.job_timeout
+            while status not in TERMINAL_STATUSES and time.perf_counter() < deadline:
+                await asyncio.sleep(args.poll_interval)
+                poll_started = time.perf_counter()
+                try:
+                    poll = await client.get(f"/api/status/{task_id}", headers=headers)
+                except httpx.HTTPError as e:
+                    result.http_error(f"status {type(e).__name__}")
+                    continue
+                result.poll_ms.append((time.perf_counter() - poll_started) * 1000)
+                if poll.status_code != 200:
+                    result.http_error(f"status {poll.status_code}")
+                    continue
+                status = poll.json().get("status", status)
+            finished = time.perf_counter()
+            result.last_finish = finished
+            if status in TERMINAL_STATUSES:
+                result.end_to_end_ms.append((finished - started) * 1000)
+                result.outcome(status)
+            else:
+                result.outcome("timeout")
+
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        await asyncio.gather(*(virtual_user(slot, client) for slot in range(args.concurrency)))
+    return result
+
+
+def _wait_for_api(base_url: str, process: subprocess.Popen, timeout: float = 120) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API 프로세스가 종료됨 (code {process.returncode})")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError("API 가 제시간에 뜨지 않음")
+
+
+def _print_report(report: dict) -> None:
+    load = report["load"]
+    print(f"\nbuild {report['build']}  concurrency {report['config']['concurrency']}  jobs {report['config']['jobs']}")
+    print(f"outcomes {load['outcomes']}  http errors {load['http_errors'] or '-'}")
+    print(f"throughput {load['throughput_jobs_per_s']:.3f} jobs/s over {load['elapsed_s']:.1f} s")
+    print(f"\n{'stage (ms)':<22}{'count':>7}{'p50':>11}{'p95':>11}{'p99':>11}{'max':>11}")
+    for name, stats in list(report["client"].items()) + list(report["stages"].items()):
+        if not stats.get("count"):
+            continue
+        print(f"{name:<22}{stats['count']:>7}{stats['p50']:>11.1f}{stats['p95']:>11.1f}{stats['p99']:>11.1f}{stats['max']:>11.1f}")
+    lag = report["event_loop_lag_ms"]
+    if lag:
+        print(f"\nevent loop lag (ms)   samples {lag['count']}  mean {lag['mean']}  p50 {lag['p50']}  p99 {lag['p99']}")
+    memory = report["memory"]
+    if memory:
+        print(f"api memory (MB)       start {memory['start_mb']}  peak {memory['peak_mb']}  end {memory['end_mb']}")
+    print(f"stand-ins             {report['stand_ins']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="말로그24 오프라인 부하 테스트")
+    parser.add_argument("--jobs", type=int, default=20, help="총 업로드 수")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시에 업로드/폴링하는 가상 사용자 수")
+    parser.add_argument("--users", type=int, default=0, help="서로 다른 사용자 수 (기본: concurrency)")
+    parser.add_argument("--workers", type=int, default=None, help="API 내장 워커 수 (EMBEDDED_WORKERS)")
+    parser.add_argument("--type", default="sermon", choices=["sermon", "phonecall", "conversation"])
+    parser.add_argument("--language", default="ko")
+    parser.add_argument("--audio-seconds", type=float, default=60)
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--job-timeout", type=float, default=600)
+    parser.add_argument("--auth", choices=["remote", "local"], default="remote",
+                        help="remote: 요청마다 Supabase 대역 서버 조회 / local: JWT 로컬 검증")
+    parser.add_argument("--openai-latency-ms", type=float, default=800)
+    parser.add_argument("--gemini-latency-ms", type=float, default=1500)
+    parser.add_argument("--gemini-ms-per-kchar", type=float, default=0, help="교정 텍스트 1000자당 추가 지연")
+    parser.add_argument("--supabase-latency-ms", type=float, default=30)
+    parser.add_argument("--jitter", type=float, default=0.2, help="지연 변동 비율 (±)")
+    parser.add_argument("--openai-429-rate", type=float, default=0.0)
+    parser.add_argument("--gemini-429-rate", type=float, default=0.0)
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="잘린 응답 비율 (Whisper/Gemini)")
+    parser.add_argument("--transcript-chars", type=int, default=4000, help="Whisper 대역 응답 길이")
+    parser.add_argument("--env", action="append", default=[], help="API 프로세스 환경 변수 KEY=VALUE (반복 가능)")
+    parser.add_argument("--workdir", default=None, help="DB/업로드/구간 파일 위치 (기본: 임시 디렉터리)")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="mallog24_loadtest_")
+    os.makedirs(workdir, exist_ok=True)
+    config = StandInConfig(args)
+    stand_ins = {
+        "openai": start_stand_in(OpenAIStandIn, config),
+        "gemini": start_stand_in(GeminiStandIn, config),
+        "supabase": start_stand_in(SupabaseStandIn, config),
+    }
+    audio_path = os.path.join(workdir, "loadtest.wav")
+    make_wav(audio_path, args.audio_seconds)
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    log_path = os.path.join(workdir, "api.log")
+    print(f"workdir {workdir} (API log: {log_path})")
+    with open(log_path, "wb") as log_file:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=api_environment(args, workdir, stand_ins),
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+        )
+    try:
+        _wait_for_api(base_url, process)
+        lag_before = parse_histogram(httpx.get(f"{base_url}/metrics").text, "event_loop_lag_seconds")
+        memory = MemorySampler(process.pid)
+        memory.start()
+
+        started = time.perf_counter()
+        load = asyncio.run(run_load(args, base_url, audio_path))
+        elapsed = (load.last_finish or time.perf_counter()) - (load.first_upload or started)
+
+        lag_after = parse_histogram(httpx.get(f"{base_url}/metrics").text, "event_loop_lag_seconds")
+        memory_report = memory.stop()
+        time.sleep(1.0)  # API 의 구간 내보내기 스레드가 마지막 묶음을 쓸 시간
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        for server in stand_ins.values():
+            server.shutdown()
+
+    lag = histogram_delta(lag_before, lag_after)
+    completed = load.outcomes.get("completed", 0)
+    report = {
+        "build": _git_build(),
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "workdir")},
+        "load": {
+            "outcomes": load.outcomes,
+            "http_errors": load.http_errors,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_jobs_per_s": round(completed / elapsed, 4) if elapsed > 0 else 0.0,
+        },
+        "client": {
+            "client.upload": percentiles(load.upload_ms),
+            "client.status_poll": percentiles(load.poll_ms),
+            "client.end_to_end": percentiles(load.end_to_end_ms),
+        },
+        "stages": {name: percentiles(values) for name, values in sorted(read_spans(os.path.join(workdir, "spans.jsonl")).items())},
+        "event_loop_lag_ms": {
+            "count": lag["count"],
+            "mean": round(lag["sum"] / lag["count"] * 1000, 2),
+            "p50": round(histogram_quantile(lag, 0.50) * 1000, 2),
+            "p99": round(histogram_quantile(lag, 0.99) * 1000, 2),
+        } if lag["count"] > 0 else None,
+        "memory": memory_report,
+        "stand_ins": config.stats.counts,
+    }
+    _print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
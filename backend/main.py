@@ -1,5 +1,6 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form, BackgroundTasks, Header
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Header, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, Response
 import google.generativeai as genai
 from openai import OpenAI
 import os
@@ -9,16 +10,19 @@ import asyncio
 import random
 from datetime import datetime
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 import tempfile
 import pathlib
 import time
 import math
 import mimetypes
 import re
-import urllib.request
-import urllib.error
 import urllib.parse
+import hashlib
+import glob
+import base64
+import hmac
+import logging
 
 # 다락방 용어 임포트
 from church_terms import (
@@ -34,6 +38,32 @@ from church_terms import (
     COMMON_MISTAKES,
     print_terms_summary
 )
+from diarization import diarize_file, align_segments_to_turns
+from job_queue import SQLiteJobQueue
+from worker import JobWorker
+from http_cache import (
+    IMMUTABLE_CACHE_CONTROL,
+    cached_response,
+    get_completed,
+    parse_byte_range,
+    remember_completed,
+)
+from blob_store import blob_store
+from repository import create_repositories, repository_metrics
+from write_behind import WRITE_BEHIND_ENABLED, WriteBehindFlusher, find_write_behind
+from search_index import SearchIndex
+from semantic_index import SemanticIndex, create_encoder
+from status_store import create_status_store, ACTIVE_STATUSES
+from scheduler import probe_audio_duration
+from task_registry import registries, registry_metrics
+import metrics
+import tracing
+from auth_tokens import TokenVerifier, InvalidTokenError
+import http_client
+import profiling
+from progress import ProgressTracker, TaskCancelled, task_progress, request_cancel
+from partials import PartialTranscript, task_partials, filter_partial
+from webhooks import WebhookStore, WebhookDispatcher, validate_webhook_url
 
 load_dotenv()
 
@@ -47,37 +77,80 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+async def _profile_request(request: Request, call_next):
+    """X-Profile: <PROFILE_TOKEN> 헤더가 붙은 요청 하나를 프로파일"""
+    if not profiling.header_allowed(request.headers.get(profiling.PROFILE_HEADER)):
+        return await call_next(request)
+    profile, output_dir = profiling.profile_request(request.method, request.url.path)
+    with profile:
+        response = await call_next(request)
+    response.headers["X-Profile-Dir"] = output_dir
+    return response
+
+
+# 프로파일 토큰이 없으면 미들웨어 자체를 등록하지 않음
+if profiling.PROFILE_TOKEN:
+    app.middleware("http")(_profile_request)
+
 # Gemini 설정
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
-    print("Error: GEMINI_API_KEY is not set.")
-genai.configure(api_key=GEMINI_API_KEY)
+    tracing.log("GEMINI_API_KEY is not set.", level="error")
+# GEMINI_API_ENDPOINT: 프록시/로컬 대역 서버 주소 (REST 전송, 예: http://127.0.0.1:8091)
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+if GEMINI_API_ENDPOINT:
+    genai.configure(api_key=GEMINI_API_KEY, transport="rest", client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+else:
+    genai.configure(api_key=GEMINI_API_KEY)
 
 # OpenAI (Whisper) 설정
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
-    print("Warning: OPENAI_API_KEY is not set. Whisper STT unavailable, falling back to Gemini.")
+    tracing.log("OPENAI_API_KEY is not set. Whisper STT unavailable, falling back to Gemini.", level="warning")
 openai_client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
 
 # Whisper 파일 크기 제한 (25MB)
 WHISPER_MAX_SIZE = 24 * 1024 * 1024  # 약간 여유
+CHUNK_DURATION_MS = 10 * 60 * 1000  # 10분
+CHUNK_OVERLAP_MS = 2000  # 2초 겹침 (문장 끊김 방지)
+
+# Gemini 교정 창 크기 (긴 녹취는 문단 경계에서 나눠 순서대로 교정)
+CORRECTION_WINDOW_CHARS = int(os.getenv("CORRECTION_WINDOW_CHARS", "30000"))
+
+# 상태 스트림(SSE): 서버 측 상태 확인 간격, 하트비트 간격, 연결 최대 유지 시간(초)
+STATUS_STREAM_INTERVAL = float(os.getenv("STATUS_STREAM_INTERVAL", "1"))
+STATUS_STREAM_HEARTBEAT = float(os.getenv("STATUS_STREAM_HEARTBEAT", "15"))
+STATUS_STREAM_MAX_SECONDS = float(os.getenv("STATUS_STREAM_MAX_SECONDS", "600"))
+TERMINAL_TASK_STATUSES = {"completed", "error", "cancelled", "not_found"}
+
+# 상태 스트림 토큰: EventSource 는 헤더를 못 보내므로 작업 하나의 스트림 전용 단기 토큰을 쿼리로 받음
+# (인스턴스가 여러 개면 STREAM_TOKEN_SECRET 을 같게 설정, 없으면 SUPABASE_JWT_SECRET → 프로세스별 임의 값)
+STREAM_TOKEN_SECRET = (os.getenv("STREAM_TOKEN_SECRET") or os.getenv("SUPABASE_JWT_SECRET") or "").encode("utf-8") or os.urandom(32)
+STREAM_TOKEN_TTL = int(os.getenv("STREAM_TOKEN_TTL", "3600"))
+
+# /metrics 조회 토큰 (설정 시 Authorization: Bearer <토큰> 필요)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# 음향 화자 분리 (통화/대화 유형, CPU 전용)
+DIARIZATION_ENABLED = os.getenv("DIARIZATION_ENABLED", "1") != "0"
 
 # 시작 시 용어 로딩 확인
 @app.on_event("startup")
 async def startup_event():
     print_terms_summary()
     if openai_client:
-        print("OpenAI Whisper: Ready")
+        tracing.log("OpenAI Whisper: Ready")
     else:
-        print("OpenAI Whisper: Not configured (Gemini fallback)")
+        tracing.log("OpenAI Whisper: Not configured (Gemini fallback)")
     try:
         if GEMINI_API_KEY:
-            print("Checking available Gemini models...")
+            tracing.log("Checking available Gemini models...")
             for m in genai.list_models():
                 if 'generateContent' in m.supported_generation_methods:
-                    print(f" - {m.name}")
+                    tracing.log(f" - {m.name}")
     except Exception as e:
-        print(f"Failed to list models: {e}")
+        tracing.log(f"Failed to list models: {e}", level="warning")
 
 @app.get("/")
 async def root():
@@ -93,16 +166,75 @@ async def root():
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 if not SUPABASE_URL or not SUPABASE_KEY:
-    print("Warning: SUPABASE_URL or SUPABASE_KEY not set.")
-supabase: Client = create_client(SUPABASE_URL or "", SUPABASE_KEY or "")
-
-# 인메모리 상태 추적
-task_status = {}
-task_owner = {}
+    tracing.log("SUPABASE_URL or SUPABASE_KEY not set.", level="warning")
+def _create_supabase_client() -> Client | None:
+    """Supabase 클라이언트 (DB 요청도 공유 연결 풀 사용). 설정이 없으면 None (로컬 SQLite 저장소로 실행)"""
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        return None
+    try:
+        options = ClientOptions(httpx_client=http_client.get_sync_client())
+    except TypeError:
+        # httpx_client 옵션이 없는 구버전 supabase-py
+        return create_client(SUPABASE_URL or "", SUPABASE_KEY or "")
+    return create_client(SUPABASE_URL or "", SUPABASE_KEY or "", options=options)
+
+
+supabase: Client | None = _create_supabase_client()
+
+# 변환 기록 / 저장 기록본 저장소 (REPOSITORY_BACKEND=supabase | sqlite, 읽기 캐시 포함)
+transcription_repo, record_repo = create_repositories(supabase_client=supabase, write_behind=WRITE_BEHIND_ENABLED)
+# 변환 기록 일괄 반영 (API/워커 프로세스마다 하나, 같은 저널 공유)
+transcription_writer = find_write_behind(transcription_repo)
+_write_behind_flusher: WriteBehindFlusher | None = None
+# 녹취 전문 검색 인덱스 (로컬 SQLite FTS5, 변환 완료 시 추가)
+search_index = SearchIndex()
+# 문단 임베딩 의미 검색 (SEMANTIC_SEARCH_ENABLED=1 + fastembed 설치 시)
+_semantic_encoder = create_encoder()
+semantic_index: SemanticIndex | None = SemanticIndex(_semantic_encoder) if _semantic_encoder else None
+
+# 영속 작업 큐 (재시작/재배포 후에도 대기·처리 중 작업 유지)
+job_queue = SQLiteJobQueue()
+UPLOAD_DIR = os.getenv("UPLOAD_DIR") or os.path.join(tempfile.gettempdir(), "mallog24_uploads")
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+# API 프로세스 내장 워커 수 (0이면 HTTP 전용, 변환은 `python -m worker`가 담당)
+EMBEDDED_WORKERS = int(os.getenv("EMBEDDED_WORKERS", "2"))
+ORPHAN_UPLOAD_MAX_AGE = 3600
+_embedded_worker: JobWorker | None = None
+_event_loop_monitor: asyncio.Task | None = None
+
+# 공유 작업 상태 (uvicorn 워커/인스턴스 간 일관된 /api/status)
+status_store = create_status_store(supabase_client=supabase)
+
+# 완료 웹훅 (전송은 워커 쪽 WebhookDispatcher 담당)
+webhook_store = WebhookStore()
+_webhook_dispatcher: WebhookDispatcher | None = None
+
+
+
+def _collect_runtime_metrics() -> None:
+    """/metrics 수집 직전: 큐 길이, 캐시 적중/항목 수, write-behind 대기 행"""
+    for status, count in job_queue.counts().items():
+        metrics.QUEUE_JOBS.set(count, status=status)
+    caches = list(registries.values()) + [
+        repository.cache for repository in (transcription_repo, record_repo) if hasattr(repository, "cache")
+    ]
+    for cache in caches:
+        metrics.CACHE_LOOKUPS.set_total(cache.hits, cache=cache.name, result="hit")
+        metrics.CACHE_LOOKUPS.set_total(cache.misses, cache=cache.name, result="miss")
+    for name, registry in registries.items():
+        metrics.CACHE_ENTRIES.set(len(registry), cache=name)
+    if transcription_writer:
+        journal_metrics = transcription_writer.journal.metrics()
+        metrics.WRITE_BEHIND_PENDING.set(journal_metrics["pending"])
+        metrics.WRITE_BEHIND_DEAD.set(journal_metrics["dead_letter"])
+
+
+metrics.register_collector(_collect_runtime_metrics)
 
 # 모델 캐시
 _model_cache = {"model": None, "cached_at": 0}
 MODEL_CACHE_TTL = 3600
+token_verifier = TokenVerifier()
 AUTH_TIMEOUT = 20
 ALLOWED_RECORD_CATEGORIES = {
     "meeting_keywords",
@@ -110,7 +242,18 @@ ALLOWED_RECORD_CATEGORIES = {
     "sermon_core_summary",
 }
 ALLOWED_OAUTH_PROVIDERS = {"google", "kakao"}
-TRANSCRIPTION_SCOPE_VALIDATED = False
+# transcriptions 선택 컬럼(user_id, summary_preview, text_blobs) 존재 여부 (확인한 것만)
+TRANSCRIPTION_COLUMNS_READY: dict[str, bool] = {}
+TRANSCRIPT_TEXT_FIELDS = ("raw_text", "corrected_text")
+HISTORY_PREVIEW_CHARS = 50
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "20"))
+HISTORY_PAGE_MAX = 100
+RECORDS_PAGE_SIZE = int(os.getenv("RECORDS_PAGE_SIZE", "20"))
+SEARCH_PAGE_SIZE = 20
+# 검색 인덱스 backfill 때 한 번에 읽는 기록 수
+SEARCH_BACKFILL_BATCH = 50
+# 목록 보기(view=list)에서 내려주는 컬럼 - content 제외
+RECORD_LIST_COLUMNS = "id, user_id, category, title, task_id, source_type, created_at"
 AUDIO_MIME_TYPES = {
     ".mp3": "audio/mpeg",
     ".wav": "audio/wav",
@@ -173,7 +316,7 @@ def _extract_auth_error_message(raw_text: str) -> str:
         return raw_text or "인증 서버 오류"
 
 
-def _supabase_auth_request(path: str, method: str = "POST", payload: dict | None = None, token: str | None = None) -> dict:
+async def _supabase_auth_request(path: str, method: str = "POST", payload: dict | None = None, token: str | None = None) -> dict:
     if not SUPABASE_URL or not SUPABASE_KEY:
         raise HTTPException(status_code=500, detail="Supabase 인증 환경이 설정되지 않았습니다.")
 
@@ -188,16 +331,21 @@ def _supabase_auth_request(path: str, method: str = "POST", payload: dict | None
     if token:
         headers["Authorization"] = f"Bearer {token}"
 
-    body = json.dumps(payload).encode("utf-8") if payload is not None else None
-    request = urllib.request.Request(url, headers=headers, data=body, method=method)
+    try:
+        response = await http_client.request(
+            method,
+            url,
+            headers=headers,
+            content=json.dumps(payload).encode("utf-8") if payload is not None else None,
+            timeout=AUTH_TIMEOUT,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Supabase 인증 요청 실패: {str(e)}")
 
+    if response.status_code >= 400:
+        raise HTTPException(status_code=response.status_code, detail=_extract_auth_error_message(response.text))
     try:
-        with urllib.request.urlopen(request, timeout=AUTH_TIMEOUT) as response:
-            raw = response.read().decode("utf-8")
-            return json.loads(raw) if raw else {}
-    except urllib.error.HTTPError as e:
-        error_raw = e.read().decode("utf-8", errors="ignore")
-        raise HTTPException(status_code=e.code, detail=_extract_auth_error_message(error_raw))
+        return response.json() if response.content else {}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Supabase 인증 요청 실패: {str(e)}")
 
@@ -212,9 +360,22 @@ def _extract_bearer_token(authorization: str | None) -> str:
     return parts[1].strip()
 
 
-def _get_current_user(authorization: str | None) -> dict:
+async def _get_current_user(authorization: str | None, remote: bool = False) -> dict:
+    """
+    토큰 → 사용자. 기본은 JWT 로컬 검증(token_verifier), 로컬로 판단할 수 없을 때만 Supabase Auth 조회.
+    remote=True 이면 항상 Supabase Auth에서 전체 사용자 정보를 가져온다.
+    """
     token = _extract_bearer_token(authorization)
-    user = _supabase_auth_request("user", method="GET", token=token)
+    if not remote:
+        try:
+            # 캐시 적중은 바로, 아니면 스레드에서 검증 (JWKS 조회가 느려도 이벤트 루프를 막지 않음)
+            user = token_verifier.cached(token) or await asyncio.to_thread(token_verifier.verify, token)
+        except InvalidTokenError:
+            raise HTTPException(status_code=401, detail="유효하지 않은 사용자 토큰입니다.")
+        if user:
+            return user
+
+    user = await _supabase_auth_request("user", method="GET", token=token)
     if not user.get("id"):
         raise HTTPException(status_code=401, detail="유효하지 않은 사용자 토큰입니다.")
     return user
@@ -232,21 +393,158 @@ def _validate_redirect_url(redirect_to: str) -> str:
 
 
 def _ensure_transcriptions_user_scope_ready() -> None:
-    global TRANSCRIPTION_SCOPE_VALIDATED
-    if TRANSCRIPTION_SCOPE_VALIDATED:
+    if not _transcriptions_column_ready("user_id"):
+        raise HTTPException(
+            status_code=500,
+            detail="Supabase 설정 필요: backend/sql/transcriptions_user_scope.sql 을 먼저 실행하세요.",
+        )
+
+
+def _transcriptions_column_ready(column: str) -> bool:
+    """transcriptions 에 column 이 있는지 (마이그레이션 SQL 적용 여부, 한 번만 확인)"""
+    ready = TRANSCRIPTION_COLUMNS_READY.get(column)
+    if ready is None:
+        ready = transcription_repo.has_column(column)
+        TRANSCRIPTION_COLUMNS_READY[column] = ready
+    return ready
+
+
+def _history_preview_ready() -> bool:
+    """summary_preview 컬럼이 있는지 (없으면 sql/transcriptions_history_preview.sql 미적용)"""
+    return _transcriptions_column_ready("summary_preview")
+
+
+_history_preview_warned = False
+
+
+def _history_preview_column() -> str:
+    """
+    히스토리 미리보기를 읽을 컬럼. 마이그레이션 전이면 예전처럼 corrected_text 를 읽어 잘라 씀 (경고는 한 번만).
+    컬럼 확인 결과는 프로세스당 한 번만 하므로 SQL 적용 후에는 재시작해야 summary_preview 를 쓴다
+    """
+    global _history_preview_warned
+    if _history_preview_ready():
+        return "summary_preview"
+    if not _history_preview_warned:
+        _history_preview_warned = True
+        tracing.log(
+            "transcriptions.summary_preview missing, history reads corrected_text "
+            "(run backend/sql/transcriptions_history_preview.sql)",
+            level="warning",
+        )
+    return "corrected_text"
+
+
+# ===== 목록 페이지네이션 (keyset 커서) =====
+
+def _encode_cursor(created_at: str, key: str) -> str:
+    """마지막 행의 (created_at, 보조 키) → 불투명 커서 문자열"""
+    raw = json.dumps({"c": created_at, "k": key}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        created_at, key = payload["c"], payload["k"]
+        if not isinstance(created_at, str) or not isinstance(key, str):
+            raise ValueError
+        datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+    except Exception:
+        raise HTTPException(status_code=400, detail="cursor 값이 올바르지 않습니다.")
+    return created_at, key
+
+
+def _page_response(rows: list[dict], limit: int, key_column: str, items: list[dict]) -> dict:
+    """limit + 1 개를 조회한 결과 → {"items", "next_cursor", "has_more"}"""
+    has_more = len(rows) > limit
+    next_cursor = None
+    if has_more:
+        last = rows[limit - 1]
+        next_cursor = _encode_cursor(last["created_at"], str(last[key_column]))
+    return {"items": items[:limit], "next_cursor": next_cursor, "has_more": has_more}
+
+
+# ===== 녹취 본문 블롭 =====
+
+def _offload_transcript_texts(task_id: str, user_id: str, row: dict) -> None:
+    """
+    긴 raw_text/corrected_text 를 블롭 저장소로 옮기고 행에는 참조(text_blobs)만 남김.
+    저장소 미설정·text_blobs 컬럼 없음·업로드 실패 시 본문을 그대로 행에 둔다.
+    """
+    if not blob_store.enabled or not _transcriptions_column_ready("text_blobs"):
         return
+    refs = {}
+    for field in TRANSCRIPT_TEXT_FIELDS:
+        text = row.get(field)
+        if not blob_store.should_offload(text):
+            continue
+        try:
+            refs[field] = blob_store.put_text(f"transcripts/{user_id}/{task_id}/{field}", text)
+        except Exception as e:
+            tracing.log(f"Blob upload failed for {field}, storing inline: {e}", level="warning")
+            continue
+        row[field] = None
+    if refs:
+        row["text_blobs"] = refs
+
 
+def _transcript_text(row: dict, field: str) -> str | None:
+    """행의 본문 (블롭으로 옮겨졌으면 저장소에서 읽음)"""
+    text = row.get(field)
+    if text is not None:
+        return text
+    ref = (row.get("text_blobs") or {}).get(field)
+    return blob_store.read_text(ref) if ref else None
+
+
+# ===== 전문 검색 =====
+
+def _index_transcript(task_id: str, user_id: str, created_at: str, transcription_type: str | None, text: str) -> None:
+    """검색 인덱스에 추가 (실패해도 변환 결과에는 영향 없음, 로그만 남김)"""
     try:
-        supabase.table("transcriptions").select("user_id").limit(1).execute()
-        TRANSCRIPTION_SCOPE_VALIDATED = True
+        with metrics.STAGE_SECONDS.time(stage="search_index"):
+            search_index.add(task_id, user_id, created_at, transcription_type, text)
     except Exception as e:
-        error_text = str(e).lower()
-        if "user_id" in error_text and ("column" in error_text or "does not exist" in error_text):
-            raise HTTPException(
-                status_code=500,
-                detail="Supabase 설정 필요: backend/sql/transcriptions_user_scope.sql 을 먼저 실행하세요.",
-            )
-        raise
+        tracing.log(f"Search indexing failed: {e}", level="warning")
+
+
+def _embed_transcript(task_id: str, user_id: str, created_at: str, transcription_type: str | None, text: str) -> None:
+    """의미 검색 인덱스에 문단별 임베딩 추가 (CPU 작업, 실패해도 결과에는 영향 없음)"""
+    started = time.time()
+    try:
+        passages = semantic_index.add(task_id, user_id, created_at, transcription_type, text)
+        metrics.STAGE_SECONDS.observe(time.time() - started, stage="embed")
+        tracing.log(f"Embedded {passages} passages in {time.time() - started:.1f}s")
+    except Exception as e:
+        tracing.log(f"Semantic indexing failed: {e}", level="warning")
+
+
+def _backfill_search_index(user_id: str) -> None:
+    """인덱스가 생기기 전 완료된 기록을 사용자 첫 검색 때 한 번 채움"""
+    if search_index.is_backfilled(user_id):
+        return
+    indexed = search_index.indexed_task_ids(user_id)
+    columns = "task_id, status, created_at, transcription_type, corrected_text"
+    if _transcriptions_column_ready("text_blobs"):
+        columns += ", text_blobs"
+    cursor = None
+    added = 0
+    while True:
+        rows = transcription_repo.list_for_user(user_id, columns, SEARCH_BACKFILL_BATCH, cursor)
+        for row in rows:
+            if row.get("status") != "completed" or row["task_id"] in indexed:
+                continue
+            text = _transcript_text(row, "corrected_text")
+            if text:
+                search_index.add(row["task_id"], user_id, row["created_at"], row.get("transcription_type"), text)
+                added += 1
+        if len(rows) < SEARCH_BACKFILL_BATCH:
+            break
+        cursor = (rows[-1]["created_at"], str(rows[-1]["task_id"]))
+    search_index.mark_backfilled(user_id)
+    tracing.log(f"Search index backfilled for {user_id}: {added} transcripts")
 
 
 def _resolve_audio_mime_type(file_path: str) -> str:
@@ -361,6 +659,30 @@ def _parse_speaker_line(line: str) -> dict | None:
     }
 
 
+def _speaker_label_for_index(transcription_type: str, language: str, speaker_index: int) -> str:
+    if transcription_type == "phonecall":
+        token = "Speaker" if language == "en" else "화자"
+        return f"{token} {chr(ord('A') + speaker_index)}"
+
+    token = "Participant" if language == "en" else "참석자"
+    return f"{token} {speaker_index + 1}"
+
+
+def _format_diarized_transcript(segments: list[dict], transcription_type: str, language: str) -> str:
+    """화자 번호가 붙은 세그먼트 → "화자 A: ..." 형식 원문 (연속 발화는 병합)"""
+    utterances: list[list] = []
+    for segment in segments:
+        if utterances and utterances[-1][0] == segment["speaker"]:
+            utterances[-1][1] = f"{utterances[-1][1]} {segment['text']}".strip()
+        else:
+            utterances.append([segment["speaker"], segment["text"]])
+
+    return "\n\n".join(
+        f"{_speaker_label_for_index(transcription_type, language, speaker)}: {content}"
+        for speaker, content in utterances
+    )
+
+
 def _default_speaker_label(transcription_type: str, language: str, turn_index: int) -> str:
     if transcription_type == "phonecall":
         token = "Speaker" if language == "en" else "화자"
@@ -438,10 +760,18 @@ def _normalize_speaker_label(
     return base
 
 
-def _enforce_speaker_separation(text: str, transcription_type: str, language: str) -> str:
+def _enforce_speaker_separation(
+    text: str,
+    transcription_type: str,
+    language: str,
+    speaker_turns: list[dict] | None = None,
+) -> str:
     if transcription_type not in {"phonecall", "conversation"}:
         return text
 
+    # 음향 화자 분리 결과가 있으면 원문 화자 라벨을 신뢰하고 질문/응답 휴리스틱으로 뒤집지 않는다
+    acoustic_turns = bool(speaker_turns)
+
     body_lines, tail_lines = _split_transcript_body_and_tail(text)
     existing_label_count = sum(1 for line in body_lines if _parse_speaker_line(line))
     if not body_lines:
@@ -467,7 +797,7 @@ def _enforce_speaker_separation(text: str, transcription_type: str, language: st
             content = stripped
             if existing_label_count == 0:
                 label = _default_speaker_label(transcription_type, language, turn_index)
-                if transcription_type == "phonecall" and turn_index > 0:
+                if transcription_type == "phonecall" and turn_index > 0 and not acoustic_turns:
                     previous_label = utterances[-1][0]
                     if previous_had_question or _looks_like_short_response(content, language):
                         label = _flip_phonecall_label(previous_label, language)
@@ -476,7 +806,7 @@ def _enforce_speaker_separation(text: str, transcription_type: str, language: st
                 if not current_label:
                     current_label = _default_speaker_label(transcription_type, language, turn_index)
                 label = current_label
-                if transcription_type == "phonecall" and (previous_had_question or _looks_like_short_response(content, language)):
+                if transcription_type == "phonecall" and not acoustic_turns and (previous_had_question or _looks_like_short_response(content, language)):
                     label = _flip_phonecall_label(current_label, language)
                     current_label = label
 
@@ -526,10 +856,10 @@ def get_optimal_model():
         if selected:
             _model_cache["model"] = selected
             _model_cache["cached_at"] = time.time()
-            print(f"Model cached: {selected}")
+            tracing.log(f"Model cached: {selected}")
             return selected
     except Exception as e:
-        print(f"Model selection error: {e}")
+        tracing.log(f"Model selection error: {e}", level="warning")
     return "gemini-2.5-flash"
 
 
@@ -544,7 +874,7 @@ def split_audio_file(file_path: str) -> list[str]:
 
     from pydub import AudioSegment
 
-    print(f"File size {file_size / 1024 / 1024:.1f}MB > 24MB, splitting...")
+    tracing.log(f"File size {file_size / 1024 / 1024:.1f}MB > 24MB, splitting...")
 
     # 파일 확장자 확인
     ext = pathlib.Path(file_path).suffix.lower()
@@ -555,8 +885,8 @@ def split_audio_file(file_path: str) -> list[str]:
     duration_ms = len(audio)
 
     # 10분 단위로 분할 (겹침 2초)
-    chunk_duration = 10 * 60 * 1000  # 10분
-    overlap = 2000  # 2초 겹침 (문장 끊김 방지)
+    chunk_duration = CHUNK_DURATION_MS
+    overlap = CHUNK_OVERLAP_MS
 
     chunks = []
     start = 0
@@ -569,7 +899,7 @@ def split_audio_file(file_path: str) -> list[str]:
         chunk_path = f"{file_path}_chunk{chunk_idx}.mp3"
         chunk.export(chunk_path, format="mp3", bitrate="64k")
         chunks.append(chunk_path)
-        print(f"  Chunk {chunk_idx}: {start/1000:.0f}s ~ {end/1000:.0f}s ({os.path.getsize(chunk_path)/1024/1024:.1f}MB)")
+        tracing.log(f"Chunk {chunk_idx}: {start/1000:.0f}s ~ {end/1000:.0f}s ({os.path.getsize(chunk_path)/1024/1024:.1f}MB)")
 
         chunk_idx += 1
         start = end - overlap if end < duration_ms else end
@@ -577,11 +907,8 @@ def split_audio_file(file_path: str) -> list[str]:
     return chunks
 
 
-def whisper_transcribe(file_path: str, language: str = "ko", transcription_type: str = "sermon") -> str:
-    """
-    OpenAI Whisper API로 오디오 → 텍스트 변환.
-    25MB 초과 시 자동 분할 처리.
-    """
+def _build_whisper_prompt(language: str, transcription_type: str) -> str:
+    """Whisper 컨텍스트 힌트 (언어별 + 유형별)"""
     # Whisper prompt: 언어별 + 유형별 컨텍스트 힌트
     # 음질이 낮을 때 올바른 단어를 추정하는 데 도움이 되는 역할
     if language == "en":
@@ -637,13 +964,38 @@ def whisper_transcribe(file_path: str, language: str = "ko", transcription_type:
                 "KPI, ROI, OKR, 프로젝트, 마일스톤, 스프린트, 데드라인, 예산, 매출, 영업이익"
             )
 
-    chunks = split_audio_file(file_path)
+    return whisper_prompt
+
+
+def whisper_transcribe(
+    file_path: str,
+    language: str = "ko",
+    transcription_type: str = "sermon",
+    progress: ProgressTracker | None = None,
+    partial: PartialTranscript | None = None,
+) -> str:
+    """
+    OpenAI Whisper API로 오디오 → 텍스트 변환.
+    25MB 초과 시 자동 분할 처리.
+    """
+    whisper_prompt = _build_whisper_prompt(language, transcription_type)
+
+    with tracing.span("split") as split_span:
+        chunks = split_audio_file(file_path)
+        split_span.set("chunks", len(chunks))
+    if progress:
+        progress.stage("stt", len(chunks))
     all_text = []
 
     for i, chunk_path in enumerate(chunks):
-        print(f"  Whisper transcribing chunk {i+1}/{len(chunks)}...")
-
-        with open(chunk_path, "rb") as audio_file:
+        if progress:
+            progress.check_cancelled()
+        tracing.log(f"Whisper transcribing chunk {i+1}/{len(chunks)}...")
+
+        chunk_bytes = os.path.getsize(chunk_path)
+        with open(chunk_path, "rb") as audio_file, tracing.span(
+            "stt.chunk", index=i, bytes=chunk_bytes
+        ), metrics.track_call("openai", "whisper", bytes_out=chunk_bytes):
             response = openai_client.audio.transcriptions.create(
                 model="whisper-1",
                 file=audio_file,
@@ -653,21 +1005,164 @@ def whisper_transcribe(file_path: str, language: str = "ko", transcription_type:
             )
 
         all_text.append(response.strip())
+        if partial:
+            partial.add_draft(all_text[-1])
 
         # 청크 파일 삭제 (원본 제외)
         if chunk_path != file_path:
             os.unlink(chunk_path)
+        if progress:
+            progress.advance()
 
     return "\n\n".join(all_text)
 
 
-async def gemini_correct_and_structure(raw_text: str, task_id: str, transcription_type: str = "sermon", language: str = "ko") -> str:
+def _segment_field(segment, key: str):
+    if isinstance(segment, dict):
+        return segment.get(key)
+    return getattr(segment, key, None)
+
+
+def whisper_transcribe_segments(
+    file_path: str,
+    language: str = "ko",
+    transcription_type: str = "sermon",
+    progress: ProgressTracker | None = None,
+    partial: PartialTranscript | None = None,
+) -> list[dict]:
+    """
+    Whisper 세그먼트 단위 변환 (화자 분리 정렬용 타임스탬프 포함).
+    청크 오프셋을 더해 원본 기준 시각으로 맞추고, 겹침 구간의 중복 세그먼트는 제외한다.
+    """
+    whisper_prompt = _build_whisper_prompt(language, transcription_type)
+    with tracing.span("split") as split_span:
+        chunks = split_audio_file(file_path)
+        split_span.set("chunks", len(chunks))
+    if progress:
+        progress.stage("stt", len(chunks))
+    chunk_step = (CHUNK_DURATION_MS - CHUNK_OVERLAP_MS) / 1000
+    segments: list[dict] = []
+
+    for i, chunk_path in enumerate(chunks):
+        if progress:
+            progress.check_cancelled()
+        tracing.log(f"Whisper transcribing chunk {i+1}/{len(chunks)} (segments)...")
+
+        chunk_bytes = os.path.getsize(chunk_path)
+        with open(chunk_path, "rb") as audio_file, tracing.span(
+            "stt.chunk", index=i, bytes=chunk_bytes
+        ), metrics.track_call("openai", "whisper", bytes_out=chunk_bytes):
+            response = openai_client.audio.transcriptions.create(
+                model="whisper-1",
+                file=audio_file,
+                language=language,
+                prompt=whisper_prompt,
+                response_format="verbose_json",
+            )
+
+        offset = i * chunk_step
+        chunk_start_index = len(segments)
+        for segment in _segment_field(response, "segments") or []:
+            start = float(_segment_field(segment, "start") or 0.0)
+            text = (_segment_field(segment, "text") or "").strip()
+            if not text or (i > 0 and start < CHUNK_OVERLAP_MS / 1000):
+                continue
+            segments.append({
+                "start": offset + start,
+                "end": offset + float(_segment_field(segment, "end") or start),
+                "text": text,
+                "chunk": i,
+            })
+        if partial:
+            # 화자 라벨은 화자 분리 후에 붙으므로 초안은 라벨 없는 원문
+            partial.add_draft(" ".join(segment["text"] for segment in segments[chunk_start_index:]))
+
+        # 청크 파일 삭제 (원본 제외)
+        if chunk_path != file_path:
+            os.unlink(chunk_path)
+        if progress:
+            progress.advance()
+
+    return segments
+
+
+def _join_segments_by_chunk(segments: list[dict]) -> str:
+    """화자 분리 실패 시 원문: 청크 안은 공백, 청크 사이는 whisper_transcribe 와 같은 "\n\n" (교정 창 경계 유지)"""
+    chunks: dict[int, list[str]] = {}
+    for segment in segments:
+        chunks.setdefault(segment.get("chunk", 0), []).append(segment["text"])
+    return "\n\n".join(" ".join(texts) for _, texts in sorted(chunks.items()))
+
+
+def _diarization_speaker_count(transcription_type: str) -> int | None:
+    # 통화는 2인 고정, 대화/회의는 클러스터링으로 추정
+    return 2 if transcription_type == "phonecall" else None
+
+
+def _split_correction_windows(raw_text: str, max_chars: int = CORRECTION_WINDOW_CHARS) -> list[str]:
+    """교정 창 분할: 문단("\n\n", Whisper 청크 경계 포함) 단위로 max_chars 이하씩 묶음"""
+    if len(raw_text) <= max_chars:
+        return [raw_text]
+
+    windows: list[str] = []
+    current: list[str] = []
+    current_len = 0
+    for paragraph in raw_text.split("\n\n"):
+        if current and current_len + len(paragraph) > max_chars:
+            windows.append("\n\n".join(current))
+            current, current_len = [], 0
+        current.append(paragraph)
+        current_len += len(paragraph) + 2
+    if current:
+        windows.append("\n\n".join(current))
+    return windows
+
+
+async def gemini_correct_and_structure(
+    raw_text: str,
+    task_id: str,
+    transcription_type: str = "sermon",
+    language: str = "ko",
+    progress: ProgressTracker | None = None,
+    partial: PartialTranscript | None = None,
+) -> str:
     """
     Gemini로 텍스트 교정 + 구조화 (2단계).
-    유형별 + 언어별 프롬프트 선택.
+    유형별 + 언어별 프롬프트 선택. 긴 원문은 교정 창 단위로 나눠 순서대로 교정한다.
     """
+    windows = _split_correction_windows(raw_text)
+    if progress:
+        progress.stage("correct", len(windows))
+    if partial:
+        await asyncio.to_thread(partial.rebase, windows)
+
+    corrected_windows = []
+    for index, window_text in enumerate(windows):
+        if progress:
+            progress.check_cancelled()
+        with tracing.span("correct.window", index=index, chars=len(window_text)):
+            corrected_windows.append(
+                await _gemini_correct_window(window_text, task_id, transcription_type, language, index, len(windows))
+            )
+        if progress:
+            progress.advance()
+        if partial:
+            refined = correct_text(corrected_windows[-1], transcription_type, language)
+            await asyncio.to_thread(partial.refine, index, refined)
+
+    return "\n\n".join(corrected_windows)
+
+
+async def _gemini_correct_window(
+    raw_text: str,
+    task_id: str,
+    transcription_type: str,
+    language: str,
+    window_index: int = 0,
+    window_count: int = 1,
+) -> str:
     target_model = get_optimal_model()
-    print(f"[{task_id}] Gemini correction model: {target_model}, type: {transcription_type}, lang: {language}")
+    tracing.log(f"Gemini correction model: {target_model}, type: {transcription_type}, lang: {language}")
 
     correction_prompt = get_correction_prompt_by_type(transcription_type, language)
 
@@ -683,21 +1178,31 @@ async def gemini_correct_and_structure(raw_text: str, task_id: str, transcriptio
 
 [{label}]
 {raw_text}"""
+    if window_count > 1:
+        if language == "en":
+            part_note = f"[Part {window_index + 1}/{window_count}] This text is one part of a longer transcript. Correct only this part and keep its order; do not add an introduction or conclusion that is not in it."
+        else:
+            part_note = f"[부분 {window_index + 1}/{window_count}] 이 텍스트는 긴 녹취의 일부분이다. 이 부분만 순서대로 교정하고, 원문에 없는 서론/결론을 새로 덧붙이지 마라."
+        full_prompt = f"{part_note}\n\n{full_prompt}"
 
     response = None
     max_retries = 5
 
     for attempt in range(max_retries):
         try:
-            response = model.generate_content(
-                full_prompt,
-                request_options={"timeout": 600}
-            )
+            with metrics.track_call("gemini", "generate_content", bytes_out=len(full_prompt.encode("utf-8"))):
+                response = await asyncio.to_thread(
+                    model.generate_content,
+                    full_prompt,
+                    request_options={"timeout": 600},
+                )
+            metrics.record_gemini_usage(response)
             break
         except Exception as e:
-            if ("429" in str(e) or "ResourceExhausted" in str(e) or "quota" in str(e).lower()) and attempt < max_retries - 1:
+            if metrics.is_rate_limited_error(e) and attempt < max_retries - 1:
+                metrics.CALL_RETRIES.inc(service="gemini")
                 wait_time = (2 ** attempt) * 10 + random.uniform(0, 5)
-                print(f"[{task_id}] Quota exceeded (429). Retrying in {wait_time:.1f}s... (Attempt {attempt+1}/{max_retries})")
+                tracing.log(f"Quota exceeded (429). Retrying in {wait_time:.1f}s... (Attempt {attempt+1}/{max_retries})", level="warning")
                 await asyncio.sleep(wait_time)
             else:
                 raise e
@@ -712,79 +1217,130 @@ async def process_transcription(
     language: str,
     correct: bool,
     transcription_type: str = "sermon",
+    webhook_url: str | None = None,
 ):
-    """백그라운드 변환 로직: Whisper STT → Gemini 교정"""
+    """백그라운드 변환 로직: Whisper STT → Gemini 교정. 최종 상태("completed"/"error") 반환"""
+    use_diarization = bool(openai_client) and DIARIZATION_ENABLED and transcription_type in {"phonecall", "conversation"}
+    if openai_client:
+        stages = ["upload", "split", "stt"] + (["diarize"] if use_diarization else []) + ["correct", "postprocess", "save"]
+    else:
+        stages = ["upload", "stt", "postprocess", "save"]
+    progress = ProgressTracker(task_id, publish=status_store.update_progress, stages=stages)
+    partial = PartialTranscript(
+        task_id,
+        publish=status_store.update_partial,
+        drafter=lambda text: correct_text(text, transcription_type, language),
+    )
+
     try:
-        task_status[task_id] = "processing"
+        await asyncio.to_thread(status_store.transition, task_id, ACTIVE_STATUSES, "processing")
 
         if openai_client:
             # ===== 2단계 방식: Whisper + Gemini =====
 
-            # 1단계: Whisper로 완전 녹취
-            print(f"[{task_id}] Step 1: Whisper STT...")
-            raw_text = whisper_transcribe(temp_file_path, language, transcription_type)
-            print(f"[{task_id}] Whisper done. Raw length: {len(raw_text)} chars")
-
-            # 임시 파일 삭제
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
+            # 1단계: Whisper로 완전 녹취 (통화/대화는 음향 화자 분리 병행)
+            tracing.log("Step 1: Whisper STT...")
+            progress.stage("split")
+            speaker_turns = None
+            if use_diarization:
+                segments = await asyncio.to_thread(
+                    whisper_transcribe_segments, temp_file_path, language, transcription_type, progress, partial
+                )
+                progress.stage("diarize")
+                with tracing.span("diarize"):
+                    try:
+                        speaker_turns = await asyncio.to_thread(
+                            diarize_file, temp_file_path, _diarization_speaker_count(transcription_type)
+                        )
+                        tracing.log(f"Diarization done. Turns: {len(speaker_turns)}")
+                    except Exception as e:
+                        tracing.log(f"Diarization failed, falling back to text heuristics: {e}", level="warning")
+
+                if speaker_turns:
+                    aligned = align_segments_to_turns(segments, speaker_turns)
+                    raw_text = _format_diarized_transcript(aligned, transcription_type, language)
+                else:
+                    raw_text = _join_segments_by_chunk(segments)
+            else:
+                raw_text = await asyncio.to_thread(
+                    whisper_transcribe, temp_file_path, language, transcription_type, progress, partial
+                )
+            tracing.log(f"Whisper done. Raw length: {len(raw_text)} chars")
+            # 업로드 원본은 작업이 끝날 때(완료/오류/취소)까지 유지 - 워커가 죽으면 재시도 작업이 다시 읽음
 
             # 2단계: Gemini로 교정 + 구조화
-            print(f"[{task_id}] Step 2: Gemini correction...")
-            corrected_text = await gemini_correct_and_structure(raw_text, task_id, transcription_type, language)
-            print(f"[{task_id}] Gemini done. Corrected length: {len(corrected_text)} chars")
+            tracing.log("Step 2: Gemini correction...")
+            corrected_text = await gemini_correct_and_structure(
+                raw_text, task_id, transcription_type, language, progress, partial
+            )
+            tracing.log(f"Gemini done. Corrected length: {len(corrected_text)} chars")
 
             # 3단계: 규칙 기반 후처리
-            corrected_text = correct_text(corrected_text, transcription_type, language)
-            corrected_text = _enforce_speaker_separation(corrected_text, transcription_type, language)
+            progress.stage("postprocess")
+            with tracing.span("postprocess"):
+                corrected_text = correct_text(corrected_text, transcription_type, language)
+                corrected_text = _enforce_speaker_separation(corrected_text, transcription_type, language, speaker_turns)
 
             engine = "whisper+gemini"
 
         else:
             # ===== 폴백: Gemini 단일 방식 (기존) =====
-            print(f"[{task_id}] Fallback: Gemini-only mode")
-
-            mime_type = _resolve_audio_mime_type(temp_file_path)
-            audio_file = genai.upload_file(temp_file_path, mime_type=mime_type)
-            target_model = get_optimal_model()
-            model = genai.GenerativeModel(
-                target_model,
-                system_instruction=get_gemini_prompt(),
-                generation_config=genai.types.GenerationConfig(
-                    max_output_tokens=65536,
-                )
-            )
-            content_prompt = get_gemini_content_prompt()
-
-            response = None
-            max_retries = 5
-            for attempt in range(max_retries):
-                try:
-                    response = model.generate_content(
-                        [content_prompt, audio_file],
-                        request_options={"timeout": 600}
+            tracing.log("Fallback: Gemini-only mode")
+            progress.stage("stt")
+
+            with tracing.span("stt.gemini"):
+                mime_type = _resolve_audio_mime_type(temp_file_path)
+                with metrics.track_call("gemini", "upload_file", bytes_out=os.path.getsize(temp_file_path)):
+                    audio_file = await asyncio.to_thread(genai.upload_file, temp_file_path, mime_type=mime_type)
+                target_model = get_optimal_model()
+                model = genai.GenerativeModel(
+                    target_model,
+                    system_instruction=get_gemini_prompt(),
+                    generation_config=genai.types.GenerationConfig(
+                        max_output_tokens=65536,
                     )
-                    break
-                except Exception as e:
-                    if ("429" in str(e) or "ResourceExhausted" in str(e) or "quota" in str(e).lower()) and attempt < max_retries - 1:
-                        wait_time = (2 ** attempt) * 10 + random.uniform(0, 5)
-                        await asyncio.sleep(wait_time)
-                    else:
-                        raise e
+                )
+                content_prompt = get_gemini_content_prompt()
+
+                response = None
+                max_retries = 5
+                for attempt in range(max_retries):
+                    try:
+                        with metrics.track_call("gemini", "generate_content_audio"):
+                            response = await asyncio.to_thread(
+                                model.generate_content,
+                                [content_prompt, audio_file],
+                                request_options={"timeout": 600},
+                            )
+                        metrics.record_gemini_usage(response)
+                        break
+                    except Exception as e:
+                        if metrics.is_rate_limited_error(e) and attempt < max_retries - 1:
+                            metrics.CALL_RETRIES.inc(service="gemini")
+                            wait_time = (2 ** attempt) * 10 + random.uniform(0, 5)
+                            await asyncio.sleep(wait_time)
+                        else:
+                            raise e
 
             raw_text = response.text
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
             try:
                 audio_file.delete()
             except:
                 pass
 
-            corrected_text = correct_text(raw_text, transcription_type, language)
-            corrected_text = _enforce_speaker_separation(corrected_text, transcription_type, language)
+            progress.stage("postprocess")
+            with tracing.span("postprocess"):
+                corrected_text = correct_text(raw_text, transcription_type, language)
+                corrected_text = _enforce_speaker_separation(corrected_text, transcription_type, language)
             engine = "gemini-only"
 
-        # 결과 저장
+        # 결과 저장 - 교정 마지막 창/Gemini 호출 중에 들어온 취소는 여기서 중단 (저장·알림 전)
+        progress.stage("save")
+        progress.check_cancelled()
+        record = await asyncio.to_thread(status_store.get, task_id)
+        if record and record["status"] not in ACTIVE_STATUSES:
+            # 다른 프로세스(API)에서 취소된 경우: 워커의 취소 플래그는 큐 확인 주기 뒤에야 켜짐
+            raise TaskCancelled(task_id)
         result_data = {
             "task_id": task_id,
             "status": "completed",
@@ -798,7 +1354,7 @@ async def process_transcription(
             "transcription_type": transcription_type,
         }
 
-        supabase.table("transcriptions").insert({
+        transcription_row = {
             "task_id": task_id,
             "user_id": user_id,
             "status": "completed",
@@ -810,46 +1366,220 @@ async def process_transcription(
             "darakbang_optimized": transcription_type == "sermon",
             "engine": engine,
             "transcription_type": transcription_type,
-        }).execute()
+        }
+        with tracing.span("save", chars=len(corrected_text)):
+            if await asyncio.to_thread(_history_preview_ready):
+                transcription_row["summary_preview"] = corrected_text[:HISTORY_PREVIEW_CHARS]
+            with tracing.span("save.blob_offload"):
+                await asyncio.to_thread(_offload_transcript_texts, task_id, user_id, transcription_row)
+            with tracing.span("save.insert"):
+                await asyncio.to_thread(transcription_repo.insert, transcription_row)
+            with tracing.span("save.search_index"):
+                await asyncio.to_thread(
+                    _index_transcript, task_id, user_id, result_data["created_at"], transcription_type, corrected_text
+                )
+            completed = await asyncio.to_thread(status_store.transition, task_id, ACTIVE_STATUSES, "completed")
+        _remove_task_files(temp_file_path)
+        progress.finish()
+        partial.finish()
+        if not completed:
+            # 저장 도중 취소됨: 상태는 cancelled 로 두고 저장한 행/색인/블롭을 되돌림, 웹훅/임베딩은 하지 않음
+            tracing.log("Cancelled during save; discarding the saved transcript")
+            await asyncio.to_thread(_discard_saved_transcript, task_id, user_id, transcription_row)
+            return "cancelled"
+        await asyncio.to_thread(_enqueue_task_webhook, task_id, user_id, result_data, webhook_url)
+        if semantic_index:
+            # 결과를 알린 뒤 임베딩 (사용자는 기다리지 않음)
+            with tracing.span("embed"):
+                await asyncio.to_thread(
+                    _embed_transcript, task_id, user_id, result_data["created_at"], transcription_type, corrected_text
+                )
+        return "completed"
 
-        task_status[task_id] = "completed"
-        task_owner.pop(task_id, None)
+    except TaskCancelled:
+        tracing.log("Cancelled")
+        _remove_task_files(temp_file_path)
+        progress.finish()
+        partial.finish()
+        await asyncio.to_thread(status_store.transition, task_id, ACTIVE_STATUSES, "cancelled")
+        return "cancelled"
 
     except Exception as e:
-        print(f"Transcription error: {e}")
-        import traceback
-        traceback.print_exc()
-        task_status[task_id] = "error"
+        tracing.log(f"Transcription error: {e}", level="error", exc_info=True)
+        _remove_task_files(temp_file_path)
+        progress.finish()
+        partial.finish()
+        await asyncio.to_thread(status_store.transition, task_id, ACTIVE_STATUSES, "error", error=str(e))
         try:
-            supabase.table("transcriptions").insert({
+            await asyncio.to_thread(transcription_repo.insert, {
                 "task_id": task_id,
                 "user_id": user_id,
                 "status": "error",
                 "error": str(e),
                 "created_at": datetime.now().isoformat(),
                 "transcription_type": transcription_type,
-            }).execute()
+            })
         except Exception as db_err:
-            print(f"Failed to write error to Supabase: {db_err}")
-        finally:
-            task_owner.pop(task_id, None)
+            tracing.log(f"Failed to write error to repository: {db_err}", level="error")
+        await asyncio.to_thread(_enqueue_task_webhook, task_id, user_id, {
+            "task_id": task_id,
+            "status": "error",
+            "error": str(e),
+            "created_at": datetime.now().isoformat(),
+            "transcription_type": transcription_type,
+        }, webhook_url)
+        return "error"
+
+
+def _discard_saved_transcript(task_id: str, user_id: str, row: dict) -> None:
+    """저장 단계에서 쓴 변환 기록 행, 검색 색인, 본문 블롭 삭제 (실패는 로그만)"""
+    steps = [
+        ("repository", lambda: transcription_repo.delete(task_id, user_id)),
+        ("search index", lambda: search_index.remove(task_id)),
+        *((f"blob {field}", lambda ref=ref: blob_store.delete(ref)) for field, ref in (row.get("text_blobs") or {}).items()),
+    ]
+    for name, step in steps:
+        try:
+            step()
+        except Exception as e:
+            tracing.log(f"Failed to discard cancelled transcript ({name}): {e}", level="warning", task_id=task_id)
+
+
+def _remove_task_files(temp_file_path: str) -> None:
+    """업로드 원본과 분할 청크 파일 삭제"""
+    for path in [temp_file_path, *glob.glob(f"{glob.escape(temp_file_path)}_chunk*")]:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def _enqueue_task_webhook(task_id: str, user_id: str, result: dict, webhook_url: str | None = None) -> None:
+    """작업 종료 웹훅 예약 (본문은 /api/status 응답과 같은 형태). 실패해도 작업 결과에는 영향 없음"""
+    event = "transcription.completed" if result["status"] == "completed" else "transcription.error"
+    try:
+        webhook_store.enqueue(task_id, user_id, event, {"event": event, **result}, url=webhook_url)
+    except Exception as e:
+        tracing.log(f"Failed to enqueue webhook: {e}", level="warning")
+
+
+async def run_transcription_job(job: dict) -> str:
+    """작업 큐 레코드 → process_transcription 실행 (워커 handler)"""
+    payload = job["payload"]
+    metrics.JOBS_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    final_status = "interrupted"
+    try:
+        with tracing.start_trace(
+            "transcription",
+            task_id=job["task_id"],
+            parent=payload.get("trace"),
+            attempt=job["attempts"],
+            transcription_type=payload["transcription_type"],
+        ) as root, profiling.profile_job(job["task_id"], job["attempts"], payload.get("profile", False)):
+            final_status = await process_transcription(
+                job["task_id"],
+                job["user_id"],
+                payload["temp_file_path"],
+                payload["language"],
+                payload["correct"],
+                payload["transcription_type"],
+                payload.get("webhook_url"),
+            )
+            root.set("outcome", final_status)
+        return final_status
+    finally:
+        metrics.JOBS_IN_FLIGHT.dec()
+        metrics.JOBS_TOTAL.inc(outcome=final_status)
+        metrics.JOB_SECONDS.observe(time.perf_counter() - started, outcome=final_status)
+
+
+def mark_exhausted_job_failed(job: dict) -> None:
+    """재시도 한도 초과로 큐에서 실패 처리된 작업을 상태 저장소에도 반영"""
+    status_store.transition(job["task_id"], ACTIVE_STATUSES, "error", error=job.get("error"))
+    _enqueue_task_webhook(job["task_id"], job["user_id"], {
+        "task_id": job["task_id"],
+        "status": "error",
+        "error": "작업 처리 중 워커가 반복 중단되어 실패했습니다.",
+        "created_at": datetime.now().isoformat(),
+        "transcription_type": job["payload"].get("transcription_type", "sermon"),
+    }, job["payload"].get("webhook_url"))
+
+
+def _cleanup_orphan_uploads() -> None:
+    """대기/처리 중 작업이 참조하지 않는 오래된 업로드·청크 파일 삭제"""
+    referenced = [payload.get("temp_file_path") or "" for payload in job_queue.active_payloads()]
+    now = time.time()
+    for entry in os.scandir(UPLOAD_DIR):
+        if not entry.is_file() or now - entry.stat().st_mtime < ORPHAN_UPLOAD_MAX_AGE:
+            continue
+        if any(path and entry.path.startswith(path) for path in referenced):
+            continue
+        try:
+            os.unlink(entry.path)
+            tracing.log(f"Removed orphaned upload: {entry.path}")
+        except OSError:
+            pass
+
+
+@app.on_event("startup")
+async def start_job_workers():
+    global _embedded_worker, _webhook_dispatcher, _write_behind_flusher, _event_loop_monitor
+    _event_loop_monitor = metrics.start_event_loop_monitor()
+    if transcription_writer:
+        _write_behind_flusher = WriteBehindFlusher(transcription_writer)
+        _write_behind_flusher.start()
+    if EMBEDDED_WORKERS <= 0:
+        tracing.log("Embedded workers disabled (run `python -m worker` separately)")
+        return
+    _cleanup_orphan_uploads()
+    _embedded_worker = JobWorker(
+        job_queue,
+        run_transcription_job,
+        EMBEDDED_WORKERS,
+        on_exhausted=mark_exhausted_job_failed,
+        on_cancel=request_cancel,
+    )
+    _embedded_worker.start()
+    _webhook_dispatcher = WebhookDispatcher(webhook_store)
+    _webhook_dispatcher.start()
+
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    if _event_loop_monitor:
+        _event_loop_monitor.cancel()
+    if _embedded_worker:
+        await _embedded_worker.stop()
+    if _webhook_dispatcher:
+        await _webhook_dispatcher.stop()
+    if _write_behind_flusher:
+        # 워커가 멈춘 뒤 남은 변환 기록 반영
+        await _write_behind_flusher.stop()
+    await http_client.aclose_clients()
 
 
 @app.post("/api/transcribe")
 async def transcribe_audio(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     language: str = Form("ko"),
     correct: bool = Form(True),
     transcription_type: str = Form("sermon"),
+    webhook_url: str | None = Form(None),
     authorization: str | None = Header(default=None),
+    x_profile: str | None = Header(default=None),
 ):
     """음성 → 텍스트 변환 (Whisper + Gemini 2단계). 유형: sermon/phonecall/conversation"""
     try:
         # 파일 변환은 로그인 사용자만 허용
         _ensure_transcriptions_user_scope_ready()
-        user = _get_current_user(authorization)
+        user = await _get_current_user(authorization)
         user_id = user["id"]
+        if webhook_url:
+            try:
+                webhook_url = await asyncio.to_thread(validate_webhook_url, webhook_url)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
         contents = await file.read()
         if len(contents) > 100 * 1024 * 1024:
             raise HTTPException(status_code=400, detail="파일 크기는 100MB 이하")
@@ -859,23 +1589,28 @@ async def transcribe_audio(
         if original_ext not in ['.mp3', '.wav', '.m4a', '.ogg', '.flac', '.webm', '.mp4']:
             original_ext = ".mp3"
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=original_ext) as temp_file:
-            temp_file.write(contents)
-            temp_file_path = temp_file.name
-
         task_id = str(uuid.uuid4())
-        task_status[task_id] = "queued"
-        task_owner[task_id] = user_id
-
-        background_tasks.add_task(
-            process_transcription,
-            task_id,
-            user_id,
-            temp_file_path,
-            language,
-            correct,
-            transcription_type
-        )
+        temp_file_path = os.path.join(UPLOAD_DIR, f"{task_id}{original_ext}")
+        with tracing.start_trace("upload", task_id=task_id, bytes=len(contents), transcription_type=transcription_type) as upload_span:
+            with open(temp_file_path, "wb") as temp_file:
+                temp_file.write(contents)
+
+            # 짧은 작업 우선 스케줄링용 오디오 길이 측정
+            duration_seconds = await asyncio.to_thread(probe_audio_duration, temp_file_path)
+            upload_span.set("duration_seconds", duration_seconds)
+
+            status_store.create(task_id, user_id, "queued")
+            job_queue.enqueue(task_id, user_id, {
+                "temp_file_path": temp_file_path,
+                "language": language,
+                "correct": correct,
+                "transcription_type": transcription_type,
+                "webhook_url": webhook_url,
+                # 워커 쪽 구간을 같은 trace 로 이어 붙이기 위한 문맥
+                "trace": tracing.current_context(),
+                # 관리자 X-Profile 헤더 → 워커가 이 작업을 프로파일
+                "profile": profiling.header_allowed(x_profile),
+            }, duration_seconds=duration_seconds)
 
         type_labels = {"sermon": "설교 녹취", "phonecall": "통화 기록", "conversation": "대화/회의 기록"}
 
@@ -894,46 +1629,58 @@ async def transcribe_audio(
         raise HTTPException(status_code=500, detail=f"오류: {str(e)}")
 
 
-@app.get("/api/status/{task_id}")
-async def get_task_status(
-    task_id: str,
-    authorization: str | None = Header(default=None),
-):
-    """작업 상태 조회"""
-    _ensure_transcriptions_user_scope_ready()
-    user = _get_current_user(authorization)
-    user_id = user["id"]
-
-    if task_id in task_status:
-        status = task_status[task_id]
-        owner_id = task_owner.get(task_id)
-        if owner_id is not None and owner_id != user_id:
+def _build_task_status(task_id: str, user_id: str, since_revision: int | None = None) -> dict:
+    """
+    작업 상태 응답 구성 (폴링/스트림 공용). 대기·처리 중에는 공유 상태 저장소만 읽는다.
+    처리 중이면 부분 결과(partial)를 포함하며, since_revision 이후 바뀐 구간만 돌려준다.
+    """
+    record = status_store.get(task_id)
+    if record:
+        if record["user_id"] != user_id:
             return {"task_id": task_id, "status": "not_found"}
-        if status == "processing" or status == "queued":
-            return {"task_id": task_id, "status": status}
-
-    response = (
-        supabase.table("transcriptions")
-        .select("*")
-        .eq("task_id", task_id)
-        .eq("user_id", user_id)
-        .execute()
-    )
-    if response.data:
-        row = response.data[0]
-        if row["status"] == "completed":
+        if record["status"] == "queued":
+            response_data = {"task_id": task_id, "status": "queued"}
+            estimate = job_queue.schedule_estimate(task_id)
+            if estimate:
+                response_data["queue_position"] = estimate["queue_position"]
+                response_data["estimated_start_at"] = datetime.fromtimestamp(estimate["estimated_start_at"]).isoformat()
+            return response_data
+        if record["status"] == "cancelled":
+            return {"task_id": task_id, "status": "cancelled"}
+        if record["status"] == "processing":
+            # 같은 프로세스에서 처리 중이면 메모리의 최신값, 아니면 저장소에 주기적으로 기록된 값
+            local_partial = task_partials.get(task_id)
             return {
+                "task_id": task_id,
+                "status": "processing",
+                "progress": task_progress.get(task_id) or record.get("progress"),
+                "partial": (
+                    local_partial.snapshot(since_revision)
+                    if local_partial
+                    else filter_partial(record.get("partial"), since_revision)
+                ),
+            }
+
+    # 최근 완료된 결과는 메모리에서 (완료 결과는 바뀌지 않음)
+    cached = get_completed(task_id, user_id)
+    if cached:
+        return cached.payload
+
+    row = transcription_repo.get(task_id, user_id)
+    if row:
+        if row["status"] == "completed":
+            return remember_completed(task_id, user_id, {
                 "task_id": row["task_id"],
                 "status": row["status"],
                 "created_at": row["created_at"],
                 "language": row["language"],
-                "raw_text": row["raw_text"],
-                "corrected_text": row["corrected_text"],
+                "raw_text": _transcript_text(row, "raw_text"),
+                "corrected_text": _transcript_text(row, "corrected_text"),
                 "characters": row["characters"],
                 "darakbang_optimized": row["darakbang_optimized"],
                 "engine": row["engine"],
                 "transcription_type": row.get("transcription_type", "sermon"),
-            }
+            }).payload
         else:
             return {
                 "task_id": row["task_id"],
@@ -943,9 +1690,264 @@ async def get_task_status(
                 "transcription_type": row.get("transcription_type", "sermon"),
             }
 
+    if record and record["status"] == "error":
+        # 워커 반복 중단 등으로 Supabase 기록 없이 실패한 작업
+        return {"task_id": task_id, "status": "error", "error": record.get("error")}
+
     return {"task_id": task_id, "status": "not_found"}
 
 
+@app.get("/api/status/{task_id}")
+async def get_task_status(
+    task_id: str,
+    request: Request,
+    since_revision: int | None = Query(default=None, ge=0),
+    authorization: str | None = Header(default=None),
+):
+    """
+    작업 상태 조회 (since_revision: 이미 받은 부분 결과 revision)
+    완료된 결과는 바뀌지 않으므로 ETag/Cache-Control 을 붙이고, If-None-Match 가 같으면 304
+    """
+    _ensure_transcriptions_user_scope_ready()
+    user = await _get_current_user(authorization)
+    data = await asyncio.to_thread(_build_task_status, task_id, user["id"], since_revision)
+    if data["status"] != "completed":
+        return data
+    cached = get_completed(task_id, user["id"]) or remember_completed(task_id, user["id"], data)
+    return cached_response(request, cached)
+
+
+@app.get("/api/transcriptions/{task_id}/text/{field}")
+async def get_transcript_text(
+    task_id: str,
+    field: str,
+    request: Request,
+    authorization: str | None = Header(default=None),
+):
+    """
+    완료된 녹취 본문(raw_text / corrected_text)만 text/plain 으로 조회.
+    Range: bytes=... 를 보내면 해당 UTF-8 바이트 범위만 206으로 돌려준다 (블롭이면 필요한 프레임만 읽음)
+    """
+    if field not in TRANSCRIPT_TEXT_FIELDS:
+        raise HTTPException(status_code=404, detail="지원하지 않는 본문 필드입니다.")
+    _ensure_transcriptions_user_scope_ready()
+    user = await _get_current_user(authorization)
+
+    columns = f"status, {field}"
+    if _transcriptions_column_ready("text_blobs"):
+        columns += ", text_blobs"
+    row = await asyncio.to_thread(transcription_repo.get, task_id, user["id"], columns)
+    if not row or row["status"] != "completed":
+        raise HTTPException(status_code=404, detail="완료된 변환 결과를 찾을 수 없습니다.")
+
+    ref = (row.get("text_blobs") or {}).get(field) if row.get(field) is None else None
+    data = None if ref else (row.get(field) or "").encode("utf-8")
+    size = ref["size"] if ref else len(data)
+    headers = {"Accept-Ranges": "bytes", "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    try:
+        byte_range = parse_byte_range(request.headers.get("range"), size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    start, end = byte_range or (0, size)
+    if ref:
+        body = await asyncio.to_thread(blob_store.read_range, ref, start, end)
+    else:
+        body = data[start:end]
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+    return Response(
+        content=body,
+        status_code=206 if byte_range else 200,
+        media_type="text/plain; charset=utf-8",
+        headers=headers,
+    )
+
+
+@app.delete("/api/tasks/{task_id}")
+async def cancel_task(
+    task_id: str,
+    authorization: str | None = Header(default=None),
+):
+    """
+    작업 취소. 대기 중이면 바로 취소하고 업로드 파일을 지운다.
+    처리 중이면 실행 슬롯을 즉시 반납하고, 워커가 다음 청크/교정 창 전에 중단하며 임시 파일을 정리한다.
+    """
+    user = await _get_current_user(authorization)
+    await asyncio.to_thread(_cancel_task, task_id, user["id"])
+    return {"success": True, "task_id": task_id, "status": "cancelled"}
+
+
+def _cancel_task(task_id: str, user_id: str) -> None:
+    """cancel_task 본체 (상태 저장소/작업 큐 I/O 라서 스레드에서 실행)"""
+    record = status_store.get(task_id)
+    if not record or record["user_id"] != user_id:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    if record["status"] not in ACTIVE_STATUSES:
+        raise HTTPException(status_code=409, detail="이미 종료된 작업입니다.")
+
+    previous_status = job_queue.cancel(task_id)
+    status_store.transition(task_id, ACTIVE_STATUSES, "cancelled")
+    if previous_status == "queued":
+        job = job_queue.get(task_id)
+        _remove_task_files(job["payload"]["temp_file_path"])
+    elif previous_status == "processing" and task_id in task_progress:
+        # 같은 프로세스의 내장 워커가 처리 중이면 큐 확인을 기다리지 않고 바로 알림
+        request_cancel(task_id)
+
+
+def _status_event_id(data: dict) -> str:
+    """
+    상태 스냅샷 식별자 "{부분 결과 revision}.{digest}".
+    내용이 같으면 같은 id → 재연결 시 중복 전송 생략, 앞부분으로 부분 결과를 이어받는다.
+    """
+    snapshot = {key: value for key, value in data.items() if key not in ("progress", "partial")}
+    progress = data.get("progress") or {}
+    snapshot["progress"] = [progress.get("stage"), progress.get("stage_done"), progress.get("percent")]
+    partial_revision = (data.get("partial") or {}).get("revision", 0)
+    digest = hashlib.sha1(json.dumps(snapshot, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+    return f"{partial_revision}.{digest}"
+
+
+def _partial_revision_from_event_id(event_id: str | None) -> int | None:
+    try:
+        return int(event_id.split(".", 1)[0]) if event_id else None
+    except ValueError:
+        return None
+
+
+def _sse_message(event: str, data: dict, event_id: str | None = None) -> str:
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _issue_stream_token(task_id: str, user_id: str) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps(
+        {"t": task_id, "u": user_id, "e": int(time.time()) + STREAM_TOKEN_TTL}, separators=(",", ":")
+    ).encode("utf-8")).decode("ascii").rstrip("=")
+    signature = hmac.new(STREAM_TOKEN_SECRET, payload.encode("ascii"), hashlib.sha256).hexdigest()
+    return f"{payload}.{signature}"
+
+
+def _verify_stream_token(token: str, task_id: str) -> str | None:
+    """스트림 토큰 → user_id (서명/만료/작업이 맞지 않으면 None)"""
+    payload, _, signature = (token or "").partition(".")
+    expected = hmac.new(STREAM_TOKEN_SECRET, payload.encode("utf-8"), hashlib.sha256).hexdigest()
+    # 바이트로 비교 (문자열 compare_digest 는 비 ASCII 문자에서 TypeError)
+    if not payload or not hmac.compare_digest(signature.encode("utf-8"), expected.encode("ascii")):
+        return None
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except ValueError:
+        return None
+    if not isinstance(claims, dict):
+        return None
+    expires_at = claims.get("e")
+    if claims.get("t") != task_id or not isinstance(expires_at, (int, float)) or expires_at < time.time():
+        return None
+    user_id = claims.get("u")
+    return user_id if isinstance(user_id, str) and user_id else None
+
+
+class _RedactQueryTokens(logging.Filter):
+    """uvicorn 접근 로그에서 쿼리 토큰 값 가림"""
+
+    _pattern = re.compile(r"((?:stream_token|access_token)=)[^&\s]+")
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if isinstance(record.args, tuple):
+            record.args = tuple(
+                self._pattern.sub(r"\1[redacted]", arg) if isinstance(arg, str) else arg for arg in record.args
+            )
+        return True
+
+
+logging.getLogger("uvicorn.access").addFilter(_RedactQueryTokens())
+
+
+@app.post("/api/status/{task_id}/stream-token")
+async def create_stream_token(task_id: str, authorization: str | None = Header(default=None)):
+    """상태 스트림 연결용 단기 토큰 (이 작업의 상태 읽기 전용, STREAM_TOKEN_TTL 초)"""
+    user = await _get_current_user(authorization)
+    return {"stream_token": _issue_stream_token(task_id, user["id"]), "expires_in": STREAM_TOKEN_TTL}
+
+
+@app.get("/api/status/{task_id}/stream")
+async def stream_task_status(
+    task_id: str,
+    request: Request,
+    stream_token: str | None = Query(default=None),
+    authorization: str | None = Header(default=None),
+    last_event_id: str | None = Header(default=None),
+):
+    """
+    작업 상태 스트림 (Server-Sent Events).
+    인증은 연결당 1회: Authorization 헤더, 또는 EventSource 용 stream_token 쿼리
+    (POST /api/status/{task_id}/stream-token 으로 받은 작업 전용 단기 토큰 - 사용자 JWT 를 URL 에 싣지 않음).
+    상태/진행률이 바뀔 때만 status 이벤트를 보내고, 완료·오류 시 최종 결과를 보낸 뒤 종료한다.
+    재연결 시 Last-Event-ID가 현재 상태와 같으면 같은 스냅샷을 다시 보내지 않는다.
+    """
+    _ensure_transcriptions_user_scope_ready()
+    if not authorization and stream_token:
+        user_id = _verify_stream_token(stream_token, task_id)
+        if not user_id:
+            raise HTTPException(status_code=401, detail="스트림 토큰이 유효하지 않거나 만료되었습니다.")
+    else:
+        user = await _get_current_user(authorization)
+        user_id = user["id"]
+
+    async def event_stream():
+        last_sent = last_event_id
+        partial_revision = _partial_revision_from_event_id(last_event_id)
+        last_write = time.monotonic()
+        deadline = last_write + STATUS_STREAM_MAX_SECONDS
+        # 재연결 대기 시간 안내 (ms)
+        yield f"retry: {int(STATUS_STREAM_INTERVAL * 3000)}\n\n"
+
+        while True:
+            if await request.is_disconnected():
+                return
+
+            try:
+                data = await asyncio.to_thread(_build_task_status, task_id, user_id, partial_revision)
+            except Exception as e:
+                # 일시적 저장소 오류는 다음 주기에 다시 확인
+                tracing.log(f"Status stream read failed: {e}", level="warning", task_id=task_id)
+                await asyncio.sleep(STATUS_STREAM_INTERVAL)
+                continue
+            event_id = _status_event_id(data)
+            now = time.monotonic()
+            if event_id != last_sent:
+                yield _sse_message("status", data, event_id)
+                last_sent = event_id
+                last_write = now
+                if data.get("partial"):
+                    partial_revision = data["partial"]["revision"]
+            elif now - last_write >= STATUS_STREAM_HEARTBEAT:
+                # 프록시 유휴 연결 종료 방지용 주석 프레임
+                yield ": ping\n\n"
+                last_write = now
+
+            if data["status"] in TERMINAL_TASK_STATUSES:
+                yield _sse_message("end", {"task_id": task_id, "status": data["status"]})
+                return
+            if now >= deadline:
+                # 장시간 연결은 끊고 클라이언트 재연결(Last-Event-ID)로 이어받음
+                return
+
+            await asyncio.sleep(STATUS_STREAM_INTERVAL)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/api/terms")
 async def get_terms():
     """용어 확인 (디버깅용)"""
@@ -956,34 +1958,87 @@ async def get_terms():
     }
 
 
+@app.get("/metrics")
+async def prometheus_metrics(authorization: str | None = Header(default=None)):
+    """Prometheus 수집용 지표 (텍스트 형식)"""
+    if METRICS_TOKEN and not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="지표 조회 토큰이 올바르지 않습니다.")
+    body = await asyncio.to_thread(metrics.render)
+    return Response(content=body, headers={"Content-Type": metrics.CONTENT_TYPE})
+
+
 @app.get("/api/history")
-async def get_history(authorization: str | None = Header(default=None)):
-    """변환 기록 목록 조회"""
+async def get_history(
+    limit: int = Query(default=HISTORY_PAGE_SIZE, ge=1, le=HISTORY_PAGE_MAX),
+    cursor: str | None = Query(default=None),
+    authorization: str | None = Header(default=None),
+):
+    """변환 기록 목록 조회 (최신순, 커서 페이지네이션 - 다음 페이지는 next_cursor 로 요청)"""
     _ensure_transcriptions_user_scope_ready()
-    user = _get_current_user(authorization)
+    user = await _get_current_user(authorization)
     user_id = user["id"]
 
-    response = (
-        supabase.table("transcriptions")
-        .select("task_id, status, created_at, characters, engine, corrected_text, transcription_type")
-        .eq("user_id", user_id)
-        .order("created_at", desc=True)
-        .execute()
+    preview_column = await asyncio.to_thread(_history_preview_column)
+    rows = await asyncio.to_thread(
+        transcription_repo.list_for_user,
+        user_id,
+        f"task_id, status, created_at, characters, engine, {preview_column}, transcription_type",
+        limit + 1,
+        _decode_cursor(cursor) if cursor else None,
     )
 
     history = []
-    for row in response.data:
+    for row in rows:
         history.append({
             "task_id": row["task_id"],
             "status": row["status"],
             "created_at": row["created_at"],
             "characters": row.get("characters") or 0,
             "engine": row.get("engine") or "unknown",
-            "summary_preview": ((row.get("corrected_text") or "")[:50] + "..."),
+            "summary_preview": ((row.get(preview_column) or "")[:HISTORY_PREVIEW_CHARS] + "..."),
             "transcription_type": row.get("transcription_type", "sermon"),
         })
 
-    return history
+    return _page_response(rows, limit, "task_id", history)
+
+
+@app.get("/api/search")
+async def search_transcripts(
+    q: str = Query(..., max_length=200),
+    limit: int = Query(default=SEARCH_PAGE_SIZE, ge=1, le=50),
+    authorization: str | None = Header(default=None),
+):
+    """내 변환 기록 전문 검색 (관련도순, 일치 위치 주변 발췌 포함)"""
+    _ensure_transcriptions_user_scope_ready()
+    user = await _get_current_user(authorization)
+    user_id = user["id"]
+
+    await asyncio.to_thread(_backfill_search_index, user_id)
+    try:
+        items = await asyncio.to_thread(search_index.search, user_id, q, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"query": q, "items": items}
+
+
+@app.get("/api/semantic-search")
+async def semantic_search_transcripts(
+    q: str = Query(..., max_length=200),
+    limit: int = Query(default=10, ge=1, le=50),
+    transcription_type: str | None = Query(default=None, alias="type"),
+    authorization: str | None = Header(default=None),
+):
+    """내 변환 기록 의미 검색 - 주제가 가까운 문단 (task_id 와 corrected_text 안의 글자 위치 start/end 포함)"""
+    if not semantic_index:
+        raise HTTPException(status_code=503, detail="의미 검색이 설정되지 않았습니다.")
+    _ensure_transcriptions_user_scope_ready()
+    user = await _get_current_user(authorization)
+
+    try:
+        items = await asyncio.to_thread(semantic_index.search, user["id"], q, limit, transcription_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"query": q, "items": items}
 
 
 @app.post("/api/auth/signup")
@@ -1003,7 +2058,7 @@ async def signup(
     if full_name.strip():
         payload["data"] = {"full_name": full_name.strip()}
 
-    data = _supabase_auth_request("signup", payload=payload)
+    data = await _supabase_auth_request("signup", payload=payload)
     session = data.get("session") or {}
     access_token = data.get("access_token") or session.get("access_token")
     refresh_token = data.get("refresh_token") or session.get("refresh_token")
@@ -1023,7 +2078,7 @@ async def login(
     password: str = Form(...),
 ):
     """Supabase Auth 로그인"""
-    data = _supabase_auth_request(
+    data = await _supabase_auth_request(
         "token?grant_type=password",
         payload={"email": email.strip().lower(), "password": password},
     )
@@ -1064,14 +2119,57 @@ async def get_oauth_url(
 
 @app.get("/api/auth/me")
 async def me(authorization: str | None = Header(default=None)):
-    """현재 로그인 사용자 조회"""
-    user = _get_current_user(authorization)
+    """현재 로그인 사용자 조회 (프로필 전체가 필요하므로 Supabase Auth 조회)"""
+    user = await _get_current_user(authorization, remote=True)
     return {
         "success": True,
         "user": user,
     }
 
 
+@app.get("/api/webhooks")
+async def get_webhook(authorization: str | None = Header(default=None)):
+    """계정 웹훅 URL + 서명 키 조회 (서명 키는 작업 단위 webhook_url 전송에도 사용)"""
+    user = await _get_current_user(authorization)
+    secret = webhook_store.get_secret(user["id"])
+    endpoint = webhook_store.get_endpoint(user["id"])
+    return {"success": True, "url": endpoint["url"], "secret": secret}
+
+
+@app.post("/api/webhooks")
+async def set_webhook(
+    url: str = Form(...),
+    rotate_secret: bool = Form(False),
+    authorization: str | None = Header(default=None),
+):
+    """계정 웹훅 등록/변경 (이 계정의 모든 작업 완료·오류 시 전송)"""
+    user = await _get_current_user(authorization)
+    try:
+        url = await asyncio.to_thread(validate_webhook_url, url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    endpoint = webhook_store.set_endpoint(user["id"], url, rotate_secret=rotate_secret)
+    return {"success": True, "url": endpoint["url"], "secret": endpoint["secret"]}
+
+
+@app.delete("/api/webhooks")
+async def delete_webhook(authorization: str | None = Header(default=None)):
+    """계정 웹훅 해제 (작업 단위 webhook_url 전송은 계속 동작)"""
+    user = await _get_current_user(authorization)
+    webhook_store.set_endpoint(user["id"], None)
+    return {"success": True}
+
+
+@app.get("/api/webhooks/deliveries")
+async def get_webhook_deliveries(
+    limit: int = Query(default=50, ge=1, le=200),
+    authorization: str | None = Header(default=None),
+):
+    """최근 웹훅 전송 기록 (상태: pending/delivered/failed, 시도 횟수, 마지막 응답)"""
+    user = await _get_current_user(authorization)
+    return {"success": True, "deliveries": webhook_store.list_deliveries(user["id"], limit)}
+
+
 @app.post("/api/records/draft")
 async def generate_record_draft(
     text: str = Form(...),
@@ -1107,7 +2205,7 @@ async def generate_record_draft(
         except Exception as e:
             if ("429" in str(e) or "ResourceExhausted" in str(e) or "quota" in str(e).lower()) and attempt < max_retries - 1:
                 wait_time = (2 ** attempt) * 10 + random.uniform(0, 5)
-                print(f"[records-draft] Quota exceeded (429). Retrying in {wait_time:.1f}s...")
+                tracing.log(f"[records-draft] Quota exceeded (429). Retrying in {wait_time:.1f}s...", level="warning")
                 await asyncio.sleep(wait_time)
             else:
                 raise HTTPException(status_code=500, detail=f"기록본 초안 생성 실패: {str(e)}")
@@ -1131,7 +2229,7 @@ async def save_record(
     authorization: str | None = Header(default=None),
 ):
     """로그인 사용자별 기록본 저장"""
-    user = _get_current_user(authorization)
+    user = await _get_current_user(authorization)
     normalized_category = category.strip()
     normalized_content = content.strip()
 
@@ -1151,38 +2249,60 @@ async def save_record(
     }
 
     try:
-        response = supabase.table("saved_records").insert(insert_row).execute()
+        record = await asyncio.to_thread(record_repo.insert, insert_row)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"saved_records 저장 실패: {str(e)}")
 
     return {
         "success": True,
-        "record": response.data[0] if response.data else insert_row,
+        "record": record,
     }
 
 
 @app.get("/api/records")
 async def get_records(
     category: str = "",
+    view: str = Query(default="full"),
+    limit: int = Query(default=RECORDS_PAGE_SIZE, ge=1, le=HISTORY_PAGE_MAX),
+    cursor: str | None = Query(default=None),
     authorization: str | None = Header(default=None),
 ):
-    """로그인 사용자별 저장 기록 조회"""
-    user = _get_current_user(authorization)
+    """
+    로그인 사용자별 저장 기록 조회 (최신순, 커서 페이지네이션)
+    view=list 이면 content 없이 목록만 - 본문은 GET /api/records/{record_id} 로 따로 조회
+    """
+    user = await _get_current_user(authorization)
+    if view not in ("full", "list"):
+        raise HTTPException(status_code=400, detail="view 값은 full 또는 list 여야 합니다.")
 
+    columns = RECORD_LIST_COLUMNS if view == "list" else "*"
+    page_cursor = _decode_cursor(cursor) if cursor else None
     try:
-        query = (
-            supabase.table("saved_records")
-            .select("*")
-            .eq("user_id", user["id"])
-            .order("created_at", desc=True)
+        rows = await asyncio.to_thread(
+            record_repo.list_for_user, user["id"], columns, limit + 1, page_cursor, category or None
         )
-        if category:
-            query = query.eq("category", category)
-        response = query.execute()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"saved_records 조회 실패: {str(e)}")
 
-    return response.data or []
+    return _page_response(rows, limit, "id", rows)
+
+
+@app.get("/api/records/{record_id}")
+async def get_record(
+    record_id: int,
+    authorization: str | None = Header(default=None),
+):
+    """저장 기록 하나 조회 (본문 포함)"""
+    user = await _get_current_user(authorization)
+
+    try:
+        record = await asyncio.to_thread(record_repo.get, record_id, user["id"])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"saved_records 조회 실패: {str(e)}")
+
+    if not record:
+        raise HTTPException(status_code=404, detail="기록본을 찾을 수 없습니다.")
+    return record
 
 
 @app.post("/api/summarize")
@@ -1214,7 +2334,7 @@ async def summarize_sermon(
             except Exception as e:
                 if ("429" in str(e) or "ResourceExhausted" in str(e) or "quota" in str(e).lower()) and attempt < max_retries - 1:
                     wait_time = (2 ** attempt) * 10 + random.uniform(0, 5)
-                    print(f"[summarize] Quota exceeded (429). Retrying in {wait_time:.1f}s...")
+                    tracing.log(f"[summarize] Quota exceeded (429). Retrying in {wait_time:.1f}s...", level="warning")
                     await asyncio.sleep(wait_time)
                 else:
                     raise e
@@ -1240,5 +2360,13 @@ async def health_check():
         "apis": {
             "gemini": bool(GEMINI_API_KEY),
             "openai_whisper": bool(OPENAI_API_KEY),
-        }
+        },
+        "task_registries": registry_metrics(),
+        "outbound_http": http_client.http_metrics(),
+        "repository": repository_metrics(transcription_repo, record_repo),
+        "write_behind": transcription_writer.metrics() if transcription_writer else None,
+        "search_index": search_index.metrics(),
+        "semantic_index": semantic_index.metrics() if semantic_index else None,
+        "tracing": tracing.tracing_metrics(),
+        "profiling": profiling.profiling_metrics(),
     }
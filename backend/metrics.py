@@ -0,0 +1,290 @@
+"""
+Prometheus 지표 - 단계별/외부 호출별 소요 시간 히스토그램, 카운터, 게이지 (`GET /metrics`, 텍스트 형식 0.0.4)
+
+- 외부 패키지 없이 프로세스 메모리에 누적 (관측 한 번 = 잠금 + 구간 이분 탐색, 수 μs 이하)
+- 큐 길이/캐시 적중처럼 이미 다른 곳에 있는 값은 수집 시점에 콜백(register_collector)으로 읽음
+- API 프로세스는 /metrics, 분리 실행 워커(`python -m worker`)는 WORKER_METRICS_PORT 로 따로 노출
+  (프로세스마다 값이 따로라 Prometheus 에서 인스턴스별로 수집해 합산)
+"""
+
+import asyncio
+import bisect
+import http.server
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import tracing
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+METRICS_PREFIX = "mallog24_"
+
+# 구간 상한(초) - 파이프라인 단계는 수 분 ~ 수십 분, 외부 호출은 수십 ms ~ 수 분
+STAGE_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+CALL_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 5e6, 1e7, 2.5e7)
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+# 이벤트 루프 지연 측정 간격(초, 0 이면 끔)
+EVENT_LOOP_LAG_INTERVAL = float(os.getenv("EVENT_LOOP_LAG_INTERVAL", "0.5"))
+
+_metrics: list["_Metric"] = []
+_collectors: list = []
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = METRICS_PREFIX + name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_total(self, value: float, **labels) -> None:
+        """다른 곳에서 누적한 값을 수집 시점에 그대로 옮김"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_label_text(self.labelnames, key)} {_format_value(value)}" for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        self.set_total(value, **labels)
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class _HistogramValue:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.total = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (), buckets: tuple = CALL_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = _HistogramValue(len(self.buckets) + 1)
+            state.counts[index] += 1
+            state.total += value
+            state.count += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = [(key, list(state.counts), state.total, state.count) for key, state in self._values.items()]
+        lines = self._header()
+        for key, counts, total, count in items:
+            cumulative = 0
+            for upper, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(upper)}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, key, le)} {cumulative}")
+            labels = _label_text(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+def register_collector(collect) -> None:
+    """collect() 는 수집 직전에 호출됨 - 게이지 값을 채우는 용도 (예외는 무시)"""
+    _collectors.append(collect)
+
+
+def render() -> str:
+    for collect in _collectors:
+        try:
+            collect()
+        except Exception as e:
+            tracing.log(f"Metrics collector failed: {e}", level="warning")
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ===== 지표 정의 =====
+
+STAGE_SECONDS = Histogram(
+    "stage_duration_seconds", "파이프라인 단계별 소요 시간", ("stage",), buckets=STAGE_BUCKETS
+)
+JOB_SECONDS = Histogram(
+    "transcription_duration_seconds", "변환 작업 전체 소요 시간", ("outcome",), buckets=STAGE_BUCKETS
+)
+JOBS_TOTAL = Counter("transcriptions_total", "끝난 변환 작업 수", ("outcome",))
+JOBS_IN_FLIGHT = Gauge("transcriptions_in_flight", "이 프로세스에서 처리 중인 변환 작업 수")
+
+CALL_SECONDS = Histogram(
+    "external_call_duration_seconds", "외부 호출 소요 시간", ("service", "operation", "outcome")
+)
+CALL_BYTES = Histogram(
+    "external_call_bytes", "외부 호출 요청/응답 크기", ("service", "direction"), buckets=SIZE_BUCKETS
+)
+CALLS_IN_FLIGHT = Gauge("external_calls_in_flight", "진행 중인 외부 호출 수", ("service",))
+CALL_RETRIES = Counter("external_call_retries_total", "외부 호출 재시도 횟수", ("service",))
+RATE_LIMITED = Counter("external_call_rate_limited_total", "429/할당량 초과 응답 수", ("service",))
+LLM_TOKENS = Counter("llm_tokens_total", "LLM 토큰 사용량", ("service", "kind"))
+
+QUEUE_JOBS = Gauge("queue_jobs", "작업 큐 상태별 작업 수", ("status",))
+CACHE_LOOKUPS = Counter("cache_lookups_total", "캐시 조회 횟수 (result=hit|miss)", ("cache", "result"))
+CACHE_ENTRIES = Gauge("cache_entries", "캐시 항목 수", ("cache",))
+WRITE_BEHIND_PENDING = Gauge("write_behind_pending_rows", "아직 반영되지 않은 변환 기록 행 수 (dead-letter 제외)")
+WRITE_BEHIND_DEAD = Gauge("write_behind_dead_letter_rows", "반영을 포기한(dead-letter) 변환 기록 행 수")
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "이벤트 루프 지연 (예정보다 늦게 깨어난 시간)", buckets=LAG_BUCKETS
+)
+
+
+def is_rate_limited_error(error: Exception) -> bool:
+    """429 / 할당량 초과 예외 (OpenAI RateLimitError, Gemini ResourceExhausted 포함)"""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    message = str(error)
+    return "429" in message or "ResourceExhausted" in message or "quota" in message.lower()
+
+
+@contextmanager
+def track_call(service: str, operation: str, bytes_out: int | None = None):
+    """외부 호출 하나: 소요 시간(결과별), 진행 중 수, 요청 크기, 429 집계"""
+    CALLS_IN_FLIGHT.inc(service=service)
+    if bytes_out is not None:
+        CALL_BYTES.observe(bytes_out, service=service, direction="out")
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except Exception as e:
+        outcome = "rate_limited" if is_rate_limited_error(e) else "error"
+        if outcome == "rate_limited":
+            RATE_LIMITED.inc(service=service)
+        raise
+    finally:
+        CALLS_IN_FLIGHT.dec(service=service)
+        CALL_SECONDS.observe(time.perf_counter() - started, service=service, operation=operation, outcome=outcome)
+
+
+def record_gemini_usage(response) -> None:
+    """Gemini 응답의 usage_metadata 토큰 수와 응답 크기"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        LLM_TOKENS.inc(getattr(usage, "prompt_token_count", 0) or 0, service="gemini", kind="prompt")
+        LLM_TOKENS.inc(getattr(usage, "candidates_token_count", 0) or 0, service="gemini", kind="output")
+    try:
+        CALL_BYTES.observe(len(response.text.encode("utf-8")), service="gemini", direction="in")
+    except Exception:
+        pass
+
+
+async def monitor_event_loop_lag(interval: float = EVENT_LOOP_LAG_INTERVAL) -> None:
+    """interval 마다 잠들었다 깨어난 시각이 늦은 만큼 = 루프를 막은 동기 코드 시간 (취소될 때까지)"""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - started - interval))
+
+
+def start_event_loop_monitor() -> asyncio.Task | None:
+    if not METRICS_ENABLED or EVENT_LOOP_LAG_INTERVAL <= 0:
+        return None
+    return asyncio.create_task(monitor_event_loop_lag())
+
+
+# ===== 워커 프로세스용 HTTP 노출 =====
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port: int, host: str = "0.0.0.0") -> http.server.ThreadingHTTPServer:
+    server = http.server.ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    tracing.log(f"Metrics endpoint: http://{host}:{port}/metrics")
+    return server
+
@@ -0,0 +1,93 @@
+"""
+부분 결과(중간 녹취) - 전체 작업이 끝나기 전에 읽을 수 있는 초안을 단계적으로 제공
+
+- STT 청크가 끝날 때마다 Whisper 원문 + 규칙 기반 교정(correct_text) 초안을 구간(segment)으로 추가
+- Gemini 교정이 시작되면 구간을 교정 창 단위로 다시 나누고, 창이 끝날 때마다 해당 구간을 교정본으로 교체
+- 변경마다 revision이 1씩 오르고 각 구간은 마지막으로 바뀐 revision을 가진다
+  → 클라이언트는 since_revision 이후 바뀐 구간만 받아 index 위치에 덮어쓰고 segment_count 길이로 자른다
+"""
+
+import threading
+
+import tracing
+from task_registry import TaskRegistry
+
+# 이 프로세스에서 실행 중인 작업의 부분 결과 (task_id → PartialTranscript)
+task_partials = TaskRegistry("partials")
+
+
+def filter_partial(partial: dict | None, since_revision: int | None = None) -> dict | None:
+    """저장된 전체 스냅샷에서 since_revision 이후 바뀐 구간만 남김"""
+    if not partial:
+        return None
+    if since_revision is None:
+        return partial
+    return {
+        **partial,
+        "segments": [segment for segment in partial["segments"] if segment["revision"] > since_revision],
+    }
+
+
+class PartialTranscript:
+    """
+    작업 하나의 부분 결과.
+    drafter(text)는 초안용 규칙 기반 교정 함수, publish(task_id, partial)는 공유 저장소 기록 함수.
+    """
+
+    def __init__(self, task_id: str, publish=None, drafter=None):
+        self.task_id = task_id
+        self.publish = publish
+        self.drafter = drafter or (lambda text: text)
+        self.revision = 0
+        self.segments: list[dict] = []
+        self._lock = threading.Lock()
+        task_partials[task_id] = self
+
+    def add_draft(self, text: str) -> None:
+        """STT 청크 하나 완료 → 초안 구간 추가"""
+        text = (text or "").strip()
+        if not text:
+            return
+        draft = self.drafter(text)
+        with self._lock:
+            self.revision += 1
+            self.segments.append({"kind": "draft", "text": draft, "revision": self.revision})
+        self._publish()
+
+    def rebase(self, texts: list[str]) -> None:
+        """교정 시작 → 교정 창 단위 초안 구간으로 전체 교체"""
+        drafts = [self.drafter(text) for text in texts]
+        with self._lock:
+            self.revision += 1
+            self.segments = [{"kind": "draft", "text": draft, "revision": self.revision} for draft in drafts]
+        self._publish()
+
+    def refine(self, index: int, text: str) -> None:
+        """교정 창 하나 완료 → 해당 구간을 교정본으로 교체"""
+        with self._lock:
+            if not 0 <= index < len(self.segments):
+                return
+            self.revision += 1
+            self.segments[index] = {"kind": "refined", "text": text, "revision": self.revision}
+        self._publish()
+
+    def snapshot(self, since_revision: int | None = None) -> dict:
+        with self._lock:
+            partial = {
+                "revision": self.revision,
+                "segment_count": len(self.segments),
+                "refined_count": sum(1 for segment in self.segments if segment["kind"] == "refined"),
+                "segments": [{"index": index, **segment} for index, segment in enumerate(self.segments)],
+            }
+        return filter_partial(partial, since_revision)
+
+    def finish(self) -> None:
+        task_partials.pop(self.task_id, None)
+
+    def _publish(self) -> None:
+        if not self.publish:
+            return
+        try:
+            self.publish(self.task_id, self.snapshot())
+        except Exception as e:
+            tracing.log(f"Partial publish failed: {e}", level="warning", task_id=self.task_id)
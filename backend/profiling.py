@@ -0,0 +1,240 @@
+"""
+요청별 프로파일링 - 느린 업로드 하나를 운영 환경에서 골라 프로파일 (기본 꺼짐)
+
+- 켜는 방법
+  - 관리자 헤더: PROFILE_TOKEN 을 설정하고 요청에 `X-Profile: <토큰>`
+    → 그 요청 하나 + (/api/transcribe 면) 그 작업의 process_transcription 전체
+  - 환경 변수: PROFILE_ALL_JOBS=1 이면 모든 변환 작업 (스테이징/재현용)
+- 샘플링 프로파일러: 별도 스레드가 PROFILE_INTERVAL_MS 마다 모든 스레드의 스택(sys._current_frames)을 읽음
+  - wall.folded : 샘플 수 (대기 포함 실제 시간)
+  - cpu.folded  : 직전 샘플 이후 그 스레드가 쓴 CPU 시간(μs)을 스택에 배분
+  두 파일 모두 flamegraph.pl / speedscope 가 읽는 folded 형식 ("스레드;바깥;...;안쪽 값")
+- 메모리 할당: tracemalloc 스냅샷(alloc.snapshot, tracemalloc.Snapshot.load 로 열기) + 위치별 상위 목록(alloc.txt)
+- 결과: PROFILE_DIR/<task_id>/attempt-<n>/ 또는 PROFILE_DIR/requests/<시각>-<경로>/ , 요약은 summary.json
+- 꺼져 있으면 미들웨어를 등록하지 않고, 작업마다 플래그 확인 한 번뿐
+- tracemalloc 과 샘플러는 프로세스 전체에 걸리므로 한 프로세스에서 동시에 하나만 (나머지는 건너뜀)
+  같은 프로세스의 다른 작업 스택도 함께 잡히므로 스레드 이름으로 구분
+"""
+
+import hmac
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+import tracing
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_ALL_JOBS = os.getenv("PROFILE_ALL_JOBS", "0") == "1"
+PROFILE_DIR = os.getenv("PROFILE_DIR") or os.path.join(tempfile.gettempdir(), "mallog24_profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "10"))
+# 할당 위치마다 저장할 호출 스택 깊이 (0 이면 메모리 할당 기록 안 함).
+# 할당이 잦은 순수 파이썬 코드는 1 프레임에 약 10배, 10 프레임이면 약 100배 느려짐 (I/O·numpy 위주 파이프라인은 영향 작음)
+PROFILE_TRACEMALLOC_FRAMES = int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", "1"))
+PROFILE_TOP_N = 30
+
+PROFILE_HEADER = "X-Profile"
+
+_active = threading.Lock()
+stats = {"profiles_written": 0, "profiles_skipped_busy": 0}
+
+
+def header_allowed(value: str | None) -> bool:
+    """X-Profile 헤더 값이 관리자 토큰과 일치하는지 (토큰 미설정이면 항상 False)"""
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(value or "", PROFILE_TOKEN)
+
+
+# ===== 스택 샘플링 =====
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _fold(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def _thread_cpu_seconds(ident: int, clock_ids: dict) -> float | None:
+    """스레드별 CPU 시간 (Linux/macOS pthread 시계, 없으면 None)"""
+    if not hasattr(time, "pthread_getcpuclockid"):
+        return None
+    try:
+        clock_id = clock_ids.get(ident)
+        if clock_id is None:
+            clock_id = clock_ids[ident] = time.pthread_getcpuclockid(ident)
+        return time.clock_gettime(clock_id)
+    except (OSError, OverflowError):
+        return None
+
+
+class _StackSampler(threading.Thread):
+    def __init__(self, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.wall: Counter = Counter()
+        self.cpu: Counter = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        own = threading.get_ident()
+        clock_ids: dict[int, int] = {}
+        last_cpu: dict[int, float] = {}
+        while not self._stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = f"{names.get(ident, ident)};{_fold(frame)}"
+                self.wall[stack] += 1
+                cpu = _thread_cpu_seconds(ident, clock_ids)
+                if cpu is not None:
+                    previous = last_cpu.get(ident)
+                    last_cpu[ident] = cpu
+                    if previous is not None and cpu > previous:
+                        self.cpu[stack] += round((cpu - previous) * 1e6)
+            self.samples += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def _top_leaves(folded: Counter, limit: int) -> list[list]:
+    """가장 안쪽 함수(self) 기준 상위 목록"""
+    leaves: Counter = Counter()
+    for stack, value in folded.items():
+        leaves[stack.rsplit(";", 1)[-1]] += value
+    return [[label, value] for label, value in leaves.most_common(limit)]
+
+
+def _write_folded(path: str, folded: Counter) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, value in folded.most_common():
+            f.write(f"{stack} {value}\n")
+
+
+# ===== 프로파일 =====
+
+class Profile:
+    """with 블록 하나를 프로파일 (async 함수 안에서 await 를 감싸도 됨 - 샘플러는 별도 스레드)"""
+
+    def __init__(self, output_dir: str, label: str):
+        self.output_dir = output_dir
+        self.label = label
+        self._sampler: _StackSampler | None = None
+        self._owns_tracemalloc = False
+
+    def __enter__(self) -> "Profile":
+        if PROFILE_TRACEMALLOC_FRAMES > 0:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+                self._owns_tracemalloc = True
+            tracemalloc.reset_peak()
+        self._started_at = datetime.now().isoformat()
+        self._wall_started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        self._sampler = _StackSampler(PROFILE_INTERVAL_MS / 1000)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        try:
+            self._sampler.stop()
+            summary = {
+                "label": self.label,
+                "started_at": self._started_at,
+                "wall_seconds": round(time.perf_counter() - self._wall_started, 3),
+                "process_cpu_seconds": round(time.process_time() - self._cpu_started, 3),
+                "interval_ms": PROFILE_INTERVAL_MS,
+                "samples": self._sampler.samples,
+                "error": f"{exc_type.__name__}: {exc}" if exc is not None else None,
+                "top_wall_samples": _top_leaves(self._sampler.wall, PROFILE_TOP_N),
+                "top_cpu_us": _top_leaves(self._sampler.cpu, PROFILE_TOP_N),
+            }
+            snapshot = None
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                summary["traced_memory"] = {"current_bytes": current, "peak_bytes": peak}
+                snapshot = tracemalloc.take_snapshot().filter_traces(
+                    (tracemalloc.Filter(False, tracemalloc.__file__),)
+                )
+                if self._owns_tracemalloc:
+                    tracemalloc.stop()
+            self._write(summary, snapshot)
+            stats["profiles_written"] += 1
+            tracing.log(f"Profile saved: {self.output_dir}", wall_seconds=summary["wall_seconds"])
+        except Exception as e:
+            tracing.log(f"Profile write failed: {e}", level="warning")
+        finally:
+            _active.release()
+        return False
+
+    def _write(self, summary: dict, snapshot) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        _write_folded(os.path.join(self.output_dir, "wall.folded"), self._sampler.wall)
+        _write_folded(os.path.join(self.output_dir, "cpu.folded"), self._sampler.cpu)
+        if snapshot is not None:
+            snapshot.dump(os.path.join(self.output_dir, "alloc.snapshot"))
+            with open(os.path.join(self.output_dir, "alloc.txt"), "w", encoding="utf-8") as f:
+                for stat in snapshot.statistics("traceback")[:PROFILE_TOP_N]:
+                    f.write(f"{stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+                    f.write("\n".join(stat.traceback.format(most_recent_first=True)) + "\n\n")
+        with open(os.path.join(self.output_dir, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+class _Off:
+    """프로파일하지 않음 (꺼짐 / 다른 프로파일 진행 중)"""
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_OFF = _Off()
+
+
+def _start(output_dir: str, label: str):
+    if not _active.acquire(blocking=False):
+        stats["profiles_skipped_busy"] += 1
+        tracing.log(f"Profile skipped (another profile is running): {label}", level="warning")
+        return _OFF
+    return Profile(output_dir, label)
+
+
+def profile_job(task_id: str, attempt: int, requested: bool):
+    """변환 작업 하나 (X-Profile 로 요청됐거나 PROFILE_ALL_JOBS)"""
+    if not (requested or PROFILE_ALL_JOBS):
+        return _OFF
+    return _start(os.path.join(PROFILE_DIR, task_id, f"attempt-{attempt}"), f"transcription {task_id}")
+
+
+def profile_request(method: str, path: str):
+    """HTTP 요청 하나 → (컨텍스트, 결과 경로)"""
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", path).strip("-")[:60] or "root"
+    output_dir = os.path.join(PROFILE_DIR, "requests", f"{datetime.now():%Y%m%d-%H%M%S-%f}-{method}-{slug}")
+    return _start(output_dir, f"{method} {path}"), output_dir
+
+
+def profiling_metrics() -> dict:
+    return {
+        "header_enabled": bool(PROFILE_TOKEN),
+        "all_jobs": PROFILE_ALL_JOBS,
+        "active": _active.locked(),
+        **stats,
+    }
+
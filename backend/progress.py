@@ -0,0 +1,168 @@
+"""
+작업 진행률 - 단계별 진행 상황, 완료율(%), 예상 남은 시간(ETA)
+
+단계: upload → split → stt(청크 i/n) → diarize(통화/대화) → correct(교정 창 j/m) → postprocess → save
+- 갱신은 프로세스 메모리에서만 일어나고, 공유 상태 저장소에는 PROGRESS_FLUSH_INTERVAL 간격(또는 단계 전환 시)으로만 기록
+- ETA는 이 프로세스에서 최근 측정한 단계별 단위 처리 시간(지수 이동 평균)으로 계산
+- 취소 요청된 작업은 단계 시작/단위 완료 지점(check_cancelled)에서 TaskCancelled로 중단
+"""
+
+import math
+import os
+import threading
+import time
+
+import metrics
+import tracing
+from task_registry import TaskRegistry
+
+PROGRESS_FLUSH_INTERVAL = float(os.getenv("PROGRESS_FLUSH_INTERVAL", "2"))
+
+# 전체 진행률에서 각 단계가 차지하는 비중
+STAGE_WEIGHTS = {
+    "upload": 0.0,
+    "split": 5.0,
+    "stt": 45.0,
+    "diarize": 5.0,
+    "correct": 40.0,
+    "postprocess": 2.0,
+    "save": 3.0,
+}
+STAGE_ORDER = list(STAGE_WEIGHTS)
+
+# 단위(청크/교정 창/단계)당 처리 시간 초기값(초) - 측정값이 쌓이면 EMA로 대체
+DEFAULT_UNIT_SECONDS = {
+    "upload": 0.0,
+    "split": 5.0,
+    "stt": 60.0,
+    "diarize": 10.0,
+    "correct": 90.0,
+    "postprocess": 1.0,
+    "save": 2.0,
+}
+TIMING_EMA_ALPHA = 0.3
+
+_unit_seconds = dict(DEFAULT_UNIT_SECONDS)
+_timing_lock = threading.Lock()
+
+# 이 프로세스에서 실행 중인 작업의 최신 진행 상황 (task_id → dict)
+task_progress = TaskRegistry("progress")
+# 취소 요청을 받은 작업 (워커가 큐 상태를 보고 채움)
+cancelled_tasks = TaskRegistry("cancel_requests")
+
+
+class TaskCancelled(Exception):
+    """사용자 요청으로 작업이 취소됨"""
+
+
+def request_cancel(task_id: str) -> None:
+    cancelled_tasks[task_id] = True
+
+
+def _record_unit_timing(stage: str, seconds_per_unit: float) -> None:
+    with _timing_lock:
+        previous = _unit_seconds.get(stage, seconds_per_unit)
+        _unit_seconds[stage] = previous + TIMING_EMA_ALPHA * (seconds_per_unit - previous)
+
+
+class ProgressTracker:
+    """
+    작업 하나의 진행 상황 추적.
+    stage(name, total) 로 단계 시작, advance() 로 단위 완료를 알린다.
+    publish(task_id, progress) 는 공유 저장소 기록 함수 (간격 제한 적용).
+    """
+
+    def __init__(self, task_id: str, publish=None, stages: list[str] | None = None, expected_units: int = 1):
+        self.task_id = task_id
+        self.publish = publish
+        self.stages = stages or STAGE_ORDER
+        self.expected_units = max(1, expected_units)
+        self.stage_name = "upload"
+        self.done = 0
+        self.total = 1
+        self._stage_started = time.monotonic()
+        self._unit_started = self._stage_started
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+        self._update(force=True)
+
+    def check_cancelled(self) -> None:
+        if self.task_id in cancelled_tasks:
+            raise TaskCancelled(self.task_id)
+
+    def stage(self, name: str, total: int = 1) -> None:
+        self.check_cancelled()
+        with self._lock:
+            self._finish_stage()
+            self.stage_name = name
+            self.done = 0
+            self.total = max(1, total)
+            if name == "stt":
+                # 교정 창 수는 STT 청크 수와 비슷하다고 가정 (교정 단계 시작 시 실제 값으로 갱신)
+                self.expected_units = self.total
+            self._stage_started = self._unit_started = time.monotonic()
+        self._update(force=True)
+
+    def advance(self, units: int = 1) -> None:
+        with self._lock:
+            now = time.monotonic()
+            _record_unit_timing(self.stage_name, (now - self._unit_started) / max(units, 1))
+            self._unit_started = now
+            self.done = min(self.total, self.done + units)
+        self._update()
+        self.check_cancelled()
+
+    def finish(self) -> None:
+        with self._lock:
+            self._finish_stage()
+        task_progress.pop(self.task_id, None)
+        cancelled_tasks.pop(self.task_id, None)
+
+    def _finish_stage(self) -> None:
+        if self.stage_name == "upload":
+            return
+        elapsed = time.monotonic() - self._stage_started
+        metrics.STAGE_SECONDS.observe(elapsed, stage=self.stage_name)
+        # 단위 진행 보고가 없던 단계(split/postprocess/save 등)는 단계 전체 시간을 1단위로 기록
+        if self.done == 0:
+            _record_unit_timing(self.stage_name, elapsed)
+
+    def _stage_units(self, name: str) -> int:
+        return self.expected_units if name == "correct" else 1
+
+    def snapshot(self) -> dict:
+        with _timing_lock:
+            unit_seconds = dict(_unit_seconds)
+
+        active = [name for name in self.stages if STAGE_WEIGHTS.get(name, 0) > 0 or name == self.stage_name]
+        total_weight = sum(STAGE_WEIGHTS[name] for name in active) or 1.0
+        index = active.index(self.stage_name) if self.stage_name in active else 0
+        fraction = self.done / self.total
+
+        completed_weight = sum(STAGE_WEIGHTS[name] for name in active[:index])
+        percent = (completed_weight + STAGE_WEIGHTS[self.stage_name] * fraction) / total_weight * 100
+
+        remaining = (self.total - self.done) * unit_seconds.get(self.stage_name, 0.0)
+        remaining -= min(time.monotonic() - self._unit_started, unit_seconds.get(self.stage_name, 0.0))
+        for name in active[index + 1:]:
+            remaining += self._stage_units(name) * unit_seconds.get(name, 0.0)
+
+        return {
+            "stage": self.stage_name,
+            "stage_done": self.done,
+            "stage_total": self.total,
+            "percent": round(min(percent, 99.0), 1),
+            "eta_seconds": max(0, math.ceil(remaining)),
+            "updated_at": time.time(),
+        }
+
+    def _update(self, force: bool = False) -> None:
+        progress = self.snapshot()
+        task_progress[self.task_id] = progress
+        now = time.monotonic()
+        if self.publish and (force or now - self._last_flush >= PROGRESS_FLUSH_INTERVAL):
+            self._last_flush = now
+            try:
+                self.publish(self.task_id, progress)
+            except Exception as e:
+                tracing.log(f"Progress publish failed: {e}", level="warning", task_id=self.task_id)
@@ -0,0 +1,576 @@
+"""
+영속 저장소(repository) - 변환 기록(transcriptions)과 저장 기록본(saved_records) 읽기/쓰기
+
+- 백엔드 교체 가능: REPOSITORY_BACKEND=supabase (기본) | sqlite (로컬 실행/부하 테스트, Supabase 없이 동작)
+- 목록은 (created_at, 보조 키) 내림차순 keyset 페이지 - cursor 는 이전 페이지 마지막 행의 (created_at, 키)
+- 읽기 캐시(read-through): 단건은 TTL 동안 메모리에서, 목록은 사용자별 세대(generation) 키로 쓰기 시 무효화
+  (REPOSITORY_CACHE_TTL 초, 0이면 끔 / 목록은 REPOSITORY_LIST_CACHE_TTL 초)
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+
+import tracing
+from task_registry import TaskRegistry
+
+REPOSITORY_BACKEND = os.getenv("REPOSITORY_BACKEND", "supabase")
+REPOSITORY_DB_PATH = os.getenv("REPOSITORY_DB_PATH") or os.path.join(tempfile.gettempdir(), "mallog24_data.db")
+REPOSITORY_CACHE_TTL = float(os.getenv("REPOSITORY_CACHE_TTL", "30"))
+# 목록은 다른 프로세스(분리 워커)의 저장을 알 수 없으므로 더 짧게
+REPOSITORY_LIST_CACHE_TTL = float(os.getenv("REPOSITORY_LIST_CACHE_TTL", "5"))
+REPOSITORY_CACHE_MAX_ENTRIES = int(os.getenv("REPOSITORY_CACHE_MAX_ENTRIES", "2000"))
+
+# 테이블별 컬럼 (SQLite 스키마 + 선택 컬럼 검증용)
+TRANSCRIPTION_COLUMNS = (
+    "task_id", "user_id", "status", "error", "created_at", "language", "raw_text", "corrected_text",
+    "characters", "darakbang_optimized", "engine", "transcription_type", "summary_preview", "text_blobs",
+)
+RECORD_COLUMNS = ("id", "user_id", "category", "title", "content", "task_id", "source_type", "created_at")
+JSON_COLUMNS = {"text_blobs"}
+
+_MISSING = object()
+
+
+def parse_columns(columns: str, allowed: tuple[str, ...]) -> list[str]:
+    if columns.strip() == "*":
+        return list(allowed)
+    names = [name.strip() for name in columns.split(",") if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ValueError(f"알 수 없는 컬럼: {', '.join(unknown)}")
+    return names
+
+
+class TranscriptionRepository(ABC):
+    """변환 기록 저장소 인터페이스. 행은 transcriptions 테이블 컬럼 dict"""
+
+    @abstractmethod
+    def has_column(self, column: str) -> bool:
+        """마이그레이션 SQL 적용 여부 확인용 (컬럼이 없으면 False, 그 외 오류는 그대로 발생)"""
+
+    @abstractmethod
+    def insert(self, row: dict) -> None:
+        """task_id 기준 upsert - 같은 작업 행을 다시 저장하면(재반영/재시도) 덮어씀"""
+
+    def insert_many(self, rows: list[dict]) -> None:
+        """여러 행을 한 번에 저장 (일괄 쓰기, insert 와 같은 upsert)"""
+        for row in rows:
+            self.insert(row)
+
+    @abstractmethod
+    def delete(self, task_id: str, user_id: str) -> None:
+        """작업 행 삭제 (저장 직후 취소된 작업 되돌리기용)"""
+
+    @abstractmethod
+    def get(self, task_id: str, user_id: str, columns: str = "*") -> dict | None:
+        ...
+
+    @abstractmethod
+    def list_for_user(
+        self, user_id: str, columns: str, limit: int, cursor: tuple[str, str] | None = None
+    ) -> list[dict]:
+        """최신순 (created_at, task_id) 내림차순, cursor 이전 행 최대 limit 개"""
+
+
+class RecordRepository(ABC):
+    """저장 기록본 저장소 인터페이스. 행은 saved_records 테이블 컬럼 dict"""
+
+    @abstractmethod
+    def insert(self, row: dict) -> dict:
+        """저장된 행 반환 (id 포함)"""
+
+    @abstractmethod
+    def get(self, record_id: int, user_id: str, columns: str = "*") -> dict | None:
+        ...
+
+    @abstractmethod
+    def list_for_user(
+        self,
+        user_id: str,
+        columns: str,
+        limit: int,
+        cursor: tuple[str, str] | None = None,
+        category: str | None = None,
+    ) -> list[dict]:
+        """최신순 (created_at, id) 내림차순, cursor 이전 행 최대 limit 개"""
+
+
+# ===== Supabase =====
+
+def _keyset_before(query, cursor: tuple[str, str] | None, key_column: str):
+    """
+    (created_at, key_column) 내림차순 기준으로 커서 이전 행만 남김.
+    created_at < c OR (created_at = c AND key < k) → (user_id, created_at desc) 인덱스 범위 조회
+    """
+    if not cursor:
+        return query
+    created_at, key = cursor
+    return query.or_(
+        f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",{key_column}.lt."{key}")'
+    )
+
+
+class SupabaseTranscriptionRepository(TranscriptionRepository):
+    def __init__(self, client):
+        self.client = client
+        # sql/transcriptions_task_id_unique.sql 적용 전이면 upsert 대상 제약이 없어 insert 로 대체
+        self._upsert_ready = True
+
+    def has_column(self, column: str) -> bool:
+        try:
+            self.client.table("transcriptions").select(column).limit(1).execute()
+            return True
+        except Exception as e:
+            error_text = str(e).lower()
+            if column in error_text and ("column" in error_text or "does not exist" in error_text):
+                return False
+            raise
+
+    def insert(self, row: dict) -> None:
+        self.insert_many([row])
+
+    def insert_many(self, rows: list[dict]) -> None:
+        # PostgREST 일괄 upsert 는 행마다 같은 컬럼이어야 해서 컬럼 구성별로 묶어 보냄
+        groups: dict[tuple, list[dict]] = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+        for group in groups.values():
+            self._upsert(group)
+
+    def _upsert(self, rows: list[dict]) -> None:
+        if self._upsert_ready:
+            try:
+                self.client.table("transcriptions").upsert(rows, on_conflict="task_id").execute()
+                return
+            except Exception as e:
+                error_text = str(e)
+                if "42P10" not in error_text and "no unique or exclusion constraint" not in error_text:
+                    raise
+                self._upsert_ready = False
+                tracing.log(
+                    "transcriptions.task_id unique index missing, saving with plain insert "
+                    "(run sql/transcriptions_task_id_unique.sql)",
+                    level="warning",
+                )
+        self.client.table("transcriptions").insert(rows).execute()
+
+    def delete(self, task_id: str, user_id: str) -> None:
+        self.client.table("transcriptions").delete().eq("task_id", task_id).eq("user_id", user_id).execute()
+
+    def get(self, task_id: str, user_id: str, columns: str = "*") -> dict | None:
+        response = (
+            self.client.table("transcriptions")
+            .select(columns)
+            .eq("task_id", task_id)
+            .eq("user_id", user_id)
+            .limit(1)
+            .execute()
+        )
+        return response.data[0] if response.data else None
+
+    def list_for_user(
+        self, user_id: str, columns: str, limit: int, cursor: tuple[str, str] | None = None
+    ) -> list[dict]:
+        query = self.client.table("transcriptions").select(columns).eq("user_id", user_id)
+        response = (
+            _keyset_before(query, cursor, "task_id")
+            .order("created_at", desc=True)
+            .order("task_id", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return response.data or []
+
+
+class SupabaseRecordRepository(RecordRepository):
+    def __init__(self, client):
+        self.client = client
+
+    def insert(self, row: dict) -> dict:
+        response = self.client.table("saved_records").insert(row).execute()
+        return response.data[0] if response.data else row
+
+    def get(self, record_id: int, user_id: str, columns: str = "*") -> dict | None:
+        response = (
+            self.client.table("saved_records")
+            .select(columns)
+            .eq("id", record_id)
+            .eq("user_id", user_id)
+            .limit(1)
+            .execute()
+        )
+        return response.data[0] if response.data else None
+
+    def list_for_user(
+        self,
+        user_id: str,
+        columns: str,
+        limit: int,
+        cursor: tuple[str, str] | None = None,
+        category: str | None = None,
+    ) -> list[dict]:
+        query = self.client.table("saved_records").select(columns).eq("user_id", user_id)
+        if category:
+            query = query.eq("category", category)
+        response = (
+            _keyset_before(query, cursor, "id")
+            .order("created_at", desc=True)
+            .order("id", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return response.data or []
+
+
+# ===== SQLite =====
+
+class _SQLiteDatabase:
+    """로컬 대체 DB. 스레드별 연결, WAL (같은 파일을 쓰는 API/워커 프로세스가 함께 사용)"""
+
+    def __init__(self, db_path: str = REPOSITORY_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.connect().executescript(
+            """
+            create table if not exists transcriptions (
+              task_id text not null,
+              user_id text,
+              status text,
+              error text,
+              created_at text not null,
+              language text,
+              raw_text text,
+              corrected_text text,
+              characters integer,
+              darakbang_optimized integer,
+              engine text,
+              transcription_type text,
+              summary_preview text,
+              text_blobs text
+            );
+            create index if not exists idx_transcriptions_user_id_created_at
+              on transcriptions (user_id, created_at desc, task_id desc);
+            create index if not exists idx_transcriptions_task_user
+              on transcriptions (task_id, user_id);
+
+            create table if not exists saved_records (
+              id integer primary key autoincrement,
+              user_id text not null,
+              category text not null,
+              title text not null,
+              content text not null,
+              task_id text,
+              source_type text,
+              created_at text not null
+            );
+            create index if not exists idx_saved_records_user_id_created_at
+              on saved_records (user_id, created_at desc, id desc);
+            create index if not exists idx_saved_records_user_category_created_at
+              on saved_records (user_id, category, created_at desc, id desc);
+            """
+        )
+        self._ensure_task_id_unique()
+
+    def _ensure_task_id_unique(self) -> None:
+        """task_id 고유 인덱스 (upsert 대상). 예전 DB에 중복 행이 있으면 마지막 행만 남기고 생성"""
+        conn = self.connect()
+        exists = conn.execute(
+            "select 1 from sqlite_master where type = 'index' and name = 'idx_transcriptions_task_id_unique'"
+        ).fetchone()
+        if exists:
+            return
+        conn.execute("begin immediate")
+        try:
+            conn.execute(
+                "delete from transcriptions where rowid not in (select max(rowid) from transcriptions group by task_id)"
+            )
+            conn.execute(
+                "create unique index if not exists idx_transcriptions_task_id_unique on transcriptions (task_id)"
+            )
+            conn.execute("commit")
+        except Exception:
+            conn.execute("rollback")
+            raise
+
+    def connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+def _decode_row(row: sqlite3.Row) -> dict:
+    record = dict(row)
+    for column in JSON_COLUMNS & record.keys():
+        record[column] = json.loads(record[column]) if record[column] else None
+    if record.get("darakbang_optimized") is not None:
+        record["darakbang_optimized"] = bool(record["darakbang_optimized"])
+    return record
+
+
+def _encode_row(row: dict) -> dict:
+    return {
+        column: (json.dumps(value, ensure_ascii=False) if column in JSON_COLUMNS and value is not None else value)
+        for column, value in row.items()
+    }
+
+
+class SQLiteTranscriptionRepository(TranscriptionRepository):
+    def __init__(self, database: _SQLiteDatabase):
+        self.database = database
+
+    def has_column(self, column: str) -> bool:
+        return column in TRANSCRIPTION_COLUMNS
+
+    def insert(self, row: dict) -> None:
+        self.insert_many([row])
+
+    def insert_many(self, rows: list[dict]) -> None:
+        conn = self.database.connect()
+        conn.execute("begin")
+        try:
+            for row in rows:
+                values = _encode_row({column: row[column] for column in parse_columns(", ".join(row), TRANSCRIPTION_COLUMNS)})
+                placeholders = ", ".join("?" for _ in values)
+                updates = ", ".join(f"{column} = excluded.{column}" for column in values if column != "task_id")
+                conflict = f"do update set {updates}" if updates else "do nothing"
+                conn.execute(
+                    f"insert into transcriptions ({', '.join(values)}) values ({placeholders}) "
+                    f"on conflict (task_id) {conflict}",
+                    tuple(values.values()),
+                )
+            conn.execute("commit")
+        except Exception:
+            conn.execute("rollback")
+            raise
+
+    def delete(self, task_id: str, user_id: str) -> None:
+        self.database.connect().execute(
+            "delete from transcriptions where task_id = ? and user_id = ?", (task_id, user_id)
+        )
+
+    def get(self, task_id: str, user_id: str, columns: str = "*") -> dict | None:
+        names = parse_columns(columns, TRANSCRIPTION_COLUMNS)
+        row = self.database.connect().execute(
+            f"select {', '.join(names)} from transcriptions where task_id = ? and user_id = ? limit 1",
+            (task_id, user_id),
+        ).fetchone()
+        return _decode_row(row) if row else None
+
+    def list_for_user(
+        self, user_id: str, columns: str, limit: int, cursor: tuple[str, str] | None = None
+    ) -> list[dict]:
+        names = parse_columns(columns, TRANSCRIPTION_COLUMNS)
+        sql = f"select {', '.join(names)} from transcriptions where user_id = ?"
+        params: list = [user_id]
+        if cursor:
+            sql += " and (created_at < ? or (created_at = ? and task_id < ?))"
+            params += [cursor[0], cursor[0], cursor[1]]
+        sql += " order by created_at desc, task_id desc limit ?"
+        rows = self.database.connect().execute(sql, (*params, limit)).fetchall()
+        return [_decode_row(row) for row in rows]
+
+
+class SQLiteRecordRepository(RecordRepository):
+    def __init__(self, database: _SQLiteDatabase):
+        self.database = database
+
+    def insert(self, row: dict) -> dict:
+        values = {column: row[column] for column in parse_columns(", ".join(row), RECORD_COLUMNS) if column != "id"}
+        placeholders = ", ".join("?" for _ in values)
+        cursor = self.database.connect().execute(
+            f"insert into saved_records ({', '.join(values)}) values ({placeholders})",
+            tuple(values.values()),
+        )
+        return {"id": cursor.lastrowid, **values}
+
+    def get(self, record_id: int, user_id: str, columns: str = "*") -> dict | None:
+        names = parse_columns(columns, RECORD_COLUMNS)
+        row = self.database.connect().execute(
+            f"select {', '.join(names)} from saved_records where id = ? and user_id = ? limit 1",
+            (record_id, user_id),
+        ).fetchone()
+        return _decode_row(row) if row else None
+
+    def list_for_user(
+        self,
+        user_id: str,
+        columns: str,
+        limit: int,
+        cursor: tuple[str, str] | None = None,
+        category: str | None = None,
+    ) -> list[dict]:
+        names = parse_columns(columns, RECORD_COLUMNS)
+        sql = f"select {', '.join(names)} from saved_records where user_id = ?"
+        params: list = [user_id]
+        if category:
+            sql += " and category = ?"
+            params.append(category)
+        if cursor:
+            sql += " and (created_at < ? or (created_at = ? and id < ?))"
+            params += [cursor[0], cursor[0], int(cursor[1])]
+        sql += " order by created_at desc, id desc limit ?"
+        rows = self.database.connect().execute(sql, (*params, limit)).fetchall()
+        return [_decode_row(row) for row in rows]
+
+
+# ===== 읽기 캐시 =====
+
+class _ReadThroughCache:
+    """
+    단건: 키 → 행 (없는 행은 캐시하지 않음 - 곧 저장될 수 있으므로)
+    목록: 사용자별 세대 번호를 키에 넣어, 그 사용자의 쓰기가 있으면 이전 목록은 더 이상 조회되지 않게 함
+    """
+
+    def __init__(self, name: str, ttl: float, max_entries: int):
+        self.name = name
+        self._entries = TaskRegistry(name, max_entries=max_entries, ttl=ttl)
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self, user_id: str) -> int:
+        return self._generations.get(user_id, 0)
+
+    def bump(self, user_id: str) -> None:
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def get_or_load(self, key: str, load, cache_empty: bool = True, ttl: float | None = None):
+        value = self._entries.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = load()
+        if value is not None or cache_empty:
+            self._entries.set(key, value, ttl=ttl)
+        return value
+
+    def metrics(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class CachedTranscriptionRepository(TranscriptionRepository):
+    """읽기는 캐시를 거쳐 백엔드로, 쓰기는 그대로 백엔드에 반영하고 해당 사용자 목록 무효화"""
+
+    def __init__(self, backend: TranscriptionRepository, ttl: float = REPOSITORY_CACHE_TTL,
+                 max_entries: int = REPOSITORY_CACHE_MAX_ENTRIES):
+        self.backend = backend
+        self.cache = _ReadThroughCache("transcriptions_cache", ttl, max_entries)
+
+    def has_column(self, column: str) -> bool:
+        return self.backend.has_column(column)
+
+    def insert(self, row: dict) -> None:
+        self.backend.insert(row)
+        if row.get("user_id"):
+            self.cache.bump(row["user_id"])
+
+    def insert_many(self, rows: list[dict]) -> None:
+        self.backend.insert_many(rows)
+        for user_id in {row.get("user_id") for row in rows} - {None}:
+            self.cache.bump(user_id)
+
+    def delete(self, task_id: str, user_id: str) -> None:
+        self.backend.delete(task_id, user_id)
+        self.cache.bump(user_id)
+
+    def get(self, task_id: str, user_id: str, columns: str = "*") -> dict | None:
+        # 세대를 키에 넣어 삭제 후 지난 단건이 남지 않게 함
+        return self.cache.get_or_load(
+            f"get|{self.cache.generation(user_id)}|{task_id}|{user_id}|{columns}",
+            lambda: self.backend.get(task_id, user_id, columns),
+            cache_empty=False,
+        )
+
+    def list_for_user(
+        self, user_id: str, columns: str, limit: int, cursor: tuple[str, str] | None = None
+    ) -> list[dict]:
+        key = f"list|{user_id}|{self.cache.generation(user_id)}|{columns}|{limit}|{cursor}"
+        return self.cache.get_or_load(
+            key, lambda: self.backend.list_for_user(user_id, columns, limit, cursor), ttl=REPOSITORY_LIST_CACHE_TTL
+        )
+
+
+class CachedRecordRepository(RecordRepository):
+    def __init__(self, backend: RecordRepository, ttl: float = REPOSITORY_CACHE_TTL,
+                 max_entries: int = REPOSITORY_CACHE_MAX_ENTRIES):
+        self.backend = backend
+        self.cache = _ReadThroughCache("saved_records_cache", ttl, max_entries)
+
+    def insert(self, row: dict) -> dict:
+        saved = self.backend.insert(row)
+        self.cache.bump(row["user_id"])
+        return saved
+
+    def get(self, record_id: int, user_id: str, columns: str = "*") -> dict | None:
+        return self.cache.get_or_load(
+            f"get|{record_id}|{user_id}|{columns}",
+            lambda: self.backend.get(record_id, user_id, columns),
+            cache_empty=False,
+        )
+
+    def list_for_user(
+        self,
+        user_id: str,
+        columns: str,
+        limit: int,
+        cursor: tuple[str, str] | None = None,
+        category: str | None = None,
+    ) -> list[dict]:
+        key = f"list|{user_id}|{self.cache.generation(user_id)}|{columns}|{limit}|{cursor}|{category}"
+        return self.cache.get_or_load(
+            key,
+            lambda: self.backend.list_for_user(user_id, columns, limit, cursor, category),
+            ttl=REPOSITORY_LIST_CACHE_TTL,
+        )
+
+
+def repository_metrics(*repositories) -> dict:
+    """/health 용: 백엔드 종류 + 읽기 캐시 적중/실패 횟수"""
+    return {
+        "backend": REPOSITORY_BACKEND,
+        "cache": {
+            repository.cache.name: repository.cache.metrics()
+            for repository in repositories
+            if hasattr(repository, "cache")
+        },
+    }
+
+
+def create_repositories(
+    backend: str = REPOSITORY_BACKEND, supabase_client=None, write_behind: bool = False
+) -> tuple[TranscriptionRepository, RecordRepository]:
+    """
+    환경 설정에 맞는 (변환 기록, 저장 기록본) 저장소 생성 (읽기 캐시 포함).
+    write_behind 이면 변환 기록 저장은 로컬 저널을 거쳐 일괄 반영 (write_behind.py)
+    """
+    if backend == "supabase":
+        transcriptions: TranscriptionRepository = SupabaseTranscriptionRepository(supabase_client)
+        records: RecordRepository = SupabaseRecordRepository(supabase_client)
+    elif backend == "sqlite":
+        database = _SQLiteDatabase()
+        transcriptions = SQLiteTranscriptionRepository(database)
+        records = SQLiteRecordRepository(database)
+    else:
+        raise ValueError(f"Unknown REPOSITORY_BACKEND: {backend}")
+
+    if write_behind:
+        from write_behind import WriteBehindTranscriptionRepository  # write_behind 가 이 모듈을 import
+
+        transcriptions = WriteBehindTranscriptionRepository(transcriptions)
+
+    if REPOSITORY_CACHE_TTL > 0:
+        return CachedTranscriptionRepository(transcriptions), CachedRecordRepository(records)
+    return transcriptions, records
@@ -0,0 +1,152 @@
+"""
+작업 스케줄러 - 입장 제어(admission control) + 사용자 간 공정 스케줄링
+
+- 전체 동시 실행 상한 (MAX_CONCURRENT_JOBS)
+- 사용자별 동시 실행 상한 (MAX_JOBS_PER_USER)
+- 사용자 간 가중 공정 큐잉(WFQ): 사용자마다 가상 시간(처리한 오디오 길이 / 가중치)을 두고 가상 종료 시각이 이른 작업부터
+- 같은 사용자 안에서는 짧은 작업 우선(SJF, 업로드 시 측정한 오디오 길이 기준)
+- 대기 순번·예상 시작 시각 추정 (/api/status)
+"""
+
+import heapq
+import os
+import time
+
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "4"))
+MAX_JOBS_PER_USER = int(os.getenv("MAX_JOBS_PER_USER", "1"))
+# 처리 시간 추정: 오디오 1초당 처리 초 (완료 이력이 없을 때 기본값) + 작업당 고정 오버헤드
+DEFAULT_SECONDS_PER_AUDIO_SECOND = float(os.getenv("DEFAULT_SECONDS_PER_AUDIO_SECOND", "0.15"))
+JOB_OVERHEAD_SECONDS = float(os.getenv("JOB_OVERHEAD_SECONDS", "20"))
+DEFAULT_AUDIO_SECONDS = 30 * 60  # 길이 측정 실패 시 가정 (30분 설교)
+
+
+def _parse_user_weights(raw: str) -> dict[str, float]:
+    """SCHEDULER_USER_WEIGHTS="user_id:2,other_id:0.5" → {user_id: 2.0, ...}"""
+    weights = {}
+    for item in (raw or "").split(","):
+        if ":" not in item:
+            continue
+        user_id, weight = item.rsplit(":", 1)
+        try:
+            weights[user_id.strip()] = max(float(weight), 0.01)
+        except ValueError:
+            continue
+    return weights
+
+
+USER_WEIGHTS = _parse_user_weights(os.getenv("SCHEDULER_USER_WEIGHTS", ""))
+
+
+def probe_audio_duration(file_path: str) -> float:
+    """오디오 길이(초) 측정. ffprobe 실패 시 파일 크기로 추정 (128kbps 가정)"""
+    try:
+        from pydub.utils import mediainfo
+
+        duration = float(mediainfo(file_path).get("duration") or 0)
+        if duration > 0:
+            return duration
+    except Exception:
+        pass
+    size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+    return size / (128 * 1024 / 8) if size else float(DEFAULT_AUDIO_SECONDS)
+
+
+class FairScheduler:
+    def __init__(
+        self,
+        max_concurrent: int = MAX_CONCURRENT_JOBS,
+        max_per_user: int = MAX_JOBS_PER_USER,
+        user_weights: dict[str, float] | None = None,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.user_weights = USER_WEIGHTS if user_weights is None else user_weights
+
+    def weight(self, user_id: str) -> float:
+        return self.user_weights.get(user_id, 1.0)
+
+    def cost(self, job: dict) -> float:
+        """가상 시간 증가량 = 오디오 길이 / 사용자 가중치"""
+        return (job.get("duration_seconds") or DEFAULT_AUDIO_SECONDS) / self.weight(job["user_id"])
+
+    def has_capacity(self, running_total: int) -> bool:
+        return running_total < self.max_concurrent
+
+    def pick(self, candidates: list[dict], running_by_user: dict[str, int], vtimes: dict[str, float]) -> dict | None:
+        """
+        다음 실행 작업 선택.
+        사용자 상한에 걸리지 않은 사용자별로 가장 짧은 작업을 고른 뒤,
+        가상 종료 시각(사용자 가상 시간 + 작업 비용)이 가장 이른 작업을 선택한다.
+        """
+        shortest_by_user: dict[str, dict] = {}
+        for job in candidates:
+            user_id = job["user_id"]
+            if running_by_user.get(user_id, 0) >= self.max_per_user:
+                continue
+            best = shortest_by_user.get(user_id)
+            key = (job.get("duration_seconds") or DEFAULT_AUDIO_SECONDS, job["created_at"])
+            if best is None or key < (best.get("duration_seconds") or DEFAULT_AUDIO_SECONDS, best["created_at"]):
+                shortest_by_user[user_id] = job
+
+        if not shortest_by_user:
+            return None
+        return min(
+            shortest_by_user.values(),
+            key=lambda job: (vtimes.get(job["user_id"], 0.0) + self.cost(job), job["created_at"]),
+        )
+
+    def estimate_runtime(self, job: dict, seconds_per_audio_second: float | None) -> float:
+        rate = seconds_per_audio_second or DEFAULT_SECONDS_PER_AUDIO_SECOND
+        return (job.get("duration_seconds") or DEFAULT_AUDIO_SECONDS) * rate + JOB_OVERHEAD_SECONDS
+
+    def simulate(
+        self,
+        queued: list[dict],
+        running: list[dict],
+        vtimes: dict[str, float],
+        seconds_per_audio_second: float | None = None,
+        now: float | None = None,
+    ) -> dict[str, dict]:
+        """
+        현재 대기열을 스케줄링 정책대로 모의 실행해 작업별 대기 순번과 예상 시작 시각(epoch 초) 계산.
+        running 항목은 started_at 기준으로 남은 시간을 추정한다.
+        """
+        now = now or time.time()
+        vtimes = dict(vtimes)
+        # (예상 종료 시각, user_id) 힙
+        in_flight: list[tuple[float, str]] = []
+        running_by_user: dict[str, int] = {}
+        for job in running:
+            started = job.get("started_at") or now
+            end = max(now, started + self.estimate_runtime(job, seconds_per_audio_second))
+            heapq.heappush(in_flight, (end, job["user_id"]))
+            running_by_user[job["user_id"]] = running_by_user.get(job["user_id"], 0) + 1
+
+        pending = list(queued)
+        estimates: dict[str, dict] = {}
+        clock = now
+        position = 0
+        while pending:
+            # 슬롯이 비거나 사용자 상한이 풀릴 때까지 시간을 진행
+            while in_flight and (len(in_flight) >= self.max_concurrent or in_flight[0][0] <= clock):
+                end, user_id = heapq.heappop(in_flight)
+                clock = max(clock, end)
+                running_by_user[user_id] -= 1
+
+            job = self.pick(pending, running_by_user, vtimes)
+            if job is None:
+                if not in_flight:
+                    break
+                end, user_id = heapq.heappop(in_flight)
+                clock = max(clock, end)
+                running_by_user[user_id] -= 1
+                continue
+
+            position += 1
+            estimates[job["task_id"]] = {"queue_position": position, "estimated_start_at": clock}
+            vtimes[job["user_id"]] = vtimes.get(job["user_id"], 0.0) + self.cost(job)
+            running_by_user[job["user_id"]] = running_by_user.get(job["user_id"], 0) + 1
+            heapq.heappush(in_flight, (clock + self.estimate_runtime(job, seconds_per_audio_second), job["user_id"]))
+            pending.remove(job)
+
+        return estimates
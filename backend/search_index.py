@@ -0,0 +1,220 @@
+"""
+녹취 전문 검색 인덱스 - 사용자별 변환 기록에서 "7이정표", 약 이름 같은 단어를 찾는 로컬 역색인 (SQLite FTS5)
+
+- 한국어 대응 토큰화: 한글/영문/숫자 연속 구간을 글자 2-gram 으로 나눔 ("7이정표" → 7이 이정 정표)
+  → 조사·어미가 붙어도(이정표를, 이정표와) 부분 문자열로 찾히고, 형태소 분석기가 필요 없다
+- 검색어의 각 단어는 끝 조사를 뗀 뒤 2-gram 구문(phrase)으로, 단어끼리는 AND. 순위는 FTS5 bm25
+- 사용자 구분은 owner 토큰(사용자 id 해시) 컬럼으로 같은 인덱스 안에서 거름
+- 변환 완료 때마다 추가, 기존 기록은 사용자가 처음 검색할 때 한 번 채움(backfill)
+
+테스트: python -m pytest -q tests/test_search_index.py
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+
+SEARCH_INDEX_DB_PATH = os.getenv("SEARCH_INDEX_DB_PATH") or os.path.join(tempfile.gettempdir(), "mallog24_search.db")
+SEARCH_SNIPPET_CHARS = 120
+SEARCH_MAX_RESULTS = 50
+
+# 한글(음절/자모), 영문, 숫자 연속 구간
+_WORD_RE = re.compile(r"[0-9A-Za-zᄀ-ᇿ㄰-㆏가-힣]+")
+
+
+# 검색어 끝에 붙은 조사 (긴 것부터). 색인 쪽은 부분 문자열로 찾으므로 검색어에서만 뗀다
+_PARTICLES = ("에서는", "으로는", "에게서", "에서", "에게", "으로", "까지", "부터", "처럼", "보다",
+              "을", "를", "이", "가", "은", "는", "에", "의", "와", "과", "로", "도", "만")
+
+
+def _runs(text: str) -> list[str]:
+    return _WORD_RE.findall((text or "").lower())
+
+
+def _strip_particle(word: str) -> str:
+    for particle in _PARTICLES:
+        if word.endswith(particle) and len(word) - len(particle) >= 2:
+            return word[: -len(particle)]
+    return word
+
+
+def _query_words(query: str) -> list[str]:
+    return [word for word in (_strip_particle(run) for run in _runs(query)) if len(word) >= 2]
+
+
+def _bigrams(run: str) -> list[str]:
+    if len(run) < 2:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def tokenize(text: str) -> str:
+    """색인용: 구간마다 2-gram 을 공백으로 이어 붙임 (FTS5 unicode61 이 그대로 토큰으로 나눔)"""
+    return " ".join(" ".join(_bigrams(run)) for run in _runs(text))
+
+
+def build_match_query(query: str) -> str | None:
+    """검색어 → FTS5 MATCH 식. 끝 조사를 떼고 2글자 미만 단어는 버림 (남는 단어가 없으면 None)"""
+    phrases = [f'"{" ".join(_bigrams(word))}"' for word in _query_words(query)]
+    if not phrases:
+        return None
+    return "body_tokens : (" + " AND ".join(phrases) + ")"
+
+
+def _owner_token(user_id: str) -> str:
+    return "u" + hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:20]
+
+
+def make_snippet(text: str, query: str, width: int = SEARCH_SNIPPET_CHARS) -> dict:
+    """첫 일치 위치 주변 발췌. highlights 는 발췌문 안의 [시작, 끝) 위치"""
+    lowered = text.lower()
+    words = _query_words(query)
+    positions = [(lowered.find(word), word) for word in words]
+    positions = [(index, word) for index, word in positions if index >= 0]
+    if not positions:
+        return {"snippet": text[:width], "offset": 0, "highlights": []}
+
+    first, _ = min(positions)
+    start = max(0, first - width // 3)
+    end = min(len(text), start + width)
+    window = lowered[start:end]
+    highlights = []
+    for word in words:
+        index = window.find(word)
+        while index >= 0:
+            highlights.append([index, index + len(word)])
+            index = window.find(word, index + len(word))
+    highlights.sort()
+    return {"snippet": text[start:end], "offset": start, "highlights": highlights}
+
+
+class SearchIndex:
+    """SQLite FTS5 역색인. 같은 DB 파일을 쓰는 API/워커 프로세스가 함께 갱신"""
+
+    def __init__(self, db_path: str = SEARCH_INDEX_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._connect().executescript(
+            """
+            create virtual table if not exists search_docs using fts5(
+              owner,
+              body_tokens,
+              task_id unindexed,
+              created_at unindexed,
+              transcription_type unindexed,
+              body unindexed,
+              tokenize = 'unicode61 remove_diacritics 0'
+            );
+            -- task_id → FTS 행 번호 (교체/중복 확인을 전체 검색 없이)
+            create table if not exists search_doc_ids (
+              task_id text primary key,
+              user_id text not null,
+              doc_rowid integer not null
+            );
+            create index if not exists idx_search_doc_ids_user on search_doc_ids (user_id);
+            create table if not exists search_backfilled (
+              user_id text primary key,
+              backfilled_at text not null default current_timestamp
+            );
+            """
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, task_id: str, user_id: str, created_at: str, transcription_type: str | None, text: str) -> None:
+        """녹취 하나 색인 (같은 task_id 가 있으면 교체)"""
+        tokens = tokenize(text)
+        conn = self._connect()
+        conn.execute("begin immediate")
+        try:
+            previous = conn.execute("select doc_rowid from search_doc_ids where task_id = ?", (task_id,)).fetchone()
+            if previous:
+                conn.execute("delete from search_docs where rowid = ?", (previous["doc_rowid"],))
+            cursor = conn.execute(
+                """
+                insert into search_docs (owner, body_tokens, task_id, created_at, transcription_type, body)
+                values (?, ?, ?, ?, ?, ?)
+                """,
+                (_owner_token(user_id), tokens, task_id, created_at, transcription_type, text),
+            )
+            conn.execute(
+                "insert or replace into search_doc_ids (task_id, user_id, doc_rowid) values (?, ?, ?)",
+                (task_id, user_id, cursor.lastrowid),
+            )
+            conn.execute("commit")
+        except Exception:
+            conn.execute("rollback")
+            raise
+
+    def remove(self, task_id: str) -> None:
+        """녹취 하나를 색인에서 제거"""
+        conn = self._connect()
+        conn.execute("begin immediate")
+        try:
+            previous = conn.execute("select doc_rowid from search_doc_ids where task_id = ?", (task_id,)).fetchone()
+            if previous:
+                conn.execute("delete from search_docs where rowid = ?", (previous["doc_rowid"],))
+                conn.execute("delete from search_doc_ids where task_id = ?", (task_id,))
+            conn.execute("commit")
+        except Exception:
+            conn.execute("rollback")
+            raise
+
+    def is_backfilled(self, user_id: str) -> bool:
+        row = self._connect().execute("select 1 from search_backfilled where user_id = ?", (user_id,)).fetchone()
+        return row is not None
+
+    def mark_backfilled(self, user_id: str) -> None:
+        self._connect().execute("insert or ignore into search_backfilled (user_id) values (?)", (user_id,))
+
+    def indexed_task_ids(self, user_id: str) -> set[str]:
+        rows = self._connect().execute(
+            "select task_id from search_doc_ids where user_id = ?", (user_id,)
+        ).fetchall()
+        return {row["task_id"] for row in rows}
+
+    def metrics(self) -> dict:
+        conn = self._connect()
+        return {
+            "documents": conn.execute("select count(*) from search_doc_ids").fetchone()[0],
+            "backfilled_users": conn.execute("select count(*) from search_backfilled").fetchone()[0],
+        }
+
+    def search(self, user_id: str, query: str, limit: int = 20) -> list[dict]:
+        """bm25 순위 상위 limit 개. 검색어가 너무 짧으면 ValueError"""
+        match = build_match_query(query)
+        if match is None:
+            raise ValueError("검색어는 2글자 이상이어야 합니다.")
+        rows = self._connect().execute(
+            f"""
+            select task_id, created_at, transcription_type, body, bm25(search_docs) as rank
+            from search_docs
+            where search_docs match ?
+            order by rank
+            limit ?
+            """,
+            (f'owner : "{_owner_token(user_id)}" AND {match}', min(limit, SEARCH_MAX_RESULTS)),
+        ).fetchall()
+        return [
+            {
+                "task_id": row["task_id"],
+                "created_at": row["created_at"],
+                "transcription_type": row["transcription_type"],
+                "score": round(-row["rank"], 4),
+                **make_snippet(row["body"], query),
+            }
+            for row in rows
+        ]
+
@@ -0,0 +1,553 @@
+"""
+녹취 의미 검색 - "고난 중의 기도" 처럼 단어가 아닌 주제로 예전 설교 문단을 찾는 로컬 임베딩 인덱스 (CPU 전용)
+
+- 완료된 녹취(corrected_text)를 문단 단위 구간(passage)으로 나눠 임베딩
+  (fastembed ONNX 다국어 모델, SEMANTIC_SEARCH_ENABLED=1 이고 패키지가 있을 때만)
+- 벡터는 float16 으로 한 파일(vectors.f16)에 이어 붙이고 memmap 으로 읽음 → 384차원 문단 하나 768바이트
+- 구간 메타데이터(task_id, 원문 글자 위치)는 SQLite, 벡터 행 번호로 연결
+- 근사 최근접 탐색(IVF): 벡터가 IVF_MIN_ROWS 이상 쌓이면 k-means 중심점으로 목록을 나누고
+  검색 때는 질의와 가까운 목록 IVF_NPROBE 개만 비교. 사용자 구간이 적으면 전부 비교(정확 탐색)
+
+벤치마크 (fastembed 가 없으면 글자 2-gram 해싱 인코더로 인덱스 자체만 측정):
+    python semantic_index.py [녹취 수]
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+
+import numpy as np
+
+import tracing
+
+try:
+    from fastembed import TextEmbedding
+except ImportError:  # fastembed 미설치 시 의미 검색 비활성
+    TextEmbedding = None
+
+SEMANTIC_SEARCH_ENABLED = os.getenv("SEMANTIC_SEARCH_ENABLED", "0") == "1"
+SEMANTIC_MODEL = os.getenv("SEMANTIC_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+SEMANTIC_INDEX_DIR = os.getenv("SEMANTIC_INDEX_DIR") or os.path.join(tempfile.gettempdir(), "mallog24_semantic")
+# 근사 탐색: 전체 벡터가 이 수 이상이면 IVF 목록을 만들고, 검색 때 가까운 목록 IVF_NPROBE 개만 비교
+IVF_MIN_ROWS = int(os.getenv("SEMANTIC_IVF_MIN_ROWS", "4096"))
+IVF_NPROBE = int(os.getenv("SEMANTIC_IVF_NPROBE", "8"))
+# 사용자 구간이 이 수 이하이면 IVF 없이 전부 비교
+EXACT_SCAN_MAX_ROWS = 8192
+IVF_TRAIN_SAMPLE = 20000
+IVF_TRAIN_ITERATIONS = 12
+# 벡터가 마지막 학습 때의 이 배수만큼 늘면 중심점 다시 학습
+IVF_RETRAIN_GROWTH = 4
+PASSAGE_MIN_CHARS = 80
+PASSAGE_MAX_CHARS = 600
+EMBED_BATCH_SIZE = 32
+SEMANTIC_MAX_RESULTS = 50
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?。])\s+|(?<=다\.)|\n")
+
+
+# ===== 문단 나누기 =====
+
+def _sentence_spans(text: str, start: int, end: int) -> list[tuple[int, int]]:
+    spans = []
+    position = start
+    for match in _SENTENCE_END_RE.finditer(text, start, end):
+        if match.end() > position:
+            spans.append((position, match.end()))
+            position = match.end()
+    if position < end:
+        spans.append((position, end))
+    return spans
+
+
+def split_passages(text: str, min_chars: int = PASSAGE_MIN_CHARS, max_chars: int = PASSAGE_MAX_CHARS) -> list[tuple[int, int]]:
+    """
+    본문 → 구간 [시작, 끝) 글자 위치 목록.
+    빈 줄로 나뉜 문단을 기본 단위로, 짧은 문단은 이웃 문단과 합치고 긴 문단은 문장 경계에서 자름
+    """
+    paragraphs = []
+    position = 0
+    for match in re.finditer(r"\n\s*\n", text):
+        paragraphs.append((position, match.start()))
+        position = match.end()
+    paragraphs.append((position, len(text)))
+
+    pieces = []
+    for start, end in paragraphs:
+        if end - start <= max_chars:
+            pieces.append((start, end))
+            continue
+        chunk_start = chunk_end = start
+        for sentence_start, sentence_end in _sentence_spans(text, start, end):
+            if sentence_end - chunk_start > max_chars and chunk_end > chunk_start:
+                pieces.append((chunk_start, chunk_end))
+                chunk_start = sentence_start
+            chunk_end = sentence_end
+            # 문장 경계가 없는 아주 긴 구간
+            while chunk_end - chunk_start > max_chars:
+                pieces.append((chunk_start, chunk_start + max_chars))
+                chunk_start += max_chars
+        if chunk_end > chunk_start:
+            pieces.append((chunk_start, chunk_end))
+
+    passages = []
+    for start, end in pieces:
+        # 앞뒤 공백 제외
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start >= end:
+            continue
+        if (
+            passages
+            and (end - start < min_chars or passages[-1][1] - passages[-1][0] < min_chars)
+            and end - passages[-1][0] <= max_chars
+        ):
+            passages[-1] = (passages[-1][0], end)
+        else:
+            passages.append((start, end))
+    return passages
+
+
+# ===== 인코더 =====
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class FastEmbedEncoder:
+    """fastembed (ONNX Runtime, CPU) 문장 임베딩. 모델은 첫 사용 때 내려받아 로드"""
+
+    def __init__(self, model_name: str = SEMANTIC_MODEL):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                tracing.log(f"Loading embedding model: {self.model_name}")
+                self._model = TextEmbedding(self.model_name)
+            return self._model
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        vectors = np.array(list(self._get_model().embed(texts, batch_size=EMBED_BATCH_SIZE)), dtype=np.float32)
+        return _normalize(vectors)
+
+
+class HashingEncoder:
+    """글자 2-gram 특징 해싱 (모델 없이 인덱스 벤치마크용 - 의미가 아닌 표면 유사도)"""
+
+    def __init__(self, dim: int = 384):
+        self.model_name = f"hashing-{dim}"
+        self.dim = dim
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for i in range(len(text) - 1):
+                digest = hashlib.blake2b(text[i:i + 2].encode("utf-8"), digest_size=4).digest()
+                bucket = int.from_bytes(digest, "little")
+                vectors[row, bucket % self.dim] += 1.0 if bucket & 0x80000000 else -1.0
+        return _normalize(vectors)
+
+
+def create_encoder():
+    """설정과 패키지가 모두 있을 때만 인코더, 아니면 None"""
+    if not SEMANTIC_SEARCH_ENABLED:
+        return None
+    if TextEmbedding is None:
+        tracing.log("SEMANTIC_SEARCH_ENABLED=1 but fastembed is not installed. Semantic search disabled.", level="warning")
+        return None
+    return FastEmbedEncoder()
+
+
+# ===== 인덱스 =====
+
+def _kmeans(vectors: np.ndarray, k: int, iterations: int, seed: int = 7) -> np.ndarray:
+    """정규화 벡터 구면 k-means (내적 기준) → 정규화 중심점"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        labels = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        empty = np.linalg.norm(sums, axis=1) == 0
+        # 빈 목록은 임의 벡터로 다시 시작
+        sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()), replace=False)]
+        centroids = _normalize(sums)
+    return centroids
+
+
+class SemanticIndex:
+    """
+    float16 벡터 파일 + SQLite 메타데이터. 쓰기는 SQLite 쓰기 잠금 안에서 하므로
+    같은 디렉터리를 쓰는 API/워커 프로세스가 함께 추가해도 행 번호가 겹치지 않는다
+    """
+
+    def __init__(self, encoder, index_dir: str = SEMANTIC_INDEX_DIR):
+        self.encoder = encoder
+        self.index_dir = index_dir
+        os.makedirs(index_dir, exist_ok=True)
+        self.vectors_path = os.path.join(index_dir, "vectors.f16")
+        self.centroids_path = os.path.join(index_dir, "centroids.npy")
+        self.db_path = os.path.join(index_dir, "passages.db")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._centroids = None
+        self._centroids_version = None
+
+        conn = self._connect()
+        conn.executescript(
+            """
+            create table if not exists passages (
+              row integer primary key,
+              user_id text not null,
+              task_id text not null,
+              created_at text,
+              transcription_type text,
+              start integer not null,
+              end integer not null,
+              body text not null,
+              list_id integer not null default -1
+            );
+            create index if not exists idx_passages_user_list on passages (user_id, list_id);
+            create index if not exists idx_passages_task on passages (task_id);
+            create table if not exists semantic_meta (
+              key text primary key,
+              value text not null
+            );
+            """
+        )
+        self._ensure_model_matches(conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _meta(self, conn: sqlite3.Connection, key: str, default: str | None = None) -> str | None:
+        row = conn.execute("select value from semantic_meta where key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def _set_meta(self, conn: sqlite3.Connection, key: str, value) -> None:
+        conn.execute("insert or replace into semantic_meta (key, value) values (?, ?)", (key, str(value)))
+
+    def _ensure_model_matches(self, conn: sqlite3.Connection) -> None:
+        # 다른 모델로 만든 벡터와 섞이지 않도록 모델이 바뀌면 인덱스를 비움
+        model = self._meta(conn, "model")
+        if model == self.encoder.model_name:
+            return
+        if model is not None:
+            tracing.log(f"Semantic index model changed ({model} → {self.encoder.model_name}), resetting index", level="warning")
+        conn.execute("begin immediate")
+        conn.execute("delete from passages")
+        conn.execute("delete from semantic_meta")
+        self._set_meta(conn, "model", self.encoder.model_name)
+        self._set_meta(conn, "rows", 0)
+        conn.execute("commit")
+        for path in (self.vectors_path, self.centroids_path):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    # ----- 벡터 파일 -----
+
+    def _rows(self, conn: sqlite3.Connection) -> int:
+        return int(self._meta(conn, "rows", "0"))
+
+    def _matrix_view(self, rows: int) -> np.ndarray:
+        """커밋된 행 수만큼의 memmap (행이 늘었으면 다시 엶)"""
+        with self._lock:
+            if self._matrix is None or len(self._matrix) < rows:
+                dim = int(self._meta(self._connect(), "dim"))
+                self._matrix = np.memmap(self.vectors_path, dtype=np.float16, mode="r", shape=(rows, dim))
+            return self._matrix[:rows]
+
+    def _load_centroids(self, conn: sqlite3.Connection) -> np.ndarray | None:
+        version = self._meta(conn, "centroids_version")
+        with self._lock:
+            if version != self._centroids_version:
+                self._centroids = np.load(self.centroids_path) if version else None
+                self._centroids_version = version
+            return self._centroids
+
+    # ----- 추가 -----
+
+    def add(
+        self,
+        task_id: str,
+        user_id: str,
+        created_at: str | None,
+        transcription_type: str | None,
+        text: str,
+    ) -> int:
+        """녹취 하나를 구간별로 임베딩해 추가 (같은 task_id 는 교체). 추가한 구간 수 반환"""
+        spans = split_passages(text or "")
+        if not spans:
+            return 0
+        # 임베딩(느림)은 잠금 밖에서
+        vectors = self.encoder.encode([text[start:end] for start, end in spans]).astype(np.float16)
+
+        conn = self._connect()
+        conn.execute("begin immediate")
+        try:
+            dim = self._meta(conn, "dim")
+            if dim is None:
+                self._set_meta(conn, "dim", vectors.shape[1])
+            elif int(dim) != vectors.shape[1]:
+                raise ValueError(f"임베딩 차원이 인덱스와 다릅니다: {vectors.shape[1]} != {dim}")
+            first_row = self._rows(conn)
+            centroids = self._load_centroids(conn)
+            if centroids is not None:
+                list_ids = np.argmax(vectors.astype(np.float32) @ centroids.T, axis=1).tolist()
+            else:
+                list_ids = [-1] * len(spans)
+
+            # 커밋된 행 수 위치에 씀 (이전 쓰기가 커밋 전에 죽었으면 그 자리를 덮어씀)
+            fd = os.open(self.vectors_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                os.pwrite(fd, vectors.tobytes(), first_row * vectors.shape[1] * 2)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+            # 교체 시 이전 벡터 행은 파일에 남지만 메타데이터가 없어 검색되지 않음
+            conn.execute("delete from passages where task_id = ?", (task_id,))
+            conn.executemany(
+                """
+                insert into passages (row, user_id, task_id, created_at, transcription_type, start, end, body, list_id)
+                values (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (first_row + i, user_id, task_id, created_at, transcription_type, start, end, text[start:end], list_ids[i])
+                    for i, (start, end) in enumerate(spans)
+                ],
+            )
+            self._set_meta(conn, "rows", first_row + len(spans))
+            conn.execute("commit")
+        except Exception:
+            conn.execute("rollback")
+            raise
+        self.maybe_train()
+        return len(spans)
+
+    # ----- IVF 학습 -----
+
+    def maybe_train(self, force: bool = False) -> bool:
+        """벡터가 충분히 쌓였거나 크게 늘었으면 중심점을 (다시) 학습하고 전체 행의 목록을 다시 배정"""
+        conn = self._connect()
+        rows = self._rows(conn)
+        trained_rows = int(self._meta(conn, "trained_rows", "0"))
+        if not force and (rows < IVF_MIN_ROWS or (trained_rows and rows < trained_rows * IVF_RETRAIN_GROWTH)):
+            return False
+
+        matrix = self._matrix_view(rows)
+        live_rows = np.array([row["row"] for row in conn.execute("select row from passages")], dtype=np.int64)
+        if len(live_rows) < 2:
+            return False
+        rng = np.random.default_rng(rows)
+        sample = np.sort(rng.choice(live_rows, size=min(IVF_TRAIN_SAMPLE, len(live_rows)), replace=False))
+        k = int(min(max(np.sqrt(len(live_rows)), 2), 1024, len(sample)))
+        centroids = _kmeans(matrix[sample].astype(np.float32), k, IVF_TRAIN_ITERATIONS)
+
+        conn.execute("begin immediate")
+        try:
+            # 학습 중 추가된 행까지 포함해 배정
+            rows = self._rows(conn)
+            matrix = self._matrix_view(rows)
+            live_rows = np.array([row["row"] for row in conn.execute("select row from passages")], dtype=np.int64)
+            updates = []
+            for offset in range(0, len(live_rows), 8192):
+                block = live_rows[offset:offset + 8192]
+                labels = np.argmax(matrix[block].astype(np.float32) @ centroids.T, axis=1)
+                updates.extend(zip(labels.tolist(), block.tolist()))
+            conn.executemany("update passages set list_id = ? where row = ?", updates)
+
+            tmp_path = self.centroids_path + ".tmp.npy"
+            np.save(tmp_path, centroids)
+            os.replace(tmp_path, self.centroids_path)
+            version = int(self._meta(conn, "centroids_version", "0")) + 1
+            self._set_meta(conn, "centroids_version", version)
+            self._set_meta(conn, "trained_rows", rows)
+            conn.execute("commit")
+        except Exception:
+            conn.execute("rollback")
+            raise
+        tracing.log(f"Semantic index: trained {k} IVF lists over {len(live_rows)} passages")
+        return True
+
+    # ----- 검색 -----
+
+    def _candidate_rows(self, conn: sqlite3.Connection, user_id: str, query_vector: np.ndarray, nprobe: int) -> list[int]:
+        count = conn.execute("select count(*) from passages where user_id = ?", (user_id,)).fetchone()[0]
+        centroids = self._load_centroids(conn)
+        if centroids is None or count <= EXACT_SCAN_MAX_ROWS or nprobe <= 0:
+            cursor = conn.execute("select row from passages where user_id = ?", (user_id,))
+        else:
+            probe = np.argsort(-(centroids @ query_vector))[:nprobe].tolist()
+            # -1: 학습 전에 들어가 아직 배정되지 않은 행
+            lists = [-1] + probe
+            placeholders = ",".join("?" * len(lists))
+            cursor = conn.execute(
+                f"select row from passages where user_id = ? and list_id in ({placeholders})",
+                (user_id, *lists),
+            )
+        return [row[0] for row in cursor]
+
+    def search(
+        self,
+        user_id: str,
+        query: str,
+        limit: int = 10,
+        transcription_type: str | None = None,
+        nprobe: int = IVF_NPROBE,
+    ) -> list[dict]:
+        """질의와 가장 가까운 구간 limit 개 (내적 = 코사인 유사도 순)"""
+        query = (query or "").strip()
+        if len(query) < 2:
+            raise ValueError("검색어는 2글자 이상이어야 합니다.")
+        query_vector = self.encoder.encode([query])[0]
+        return self.search_vector(user_id, query_vector, limit, transcription_type, nprobe)
+
+    def search_vector(
+        self,
+        user_id: str,
+        query_vector: np.ndarray,
+        limit: int = 10,
+        transcription_type: str | None = None,
+        nprobe: int = IVF_NPROBE,
+    ) -> list[dict]:
+        conn = self._connect()
+        rows = self._rows(conn)
+        if rows == 0:
+            return []
+        candidates = np.array(sorted(self._candidate_rows(conn, user_id, query_vector, nprobe)), dtype=np.int64)
+        if len(candidates) == 0:
+            return []
+
+        matrix = self._matrix_view(rows)
+        scores = np.empty(len(candidates), dtype=np.float32)
+        for offset in range(0, len(candidates), 8192):
+            block = candidates[offset:offset + 8192]
+            scores[offset:offset + len(block)] = matrix[block].astype(np.float32) @ query_vector
+
+        limit = min(limit, SEMANTIC_MAX_RESULTS)
+        # 유형 필터로 걸러질 몫까지 넉넉히 뽑아 둠
+        take = min(len(candidates), limit * 4 if transcription_type else limit)
+        top = np.argpartition(-scores, take - 1)[:take] if take < len(candidates) else np.arange(len(candidates))
+        top = top[np.argsort(-scores[top])]
+
+        chosen = candidates[top].tolist()
+        placeholders = ",".join("?" * len(chosen))
+        details = {
+            row["row"]: row
+            for row in conn.execute(
+                f"""
+                select row, task_id, created_at, transcription_type, start, end, body
+                from passages where row in ({placeholders})
+                """,
+                chosen,
+            )
+        }
+        results = []
+        for index in top:
+            row = details.get(int(candidates[index]))
+            if row is None or (transcription_type and row["transcription_type"] != transcription_type):
+                continue
+            results.append({
+                "task_id": row["task_id"],
+                "created_at": row["created_at"],
+                "transcription_type": row["transcription_type"],
+                "start": row["start"],
+                "end": row["end"],
+                "text": row["body"],
+                "score": round(float(scores[index]), 4),
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+    def metrics(self) -> dict:
+        conn = self._connect()
+        centroids = self._load_centroids(conn)
+        return {
+            "model": self.encoder.model_name,
+            "passages": conn.execute("select count(*) from passages").fetchone()[0],
+            "vector_rows": self._rows(conn),
+            "ivf_lists": 0 if centroids is None else len(centroids),
+        }
+
+
+if __name__ == "__main__":
+    # ===== 벤치마크: 녹취 N개(각 약 30문단) 색인 처리량, 정확/IVF 검색 지연과 재현율 =====
+    import random
+    import statistics
+    import sys
+    import time
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    encoder = FastEmbedEncoder() if TextEmbedding is not None else HashingEncoder()
+    print(f"encoder: {encoder.model_name}")
+    themes = [
+        "고난 가운데 드리는 기도는 하나님의 응답을 경험하는 통로입니다",
+        "렘넌트 7이정표를 따라 237 나라와 5000종족 전도를 준비합시다",
+        "말씀을 붙잡고 현장에서 치유와 회복을 누리는 삶",
+        "다락방 모임에서 언약을 나누고 서로를 위해 기도합니다",
+        "예산과 일정을 정리하고 다음 회의 안건을 확인합니다",
+        "혈압약 처방과 아세트아미노펜 복용 방법을 안내했습니다",
+    ]
+    rng = random.Random(7)
+
+    def make_transcript() -> str:
+        paragraphs = []
+        for _ in range(30):
+            theme = rng.choice(themes)
+            sentences = [f"{theme} {rng.randint(1, 999)}번째 이야기입니다." for _ in range(rng.randint(2, 5))]
+            paragraphs.append(" ".join(sentences))
+        return "\n\n".join(paragraphs)
+
+    index = SemanticIndex(encoder, tempfile.mkdtemp(prefix="semantic-"))
+    passages = 0
+    start = time.perf_counter()
+    for i in range(count):
+        passages += index.add(f"task-{i}", "user-1", f"2026-01-01T00:{i:05d}", "sermon", make_transcript())
+    build_s = time.perf_counter() - start
+    size_mb = os.path.getsize(index.vectors_path) / 1e6
+    print(f"indexed {count} transcripts / {passages} passages in {build_s:.1f} s "
+          f"({passages / build_s:.0f} passages/s), vectors {size_mb:.1f} MB")
+    index.maybe_train(force=True)
+    print("metrics", index.metrics())
+
+    queries = ["고난 중의 기도", "전도 준비", "약 복용 안내"]
+    query_vectors = encoder.encode(queries)
+    for nprobe, label in ((0, "exact"), (IVF_NPROBE, f"ivf nprobe={IVF_NPROBE}")):
+        timings = []
+        for query_vector in query_vectors:
+            for _ in range(10):
+                t0 = time.perf_counter()
+                index.search_vector("user-1", query_vector, 10, nprobe=nprobe)
+                timings.append((time.perf_counter() - t0) * 1000)
+        print(f"{label:<16} p50 {statistics.median(timings):7.2f} ms")
+
+    recalls = []
+    for query_vector in query_vectors:
+        exact = {(hit["task_id"], hit["start"]) for hit in index.search_vector("user-1", query_vector, 10, nprobe=0)}
+        approx = {(hit["task_id"], hit["start"]) for hit in index.search_vector("user-1", query_vector, 10)}
+        recalls.append(len(exact & approx) / max(len(exact), 1))
+    print(f"ivf recall@10 vs exact: {statistics.mean(recalls):.2f}")
+
+    t0 = time.perf_counter()
+    encoder.encode(["고난 중의 기도"])
+    print(f"query embedding {(time.perf_counter() - t0) * 1000:.1f} ms")
+    hit = index.search("user-1", "고난 중의 기도", 1)[0]
+    print("top passage:", hit["task_id"], hit["start"], hit["end"], hit["text"][:60])
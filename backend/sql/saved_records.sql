@@ -17,3 +17,7 @@ create index if not exists idx_saved_records_user_id_created_at
 
 create index if not exists idx_saved_records_category
   on public.saved_records (category);
+
+-- Category-filtered listing (/api/records?category=...) pages on the same key.
+create index if not exists idx_saved_records_user_category_created_at
+  on public.saved_records (user_id, category, created_at desc);
@@ -0,0 +1,32 @@
+-- Shared task status store for multi-worker / multi-instance deployments.
+-- Run this in Supabase SQL Editor before setting STATUS_STORE_BACKEND=supabase.
+
+create table if not exists public.task_status (
+  task_id text primary key,
+  user_id uuid not null,
+  status text not null check (status in ('queued', 'processing', 'completed', 'error', 'cancelled')),
+  error text,
+  progress jsonb,
+  partial jsonb,
+  revision integer not null default 0,
+  created_at timestamptz not null default now(),
+  updated_at timestamptz not null default now()
+);
+
+create index if not exists idx_task_status_user_id
+  on public.task_status (user_id);
+
+-- Added with progress reporting (safe to re-run).
+alter table if exists public.task_status
+  add column if not exists progress jsonb;
+
+-- Added with partial transcript delivery (safe to re-run).
+alter table if exists public.task_status
+  add column if not exists partial jsonb;
+
+-- Added with job cancellation (safe to re-run).
+alter table if exists public.task_status
+  drop constraint if exists task_status_status_check;
+alter table if exists public.task_status
+  add constraint task_status_status_check
+  check (status in ('queued', 'processing', 'completed', 'error', 'cancelled'));
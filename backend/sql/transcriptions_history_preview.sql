@@ -0,0 +1,14 @@
+-- Store a short preview per transcription so /api/history never loads corrected_text.
+-- Run this in Supabase SQL Editor after transcriptions_user_scope.sql.
+
+alter table if exists public.transcriptions
+  add column if not exists summary_preview text;
+
+-- Backfill existing rows (same 50-character cut the API used to do in Python).
+update public.transcriptions
+  set summary_preview = left(coalesce(corrected_text, ''), 50)
+  where summary_preview is null;
+
+-- Keyset pagination on (created_at, task_id) within a user.
+-- idx_transcriptions_user_id_created_at already covers (user_id, created_at desc);
+-- task_id only breaks ties between rows with the same created_at.
@@ -0,0 +1,18 @@
+-- One row per task: write-behind replay and retries upsert on task_id instead of inserting duplicates.
+-- Run this in Supabase SQL Editor. Until then the backend falls back to plain insert.
+
+-- Remove duplicates left by earlier replays (keep the completed row, then the newest one).
+delete from public.transcriptions t
+using (
+  select ctid,
+         row_number() over (
+           partition by task_id
+           order by (status = 'completed') desc nulls last, created_at desc nulls last
+         ) as rn
+  from public.transcriptions
+) d
+where t.ctid = d.ctid
+  and d.rn > 1;
+
+create unique index if not exists idx_transcriptions_task_id_unique
+  on public.transcriptions (task_id);
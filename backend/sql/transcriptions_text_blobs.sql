@@ -0,0 +1,15 @@
+-- Keep long transcript bodies in compressed blob storage, leaving only a reference in the row.
+-- Run this in Supabase SQL Editor before enabling BLOB_STORE_BACKEND=supabase.
+
+alter table if exists public.transcriptions
+  add column if not exists text_blobs jsonb;
+
+-- Offloaded rows keep raw_text / corrected_text as null.
+alter table if exists public.transcriptions
+  alter column raw_text drop not null,
+  alter column corrected_text drop not null;
+
+-- Private bucket for the compressed bodies (accessed with the service key only).
+insert into storage.buckets (id, name, public)
+  values ('transcripts', 'transcripts', false)
+  on conflict (id) do nothing;
@@ -0,0 +1,234 @@
+"""
+공유 작업 상태 저장소 - 여러 uvicorn 워커/인스턴스가 같은 상태를 보도록 한다.
+
+- 백엔드 교체 가능: STATUS_STORE_BACKEND=sqlite (기본, 로컬/공유 디스크) | supabase (task_status 테이블)
+- 상태 전이는 원자적 비교-교체(compare-and-set): 현재 상태가 기대값일 때만 바뀐다
+- 짧은 TTL 로컬 읽기 캐시로 상태 폴링 부하를 줄인다 (STATUS_CACHE_TTL 초)
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+from task_registry import TaskRegistry
+
+STATUS_STORE_BACKEND = os.getenv("STATUS_STORE_BACKEND", "sqlite")
+STATUS_STORE_DB_PATH = os.getenv("STATUS_STORE_DB_PATH") or os.path.join(tempfile.gettempdir(), "mallog24_status.db")
+STATUS_CACHE_TTL = float(os.getenv("STATUS_CACHE_TTL", "1.0"))
+STATUS_CACHE_MAX_ENTRIES = int(os.getenv("STATUS_CACHE_MAX_ENTRIES", "5000"))
+
+ACTIVE_STATUSES = ("queued", "processing")
+
+_MISSING = object()
+
+
+class StatusStore(ABC):
+    """작업 상태 저장소 인터페이스. 레코드: task_id, user_id, status, error, progress, partial, revision, updated_at"""
+
+    @abstractmethod
+    def create(self, task_id: str, user_id: str, status: str = "queued") -> None:
+        ...
+
+    @abstractmethod
+    def get(self, task_id: str) -> dict | None:
+        ...
+
+    @abstractmethod
+    def transition(self, task_id: str, from_statuses: tuple[str, ...], to_status: str, error: str | None = None) -> bool:
+        """현재 상태가 from_statuses 중 하나일 때만 to_status로 변경. 성공 여부 반환"""
+
+    @abstractmethod
+    def update_progress(self, task_id: str, progress: dict) -> None:
+        """진행 상황만 갱신 (상태/revision은 바꾸지 않음)"""
+
+    @abstractmethod
+    def update_partial(self, task_id: str, partial: dict) -> None:
+        """부분 결과(중간 녹취) 스냅샷 갱신 (상태/revision은 바꾸지 않음)"""
+
+
+class SQLiteStatusStore(StatusStore):
+    """로컬 대체 구현. 같은 DB 파일을 공유하는 모든 프로세스가 같은 상태를 본다"""
+
+    def __init__(self, db_path: str = STATUS_STORE_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._connect().executescript(
+            """
+            create table if not exists task_status (
+              task_id text primary key,
+              user_id text not null,
+              status text not null,
+              error text,
+              progress text,
+              partial text,
+              revision integer not null default 0,
+              created_at text not null,
+              updated_at text not null
+            );
+            """
+        )
+        columns = {row["name"] for row in self._connect().execute("pragma table_info(task_status)")}
+        for column in ("progress", "partial"):
+            if column not in columns:
+                self._connect().execute(f"alter table task_status add column {column} text")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, task_id: str, user_id: str, status: str = "queued") -> None:
+        now = datetime.now().isoformat()
+        self._connect().execute(
+            "insert into task_status (task_id, user_id, status, created_at, updated_at) values (?, ?, ?, ?, ?)",
+            (task_id, user_id, status, now, now),
+        )
+
+    def get(self, task_id: str) -> dict | None:
+        row = self._connect().execute("select * from task_status where task_id = ?", (task_id,)).fetchone()
+        if not row:
+            return None
+        record = dict(row)
+        for column in ("progress", "partial"):
+            record[column] = json.loads(record[column]) if record[column] else None
+        return record
+
+    def transition(self, task_id: str, from_statuses: tuple[str, ...], to_status: str, error: str | None = None) -> bool:
+        placeholders = ", ".join("?" for _ in from_statuses)
+        cursor = self._connect().execute(
+            f"""
+            update task_status set status = ?, error = ?, revision = revision + 1, updated_at = ?
+            where task_id = ? and status in ({placeholders})
+            """,
+            (to_status, error, datetime.now().isoformat(), task_id, *from_statuses),
+        )
+        return cursor.rowcount == 1
+
+    def update_progress(self, task_id: str, progress: dict) -> None:
+        self._connect().execute(
+            "update task_status set progress = ?, updated_at = ? where task_id = ?",
+            (json.dumps(progress), datetime.now().isoformat(), task_id),
+        )
+
+    def update_partial(self, task_id: str, partial: dict) -> None:
+        self._connect().execute(
+            "update task_status set partial = ?, updated_at = ? where task_id = ?",
+            (json.dumps(partial, ensure_ascii=False), datetime.now().isoformat(), task_id),
+        )
+
+
+class SupabaseStatusStore(StatusStore):
+    """
+    Supabase(Postgres) 구현. backend/sql/task_status.sql 실행 필요.
+    상태 전이는 revision 비교 조건부 UPDATE(낙관적 잠금) 결과로 원자성을 보장한다.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def create(self, task_id: str, user_id: str, status: str = "queued") -> None:
+        now = datetime.now().isoformat()
+        self.client.table("task_status").insert({
+            "task_id": task_id,
+            "user_id": user_id,
+            "status": status,
+            "revision": 0,
+            "created_at": now,
+            "updated_at": now,
+        }).execute()
+
+    def get(self, task_id: str) -> dict | None:
+        response = self.client.table("task_status").select("*").eq("task_id", task_id).limit(1).execute()
+        return response.data[0] if response.data else None
+
+    def transition(self, task_id: str, from_statuses: tuple[str, ...], to_status: str, error: str | None = None) -> bool:
+        current = self.get(task_id)
+        if not current or current["status"] not in from_statuses:
+            return False
+        response = (
+            self.client.table("task_status")
+            .update({
+                "status": to_status,
+                "error": error,
+                "revision": current["revision"] + 1,
+                "updated_at": datetime.now().isoformat(),
+            })
+            .eq("task_id", task_id)
+            .eq("revision", current["revision"])
+            .execute()
+        )
+        return bool(response.data)
+
+    def update_progress(self, task_id: str, progress: dict) -> None:
+        self.client.table("task_status").update({
+            "progress": progress,
+            "updated_at": datetime.now().isoformat(),
+        }).eq("task_id", task_id).execute()
+
+    def update_partial(self, task_id: str, partial: dict) -> None:
+        self.client.table("task_status").update({
+            "partial": partial,
+            "updated_at": datetime.now().isoformat(),
+        }).eq("task_id", task_id).execute()
+
+
+class CachedStatusStore(StatusStore):
+    """짧은 TTL 로컬 읽기 캐시. 쓰기는 그대로 백엔드에 반영하고 로컬 항목을 무효화한다"""
+
+    def __init__(self, backend: StatusStore, ttl: float = STATUS_CACHE_TTL, max_entries: int = STATUS_CACHE_MAX_ENTRIES):
+        self.backend = backend
+        self.ttl = ttl
+        self._cache = TaskRegistry("status_cache", max_entries=max_entries, ttl=ttl)
+
+    def create(self, task_id: str, user_id: str, status: str = "queued") -> None:
+        self.backend.create(task_id, user_id, status)
+        self.invalidate(task_id)
+
+    def get(self, task_id: str) -> dict | None:
+        cached = self._cache.get(task_id, _MISSING)
+        if cached is not _MISSING:
+            return cached
+
+        record = self.backend.get(task_id)
+        self._cache[task_id] = record
+        return record
+
+    def transition(self, task_id: str, from_statuses: tuple[str, ...], to_status: str, error: str | None = None) -> bool:
+        changed = self.backend.transition(task_id, from_statuses, to_status, error)
+        self.invalidate(task_id)
+        return changed
+
+    def update_progress(self, task_id: str, progress: dict) -> None:
+        self.backend.update_progress(task_id, progress)
+        self.invalidate(task_id)
+
+    def update_partial(self, task_id: str, partial: dict) -> None:
+        self.backend.update_partial(task_id, partial)
+        self.invalidate(task_id)
+
+    def invalidate(self, task_id: str) -> None:
+        self._cache.pop(task_id, None)
+
+
+def create_status_store(backend: str = STATUS_STORE_BACKEND, supabase_client=None) -> StatusStore:
+    """환경 설정에 맞는 상태 저장소 생성 (로컬 TTL 캐시 포함)"""
+    if backend == "supabase":
+        store: StatusStore = SupabaseStatusStore(supabase_client)
+    elif backend == "sqlite":
+        store = SQLiteStatusStore()
+    else:
+        raise ValueError(f"Unknown STATUS_STORE_BACKEND: {backend}")
+
+    if STATUS_CACHE_TTL > 0:
+        return CachedStatusStore(store, STATUS_CACHE_TTL)
+    return store
@@ -0,0 +1,138 @@
+"""
+프로세스 내 작업 레지스트리 - TTL + 최대 개수로 크기가 제한되는 task_id 키 저장소
+
+상태 읽기 캐시, 진행률, 부분 결과, 취소 요청처럼 작업별로 프로세스 메모리에 두는 값은 모두 여기에 둔다.
+- 항목마다 만료 시각을 두고, 읽기/쓰기 때 만료 항목을 정리 (완료/오류 후 정리가 빠져도 영원히 남지 않음)
+- 최대 개수를 넘으면 가장 오래 쓰이지 않은 항목부터 제거 (LRU)
+- 항목 레코드는 __slots__ 로 작게 유지
+- metrics(): 항목 수, 조회 적중/실패, 만료/초과 제거 횟수, 대략적인 메모리 사용량 (/health)
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+TASK_REGISTRY_MAX_ENTRIES = int(os.getenv("TASK_REGISTRY_MAX_ENTRIES", "10000"))
+TASK_REGISTRY_TTL = float(os.getenv("TASK_REGISTRY_TTL", str(6 * 3600)))
+
+# 이름 → 레지스트리 (/health 지표 수집용)
+registries: dict[str, "TaskRegistry"] = {}
+
+_MISSING = object()
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at")
+
+    def __init__(self, value, expires_at: float):
+        self.value = value
+        self.expires_at = expires_at
+
+
+def _approx_size(value, depth: int = 0) -> int:
+    """값의 대략적인 메모리 크기 (dict/list/객체 속성은 3단계까지만 따라감)"""
+    size = sys.getsizeof(value)
+    if depth >= 3:
+        return size
+    if isinstance(value, dict):
+        size += sum(_approx_size(k, depth + 1) + _approx_size(v, depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(_approx_size(item, depth + 1) for item in value)
+    elif hasattr(value, "__dict__"):
+        size += _approx_size(vars(value), depth + 1)
+    return size
+
+
+class TaskRegistry:
+    """
+    task_id → 값. dict와 비슷하게 쓰되(get/pop/in/[]=) TTL과 최대 개수로 크기가 제한된다.
+    스레드 안전 (Whisper 처리 스레드에서도 갱신).
+    """
+
+    def __init__(self, name: str, max_entries: int = TASK_REGISTRY_MAX_ENTRIES, ttl: float = TASK_REGISTRY_TTL):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+        self.evicted_expired = 0
+        self.evicted_size = 0
+        self.hits = 0
+        self.misses = 0
+        registries[name] = self
+
+    def set(self, task_id: str, value, ttl: float | None = None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._entries[task_id] = _Entry(value, now + (self.ttl if ttl is None else ttl))
+            self._entries.move_to_end(task_id)
+            self._sweep(now)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evicted_size += 1
+
+    def get(self, task_id: str, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(task_id)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry.expires_at <= now:
+                del self._entries[task_id]
+                self.evicted_expired += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(task_id)
+            self.hits += 1
+            return entry.value
+
+    def pop(self, task_id: str, default=None):
+        with self._lock:
+            entry = self._entries.pop(task_id, None)
+        return default if entry is None else entry.value
+
+    def __setitem__(self, task_id: str, value) -> None:
+        self.set(task_id, value)
+
+    def __contains__(self, task_id: str) -> bool:
+        return self.get(task_id, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _sweep(self, now: float) -> None:
+        """만료 항목 정리 (쓰기 경로에서 최대 초당 1회, TTL이 짧으면 TTL/2 간격)"""
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + min(1.0, self.ttl / 2)
+        expired = [task_id for task_id, entry in self._entries.items() if entry.expires_at <= now]
+        for task_id in expired:
+            del self._entries[task_id]
+        self.evicted_expired += len(expired)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            self._sweep(time.monotonic())
+            entries = list(self._entries.items())
+        approx_bytes = sys.getsizeof(self._entries) + sum(
+            _approx_size(task_id) + sys.getsizeof(entry) + _approx_size(entry.value) for task_id, entry in entries
+        )
+        return {
+            "entries": len(entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted_expired": self.evicted_expired,
+            "evicted_size": self.evicted_size,
+            "approx_bytes": approx_bytes,
+        }
+
+
+def registry_metrics() -> dict:
+    return {name: registry.metrics() for name, registry in registries.items()}
+
@@ -0,0 +1,6 @@
+"""backend/ 의 평평한 모듈(webhooks, job_queue ...)을 그대로 import 하도록 경로 추가"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,81 @@
+"""녹취 본문 블롭 저장소 테스트 - 로컬 백엔드, 프레임 압축, 범위 읽기"""
+
+import pytest
+
+import blob_store
+from blob_store import BlobNotFoundError, BlobStore, LocalBlobBackend, encode_frames
+
+TEXT = "".join(f"[{i:05d}] 오늘 말씀은 렘넌트 7이정표와 237 나라 전도에 관한 내용입니다.\n" for i in range(20000))
+
+
+@pytest.fixture
+def store(tmp_path) -> BlobStore:
+    return BlobStore(LocalBlobBackend(str(tmp_path)), min_bytes=1024)
+
+
+def test_put_text_roundtrip_is_compressed(store):
+    ref = store.put_text("transcripts/demo/corrected_text", TEXT)
+    data = TEXT.encode("utf-8")
+    assert ref["store"] == "local" and ref["codec"] == store.codec
+    assert ref["size"] == len(data)
+    assert len(ref["frames"]) == -(-len(data) // ref["frame_bytes"])
+    assert sum(ref["frames"]) < len(data) / 5
+    assert store.read_text(ref) == TEXT
+
+
+@pytest.mark.parametrize("start, end", [
+    (0, 100),
+    (blob_store.BLOB_FRAME_BYTES - 10, blob_store.BLOB_FRAME_BYTES + 10),  # 프레임 경계
+    (500_000, 504_096),
+    (1_000_000, None),
+])
+def test_read_range_matches_original_bytes(store, start, end):
+    ref = store.put_text("transcripts/demo/raw_text", TEXT)
+    data = TEXT.encode("utf-8")
+    assert store.read_range(ref, start, end) == data[start:end]
+
+
+def test_read_range_reads_only_needed_frames(store, monkeypatch):
+    ref = store.put_text("transcripts/demo/raw_text", TEXT)
+    calls = []
+    original = store.backend.read
+
+    def tracking_read(key, offset=0, length=None):
+        calls.append((offset, length))
+        return original(key, offset, length)
+
+    monkeypatch.setattr(store.backend, "read", tracking_read)
+    frame_bytes = ref["frame_bytes"]
+    store.read_range(ref, frame_bytes + 1, frame_bytes + 100)
+    assert calls == [(ref["frames"][0], ref["frames"][1])]
+
+
+def test_empty_and_out_of_bounds_ranges(store):
+    ref = store.put_text("k", TEXT)
+    assert store.read_range(ref, 10, 10) == b""
+    assert store.read_range(ref, ref["size"] + 5) == b""
+
+
+def test_should_offload(store):
+    assert not store.should_offload(None)
+    assert not store.should_offload("짧은 본문")
+    assert store.should_offload("가" * 400)  # 1200 바이트
+    assert not BlobStore(None).should_offload(TEXT)
+
+
+def test_encode_frames_splits_by_frame_size():
+    stored, frames = encode_frames(b"a" * 25, "zlib", frame_bytes=10)
+    assert len(frames) == 3 and sum(frames) == len(stored)
+
+
+def test_delete_and_missing_blob(store):
+    ref = store.put_text("transcripts/demo/raw_text", TEXT)
+    store.delete(ref)
+    store.delete(ref)  # 없는 블롭 삭제는 조용히 넘어감
+    with pytest.raises(BlobNotFoundError):
+        store.read_text(ref)
+
+
+def test_local_backend_rejects_keys_outside_root(store):
+    with pytest.raises(ValueError):
+        store.backend.put("../escape", b"x")
@@ -0,0 +1,124 @@
+"""완료 결과 HTTP 캐시 테스트 - 압축 협상, ETag/304, Range 파싱, 완료 결과 캐시"""
+
+import gzip
+import json
+
+import pytest
+from starlette.requests import Request
+
+import http_cache
+from http_cache import (
+    CachedBody,
+    cached_response,
+    etag_matches,
+    get_completed,
+    negotiate_encoding,
+    parse_byte_range,
+    remember_completed,
+)
+
+SAMPLE = "오늘 말씀은 렘넌트 7이정표와 237 나라 전도에 관한 내용입니다. " * 400
+
+
+def _request(**headers) -> Request:
+    raw = [(name.replace("_", "-").lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+@pytest.fixture
+def cached() -> CachedBody:
+    return CachedBody({"task_id": "demo", "status": "completed", "raw_text": SAMPLE, "corrected_text": SAMPLE})
+
+
+# ===== 본문 / 압축 =====
+
+def test_body_is_compact_json_with_stable_etag(cached):
+    assert json.loads(cached.body) == cached.payload
+    assert cached.etag == CachedBody(dict(cached.payload)).etag
+    assert cached.etag != CachedBody({**cached.payload, "status": "error"}).etag
+
+
+def test_gzip_is_compressed_once_and_reused(cached):
+    encoded = cached.encoded("gzip")
+    assert gzip.decompress(encoded) == cached.body
+    assert len(encoded) < len(cached.body) / 10
+    assert cached.encoded("gzip") is encoded
+    assert cached.encoded("identity") is cached.body
+
+
+@pytest.mark.parametrize("accept, size, expected", [
+    (None, 5000, "identity"),
+    ("gzip", 10, "identity"),  # 작은 본문은 압축 안 함
+    ("gzip, deflate, br;q=0", 5000, "gzip"),
+    ("deflate", 5000, "identity"),
+    ("gzip;q=0", 5000, "identity"),
+])
+def test_negotiate_encoding(accept, size, expected):
+    assert negotiate_encoding(accept, size) == expected
+
+
+def test_brotli_preferred_when_available(monkeypatch):
+    monkeypatch.setattr(http_cache, "brotli", object())
+    assert negotiate_encoding("gzip, br", 5000) == "br"
+    monkeypatch.setattr(http_cache, "brotli", None)
+    assert negotiate_encoding("gzip, br", 5000) == "gzip"
+
+
+# ===== 조건부 GET =====
+
+def test_etag_matches(cached):
+    assert etag_matches(f'W/{cached.etag}, "other"', cached.etag)
+    assert etag_matches("*", cached.etag)
+    assert not etag_matches('"other"', cached.etag)
+    assert not etag_matches(None, cached.etag)
+
+
+def test_cached_response_returns_304_for_matching_etag(cached):
+    response = cached_response(_request(if_none_match=cached.etag), cached)
+    assert response.status_code == 304 and response.body == b""
+    assert response.headers["etag"] == cached.etag
+    assert "immutable" in response.headers["cache-control"]
+
+
+def test_cached_response_negotiates_encoding(cached):
+    response = cached_response(_request(accept_encoding="gzip"), cached)
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(response.body) == cached.body
+    assert "Accept-Encoding" in response.headers["vary"]
+
+
+# ===== Range =====
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 100)),
+    ("bytes=990-", (990, 1000)),
+    ("bytes=-10", (990, 1000)),
+    ("bytes=-5000", (0, 1000)),
+    ("bytes=0-5000", (0, 1000)),
+    # 형식이 잘못된 헤더는 무시 (전체 200)
+    (None, None),
+    ("bytes=5-3", None),
+    ("bytes=abc", None),
+    ("bytes=-", None),
+    ("bytes=5", None),
+    ("bytes=0-0,5-6", None),
+    ("items=0-5", None),
+])
+def test_parse_byte_range(header, expected):
+    assert parse_byte_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=2000-3000", "bytes=-0"])
+def test_unsatisfiable_range_raises(header):
+    with pytest.raises(ValueError):
+        parse_byte_range(header, 1000)
+
+
+# ===== 완료 결과 캐시 =====
+
+def test_completed_results_are_scoped_to_user(cached):
+    remember_completed("task-cache", "user-1", cached.payload)
+    assert get_completed("task-cache", "user-1").payload == cached.payload
+    assert get_completed("task-cache", "user-2") is None
+    assert get_completed("task-missing", "user-1") is None
@@ -0,0 +1,71 @@
+"""작업 큐 테스트 - 대기 순번/예상 시작 시각 캐시"""
+
+import pytest
+
+import job_queue
+from job_queue import SQLiteJobQueue
+from scheduler import FairScheduler
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(job_queue.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def queue(tmp_path, clock, monkeypatch):
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"), scheduler=FairScheduler(max_concurrent=1, max_per_user=1),
+                           estimate_ttl=2)
+    calls = []
+    simulate = queue._simulate_schedule
+
+    def counting_simulate():
+        calls.append(1)
+        return simulate()
+
+    monkeypatch.setattr(queue, "_simulate_schedule", counting_simulate)
+    queue.simulations = calls
+    return queue
+
+
+def _enqueue(queue: SQLiteJobQueue, task_id: str, user_id: str = "user-1") -> None:
+    queue.enqueue(task_id, user_id, {"task_id": task_id}, duration_seconds=60)
+
+
+def test_estimates_are_shared_within_ttl(queue, clock):
+    for task_id, user_id in (("task-1", "user-1"), ("task-2", "user-2"), ("task-3", "user-3")):
+        _enqueue(queue, task_id, user_id)
+
+    positions = [queue.schedule_estimate(task_id)["queue_position"] for task_id in ("task-1", "task-2", "task-3")]
+    assert sorted(positions) == [1, 2, 3]
+    assert queue.schedule_estimate("missing") is None
+    assert len(queue.simulations) == 1
+
+    clock[0] += 2
+    queue.schedule_estimate("task-1")
+    assert len(queue.simulations) == 2
+
+
+def test_queue_changes_invalidate_estimates(queue):
+    _enqueue(queue, "task-1", "user-1")
+    _enqueue(queue, "task-2", "user-2")
+    assert queue.schedule_estimate("task-2")["queue_position"] == 2
+
+    claimed = queue.claim("worker-1")
+    assert queue.schedule_estimate(claimed["task_id"]) is None
+    other = "task-2" if claimed["task_id"] == "task-1" else "task-1"
+    assert queue.schedule_estimate(other)["queue_position"] == 1
+
+    queue.cancel(other)
+    assert queue.schedule_estimate(other) is None
+    assert len(queue.simulations) == 3
+
+
+def test_zero_ttl_always_recomputes(queue):
+    queue.estimate_ttl = 0
+    _enqueue(queue, "task-1")
+    queue.schedule_estimate("task-1")
+    queue.schedule_estimate("task-1")
+    assert len(queue.simulations) == 2
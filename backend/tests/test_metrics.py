@@ -0,0 +1,110 @@
+"""Prometheus 지표 테스트 - 히스토그램 누적 구간, 카운터/게이지, 텍스트 형식 출력"""
+
+import urllib.request
+
+import pytest
+
+import metrics
+from metrics import Counter, Gauge, Histogram
+
+
+@pytest.fixture(autouse=True)
+def isolated_registry(monkeypatch):
+    # 테스트에서 만든 지표가 전역 목록(/metrics 출력)에 남지 않도록
+    monkeypatch.setattr(metrics, "_metrics", [])
+    monkeypatch.setattr(metrics, "_collectors", [])
+
+
+def _lines(metric) -> list[str]:
+    return [line for line in metric.render() if not line.startswith("#")]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("demo_seconds", "데모", ("stage",), buckets=(1, 5))
+    for value in (0.5, 1, 3, 10):
+        histogram.observe(value, stage="stt")
+
+    assert _lines(histogram) == [
+        'mallog24_demo_seconds_bucket{stage="stt",le="1"} 2',
+        'mallog24_demo_seconds_bucket{stage="stt",le="5"} 3',
+        'mallog24_demo_seconds_bucket{stage="stt",le="+Inf"} 4',
+        'mallog24_demo_seconds_sum{stage="stt"} 14.5',
+        'mallog24_demo_seconds_count{stage="stt"} 4',
+    ]
+
+
+def test_histogram_time_observes_elapsed():
+    histogram = Histogram("timed_seconds", "데모", buckets=(60,))
+    with histogram.time():
+        pass
+    assert _lines(histogram)[-1] == "mallog24_timed_seconds_count 1"
+
+
+def test_counter_and_gauge():
+    counter = Counter("demo_total", "데모", ("outcome",))
+    counter.inc(outcome="ok")
+    counter.inc(2, outcome="ok")
+    counter.inc(outcome="error")
+    assert _lines(counter) == ['mallog24_demo_total{outcome="ok"} 3', 'mallog24_demo_total{outcome="error"} 1']
+
+    gauge = Gauge("demo_in_flight", "데모")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+    assert _lines(gauge) == ["mallog24_demo_in_flight 1"]
+    gauge.set(0.25)
+    assert _lines(gauge) == ["mallog24_demo_in_flight 0.25"]
+
+
+def test_label_values_are_escaped():
+    counter = Counter("escaped_total", "데모", ("path",))
+    counter.inc(path='a"b\\c\nd')
+    assert _lines(counter) == ['mallog24_escaped_total{path="a\\"b\\\\c\\nd"} 1']
+
+
+def test_disabled_metrics_do_not_record(monkeypatch):
+    counter = Counter("off_total", "데모")
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", False)
+    counter.inc()
+    assert _lines(counter) == []
+
+
+def test_render_runs_collectors_and_ignores_their_failures():
+    gauge = Gauge("queue_depth", "데모")
+    metrics.register_collector(lambda: gauge.set(7))
+    metrics.register_collector(lambda: 1 / 0)
+
+    text = metrics.render()
+    assert "# TYPE mallog24_queue_depth gauge\nmallog24_queue_depth 7\n" in text
+    assert text.endswith("\n")
+
+
+def test_track_call_records_outcome():
+    with metrics.track_call("test-track", "generate", bytes_out=100):
+        pass
+    with pytest.raises(RuntimeError):
+        with metrics.track_call("test-track", "generate"):
+            raise RuntimeError("429 Too Many Requests")
+
+    def mine(metric, suffix=""):
+        return [line for line in _lines(metric) if 'service="test-track"' in line and suffix in line]
+
+    assert mine(metrics.CALL_SECONDS, "_count") == [
+        'mallog24_external_call_duration_seconds_count{service="test-track",operation="generate",outcome="ok"} 1',
+        'mallog24_external_call_duration_seconds_count{service="test-track",operation="generate",outcome="rate_limited"} 1',
+    ]
+    assert mine(metrics.RATE_LIMITED) == ['mallog24_external_call_rate_limited_total{service="test-track"} 1']
+    assert mine(metrics.CALLS_IN_FLIGHT) == ['mallog24_external_calls_in_flight{service="test-track"} 0']
+
+
+def test_worker_http_endpoint_serves_metrics():
+    Counter("served_total", "데모").inc()
+    server = metrics.start_http_server(0, host="127.0.0.1")
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.headers["Content-Type"] == metrics.CONTENT_TYPE
+            assert "mallog24_served_total 1" in response.read().decode("utf-8")
+    finally:
+        server.shutdown()
+        server.server_close()
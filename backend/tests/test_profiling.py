@@ -0,0 +1,90 @@
+"""요청별 프로파일링 테스트 - 결과 파일, 꺼짐/동시 실행 건너뜀, 관리자 헤더"""
+
+import json
+import os
+import time
+
+import pytest
+
+import profiling
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_INTERVAL_MS", 2.0)
+    monkeypatch.setattr(profiling, "PROFILE_ALL_JOBS", False)
+    return tmp_path
+
+
+def _busy_until(seconds: float) -> int:
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(i * i for i in range(1000))
+    return total
+
+
+def test_profile_job_writes_folded_stacks_and_summary(profile_dir):
+    with profiling.profile_job("task-1", 2, requested=True):
+        _busy_until(0.15)
+        kept = [bytes(1024) for _ in range(2000)]
+
+    result_dir = profile_dir / "task-1" / "attempt-2"
+    assert {"wall.folded", "cpu.folded", "summary.json"} <= set(os.listdir(result_dir))
+    summary = json.loads((result_dir / "summary.json").read_text(encoding="utf-8"))
+    assert summary["label"] == "transcription task-1" and summary["error"] is None
+    assert summary["samples"] > 0 and summary["wall_seconds"] >= 0.15
+    assert any("_busy_until" in label for label, _ in summary["top_wall_samples"])
+    assert summary["traced_memory"]["peak_bytes"] >= len(kept) * 1024
+
+    # folded 형식: "스레드;바깥;...;안쪽 값"
+    line = (result_dir / "wall.folded").read_text(encoding="utf-8").splitlines()[0]
+    stack, value = line.rsplit(" ", 1)
+    assert ";" in stack and int(value) > 0
+    assert not profiling._active.locked()
+
+
+def test_profile_records_error_and_reraises(profile_dir):
+    with pytest.raises(RuntimeError):
+        with profiling.profile_job("task-1", 1, requested=True):
+            raise RuntimeError("boom")
+    summary = json.loads((profile_dir / "task-1" / "attempt-1" / "summary.json").read_text(encoding="utf-8"))
+    assert summary["error"] == "RuntimeError: boom"
+
+
+def test_disabled_profile_is_a_shared_noop(profile_dir, monkeypatch):
+    assert profiling.profile_job("task-1", 1, requested=False) is profiling._OFF
+    with profiling.profile_job("task-1", 1, requested=False) as profile:
+        assert profile is None
+    assert os.listdir(profile_dir) == []
+
+    monkeypatch.setattr(profiling, "PROFILE_ALL_JOBS", True)
+    assert isinstance(profiling.profile_job("task-1", 1, requested=False), profiling.Profile)
+    profiling._active.release()
+
+
+def test_second_profile_is_skipped_while_one_runs(profile_dir):
+    skipped = profiling.stats["profiles_skipped_busy"]
+    with profiling.profile_job("task-1", 1, requested=True):
+        assert profiling.profile_job("task-2", 1, requested=True) is profiling._OFF
+    assert profiling.stats["profiles_skipped_busy"] == skipped + 1
+    assert not (profile_dir / "task-2").exists()
+
+
+def test_profile_request_output_dir(profile_dir):
+    context, output_dir = profiling.profile_request("POST", "/api/transcribe")
+    with context:
+        pass
+    assert output_dir.startswith(str(profile_dir / "requests"))
+    assert output_dir.endswith("-POST-api-transcribe")
+    assert os.path.exists(os.path.join(output_dir, "summary.json"))
+
+
+def test_header_allowed(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "")
+    assert not profiling.header_allowed("")
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "secret")
+    assert profiling.header_allowed("secret")
+    assert not profiling.header_allowed("wrong")
+    assert not profiling.header_allowed(None)
@@ -0,0 +1,78 @@
+"""녹취 전문 검색 인덱스 테스트 - 2-gram 토큰화, 조사 처리, 사용자 구분, 교체/제거"""
+
+import pytest
+
+from search_index import SearchIndex, build_match_query, make_snippet, tokenize
+
+NEEDLE = "오늘 회의에서 임마누엘 선교센터 예산을 확정했습니다."
+
+
+@pytest.fixture
+def index(tmp_path) -> SearchIndex:
+    index = SearchIndex(str(tmp_path / "search.db"))
+    index.add("task-needle", "user-1", "2026-02-01T00:00:00", "meeting", NEEDLE)
+    index.add("task-sermon", "user-1", "2026-01-01T00:00:00", "sermon", "렘넌트 7이정표와 237 나라 전도에 관한 말씀")
+    index.add("task-other", "user-2", "2026-02-01T00:00:00", "meeting", "임마누엘 선교센터 (다른 사용자)")
+    return index
+
+
+def _ids(hits: list[dict]) -> list[str]:
+    return [hit["task_id"] for hit in hits]
+
+
+def test_tokenize_splits_runs_into_bigrams():
+    assert tokenize("7이정표") == "7이 이정 정표"
+    assert tokenize("Gemini, 말") == "ge em mi in ni 말"
+
+
+def test_match_query_strips_trailing_particles():
+    assert build_match_query("7이정표를") == build_match_query("7이정표")
+    assert build_match_query("선교센터에서") == build_match_query("선교센터")
+    assert build_match_query("가 ! 나") is None
+
+
+def test_search_is_scoped_to_user(index):
+    assert _ids(index.search("user-1", "임마누엘")) == ["task-needle"]
+    assert _ids(index.search("user-2", "임마누엘")) == ["task-other"]
+    assert index.search("user-3", "임마누엘") == []
+
+
+def test_search_words_are_anded(index):
+    assert _ids(index.search("user-1", "7이정표를 전도")) == ["task-sermon"]
+    assert index.search("user-1", "7이정표 임마누엘") == []
+
+
+def test_search_rejects_too_short_query(index):
+    with pytest.raises(ValueError):
+        index.search("user-1", "가")
+
+
+def test_hit_includes_snippet_with_highlights(index):
+    hit = index.search("user-1", "선교센터")[0]
+    assert hit["transcription_type"] == "meeting" and "score" in hit
+    start, end = hit["highlights"][0]
+    assert hit["snippet"][start:end] == "선교센터"
+
+
+def test_make_snippet_without_match_returns_head():
+    assert make_snippet("가나다라", "없는말", width=2) == {"snippet": "가나", "offset": 0, "highlights": []}
+
+
+def test_add_replaces_and_remove_deletes(index):
+    index.add("task-needle", "user-1", "2026-02-01T00:00:00", "meeting", "내용을 고쳤습니다")
+    assert index.search("user-1", "임마누엘") == []
+    assert _ids(index.search("user-1", "고쳤습니다")) == ["task-needle"]
+    assert index.metrics()["documents"] == 3
+
+    index.remove("task-needle")
+    index.remove("task-needle")
+    assert index.search("user-1", "고쳤습니다") == []
+    assert index.indexed_task_ids("user-1") == {"task-sermon"}
+
+
+def test_backfilled_flag(index):
+    assert not index.is_backfilled("user-1")
+    index.mark_backfilled("user-1")
+    index.mark_backfilled("user-1")
+    assert index.is_backfilled("user-1")
+    assert index.metrics()["backfilled_users"] == 1
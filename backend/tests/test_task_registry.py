@@ -0,0 +1,74 @@
+"""TaskRegistry 테스트 - 최대 개수(LRU), TTL 만료, 지표"""
+
+import pytest
+
+import task_registry
+from task_registry import TaskRegistry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(task_registry.time, "monotonic", fake)
+    return fake
+
+
+def test_size_limit_evicts_least_recently_used(clock):
+    registry = TaskRegistry("test_lru", max_entries=3, ttl=60)
+    for task_id in ("a", "b", "c"):
+        registry[task_id] = task_id
+    assert registry.get("a") == "a"  # a 를 최근 사용으로
+    registry["d"] = "d"
+
+    assert len(registry) == 3
+    assert "b" not in registry
+    assert all(task_id in registry for task_id in ("a", "c", "d"))
+    assert registry.metrics()["evicted_size"] == 1
+
+
+def test_bounded_under_many_inserts(clock):
+    registry = TaskRegistry("test_bounded", max_entries=1000, ttl=60)
+    for i in range(5000):
+        registry[f"task-{i}"] = {"stage": "stt", "percent": 42.0}
+
+    metrics = registry.metrics()
+    assert metrics["entries"] == 1000 and metrics["evicted_size"] == 4000
+    assert "task-0" not in registry and "task-4999" in registry
+    assert metrics["approx_bytes"] > 0
+
+
+def test_entries_expire_after_ttl(clock):
+    registry = TaskRegistry("test_ttl", max_entries=100, ttl=10)
+    registry["old"] = 1
+    registry.set("short", 2, ttl=1)
+
+    clock.now += 2
+    assert registry.get("short") is None
+    assert registry.get("old") == 1
+
+    clock.now += 10
+    registry["fresh"] = 3  # 쓰기 경로에서 만료 항목 정리
+    assert len(registry) == 1 and "fresh" in registry
+    assert registry.metrics()["evicted_expired"] == 2
+
+
+def test_get_pop_and_hit_counters(clock):
+    registry = TaskRegistry("test_counters", max_entries=10, ttl=60)
+    registry["a"] = {"status": "queued"}
+
+    assert registry.get("a") == {"status": "queued"}
+    assert registry.get("missing", "default") == "default"
+    assert registry.pop("a") == {"status": "queued"}
+    assert registry.pop("a", "gone") == "gone"
+
+    metrics = registry.metrics()
+    assert (metrics["hits"], metrics["misses"]) == (1, 1)
+    assert task_registry.registry_metrics()["test_counters"]["entries"] == 0
@@ -0,0 +1,141 @@
+"""작업 추적 테스트 - 구조화 로그, 부모/자식 구간, 샘플링, 파일 내보내기, 프로세스 간 문맥"""
+
+import asyncio
+import json
+
+import pytest
+
+import tracing
+
+
+@pytest.fixture
+def export_file(tmp_path, monkeypatch):
+    path = tmp_path / "spans.jsonl"
+    monkeypatch.setattr(tracing, "TRACING_ENABLED", True)
+    monkeypatch.setattr(tracing, "TRACE_EXPORT_FILE", str(path))
+    monkeypatch.setattr(tracing, "TRACE_EXPORT_URL", "")
+    monkeypatch.setattr(tracing, "_sampler", tracing._Sampler(1.0, max_per_second=1e9))
+    return path
+
+
+def _exported(path) -> list[dict]:
+    tracing.flush()
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+# ===== 로그 =====
+
+def test_text_log_includes_task_and_fields(capsys, monkeypatch):
+    monkeypatch.setattr(tracing, "LOG_FORMAT", "text")
+    tracing.log("STT done", task_id="task-1", chunks=3)
+    assert capsys.readouterr().out == "[task-1] STT done chunks=3\n"
+
+
+def test_json_log_picks_up_task_and_span_context(capsys, monkeypatch, export_file):
+    monkeypatch.setattr(tracing, "LOG_FORMAT", "json")
+    with tracing.start_trace("transcription", task_id="task-1"):
+        with tracing.span("correct.window", index=0) as current:
+            tracing.log("Gemini done", chars=1234)
+
+    record = json.loads(capsys.readouterr().out)
+    assert record["msg"] == "Gemini done" and record["level"] == "info"
+    assert record["task_id"] == "task-1" and record["chars"] == 1234
+    assert record["trace_id"] == current.trace.trace_id and record["span_id"] == current.span_id
+
+
+def test_error_log_goes_to_stderr_with_traceback(capsys, monkeypatch):
+    monkeypatch.setattr(tracing, "LOG_FORMAT", "text")
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        tracing.log("Failed", level="error", exc_info=True)
+    err = capsys.readouterr().err
+    assert err.startswith("Failed\nTraceback") and "RuntimeError: boom" in err
+
+
+# ===== 구간 =====
+
+def test_disabled_tracing_keeps_task_context_only(monkeypatch):
+    monkeypatch.setattr(tracing, "TRACING_ENABLED", False)
+    with tracing.start_trace("transcription", task_id="task-1"):
+        assert tracing.span("split") is tracing._NOOP
+        assert tracing._current_task.get() == "task-1"
+        assert tracing.current_context() is None
+    assert tracing._current_task.get() is None
+
+
+def test_spans_are_nested_and_exported_when_root_ends(export_file):
+    with tracing.start_trace("transcription", task_id="task-1", file="a.mp3"):
+        with tracing.span("split"):
+            pass
+        with pytest.raises(ValueError):
+            with tracing.span("stt.chunk", index=0) as chunk:
+                chunk.set("bytes", 10)
+                raise ValueError("bad audio")
+
+    spans = {item["name"]: item for item in _exported(export_file)}
+    root = spans["transcription"]
+    assert root["parent_id"] is None and root["attributes"] == {"file": "a.mp3"}
+    assert spans["split"]["parent_id"] == root["span_id"]
+    assert spans["stt.chunk"]["attributes"] == {"index": 0, "bytes": 10}
+    assert spans["stt.chunk"]["error"] == "ValueError: bad audio"
+    assert {item["trace_id"] for item in spans.values()} == {root["trace_id"]}
+    assert {item["task_id"] for item in spans.values()} == {"task-1"}
+
+
+def test_span_context_follows_to_thread(export_file):
+    def diarize():
+        with tracing.span("diarize"):
+            pass
+
+    async def pipeline():
+        with tracing.start_trace("transcription", task_id="task-1"):
+            await asyncio.to_thread(diarize)
+
+    asyncio.run(pipeline())
+    spans = {item["name"]: item for item in _exported(export_file)}
+    assert spans["diarize"]["parent_id"] == spans["transcription"]["span_id"]
+
+
+def test_parent_context_continues_trace_across_processes(export_file):
+    with tracing.start_trace("upload", task_id="task-1"):
+        context = tracing.current_context()
+    with tracing.start_trace("transcription", task_id="task-1", parent=context):
+        pass
+
+    spans = {item["name"]: item for item in _exported(export_file)}
+    assert spans["transcription"]["trace_id"] == context["trace_id"]
+    assert spans["transcription"]["parent_id"] == context["span_id"]
+
+
+def test_sampled_out_trace_records_nothing(export_file, monkeypatch):
+    monkeypatch.setattr(tracing, "_sampler", tracing._Sampler(0.0))
+    with tracing.start_trace("transcription", task_id="task-1"):
+        assert tracing.span("split") is tracing._NOOP
+        assert tracing.current_context() == {"sampled": False}
+    # 다른 프로세스도 같은 결정을 따름
+    with tracing.start_trace("transcription", task_id="task-1", parent={"sampled": False}):
+        assert tracing.span("split") is tracing._NOOP
+    tracing.flush()
+    assert not export_file.exists()
+
+
+def test_sampler_caps_traces_per_second(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(tracing.time, "monotonic", lambda: now[0])
+    sampler = tracing._Sampler(1.0, max_per_second=2)
+    assert [sampler.sample() for _ in range(3)] == [True, True, False]
+    now[0] += 0.5
+    assert [sampler.sample() for _ in range(2)] == [True, False]
+
+
+def test_otlp_payload_shape(export_file):
+    with tracing.start_trace("transcription", task_id="task-1", chunks=3, ok=True) as root:
+        pass
+    payload = tracing._otlp_payload([root])
+    otlp_span = payload["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert otlp_span["traceId"] == root.trace.trace_id and "parentSpanId" not in otlp_span
+    assert {"key": "chunks", "value": {"intValue": "3"}} in otlp_span["attributes"]
+    assert {"key": "ok", "value": {"boolValue": True}} in otlp_span["attributes"]
+    assert {"key": "task_id", "value": {"stringValue": "task-1"}} in otlp_span["attributes"]
+    assert otlp_span["status"] == {"code": 1}
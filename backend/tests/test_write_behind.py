@@ -0,0 +1,149 @@
+"""write-behind 저널 테스트 - 재반영 시 중복 없음(task_id upsert), dead-letter"""
+
+import pytest
+
+from repository import SQLiteTranscriptionRepository, TranscriptionRepository, _SQLiteDatabase
+from write_behind import WriteBehindTranscriptionRepository, WriteJournal
+
+
+class FailingBackend(TranscriptionRepository):
+    """쓰기는 항상 실패, 읽기는 빈 결과"""
+
+    def has_column(self, column: str) -> bool:
+        return True
+
+    def insert(self, row: dict) -> None:
+        raise RuntimeError("backend down")
+
+    def insert_many(self, rows: list[dict]) -> None:
+        raise RuntimeError("backend down")
+
+    def delete(self, task_id: str, user_id: str) -> None:
+        raise RuntimeError("backend down")
+
+    def get(self, task_id: str, user_id: str, columns: str = "*") -> dict | None:
+        return None
+
+    def list_for_user(self, user_id, columns, limit, cursor=None) -> list[dict]:
+        return []
+
+
+@pytest.fixture
+def database(tmp_path):
+    return _SQLiteDatabase(str(tmp_path / "data.db"))
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return WriteJournal(str(tmp_path / "journal.db"), max_attempts=3)
+
+
+def _row(task_id: str, status: str = "completed", **extra) -> dict:
+    return {"task_id": task_id, "user_id": "user-1", "status": status, "created_at": "2026-01-01T00:00:00", **extra}
+
+
+def _count(database: _SQLiteDatabase, task_id: str) -> int:
+    return database.connect().execute("select count(*) from transcriptions where task_id = ?", (task_id,)).fetchone()[0]
+
+
+def test_replayed_rows_upsert_on_task_id(database, journal):
+    repo = WriteBehindTranscriptionRepository(SQLiteTranscriptionRepository(database), journal)
+    repo.insert(_row("task-1", corrected_text="첫 저장"))
+    assert repo.flush_once() == 1
+
+    # 리스 만료 후 같은 행 재반영 + 행별 재시도 경로
+    repo.backend.insert_many([_row("task-1", corrected_text="첫 저장")])
+    repo.backend.insert(_row("task-1", corrected_text="다시 저장"))
+
+    assert _count(database, "task-1") == 1
+    assert repo.get("task-1", "user-1", "corrected_text") == {"corrected_text": "다시 저장"}
+
+
+def test_latest_row_per_task_wins_within_a_batch(database, journal):
+    repo = WriteBehindTranscriptionRepository(SQLiteTranscriptionRepository(database), journal)
+    repo.insert(_row("task-1", status="error", error="timeout"))
+    repo.insert(_row("task-1", corrected_text="재시도 성공"))
+    assert repo.get("task-1", "user-1", "status") == {"status": "completed"}
+
+    repo.flush_once()
+    assert _count(database, "task-1") == 1
+    assert repo.get("task-1", "user-1", "status, error") == {"status": "completed", "error": None}
+    assert journal.metrics()["pending"] == 0
+
+
+def test_rows_are_visible_before_flush_and_saved_in_one_batch(database, journal):
+    class CountingBackend(SQLiteTranscriptionRepository):
+        calls = 0
+
+        def insert_many(self, rows: list[dict]) -> None:
+            self.calls += 1
+            super().insert_many(rows)
+
+    backend = CountingBackend(database)
+    repo = WriteBehindTranscriptionRepository(backend, journal)
+    for i in range(20):
+        repo.insert(_row(f"task-{i}"))
+
+    assert repo.get("task-3", "user-1", "task_id, status") == {"task_id": "task-3", "status": "completed"}
+    assert backend.calls == 0 and journal.metrics()["pending"] == 20
+
+    assert repo.flush_once() == 20
+    assert backend.calls == 1 and journal.metrics()["pending"] == 0
+    assert len(repo.list_for_user("user-1", "task_id, created_at", 50)) == 20
+
+
+def test_rows_move_to_dead_letter_after_max_attempts(journal):
+    repo = WriteBehindTranscriptionRepository(FailingBackend(), journal)
+    repo.insert(_row("task-1"))
+    for _ in range(5):
+        journal._connect().execute("update write_journal set next_attempt_at = 0 where dead_at is null")
+        repo.flush_once()
+
+    assert repo.stats["failures"] == 3 and repo.stats["dead_lettered"] == 1
+    assert journal.metrics()["pending"] == 0 and journal.metrics()["dead_letter"] == 1
+    assert journal.claim() == []
+    # 반영은 멈췄지만 조회에는 보임
+    assert repo.get("task-1", "user-1", "status") == {"status": "completed"}
+
+    assert journal.requeue_dead() == 1
+    assert journal.metrics() | {"oldest_age_seconds": None} == {
+        "pending": 1, "dead_letter": 0, "oldest_age_seconds": None, "max_attempts": 0,
+    }
+
+
+def test_unique_index_dedupes_existing_local_database(tmp_path):
+    path = str(tmp_path / "old.db")
+    database = _SQLiteDatabase(path)
+    conn = database.connect()
+    conn.execute("drop index idx_transcriptions_task_id_unique")
+    conn.executemany(
+        "insert into transcriptions (task_id, status, created_at) values (?, ?, ?)",
+        [("task-1", "error", "1"), ("task-1", "completed", "1"), ("task-2", "completed", "1")],
+    )
+
+    reopened = _SQLiteDatabase(path)
+    rows = reopened.connect().execute("select task_id, status from transcriptions order by task_id").fetchall()
+    assert [tuple(row) for row in rows] == [("task-1", "completed"), ("task-2", "completed")]
+
+
+def test_delete_discards_journal_and_stored_rows(database, journal):
+    repo = WriteBehindTranscriptionRepository(SQLiteTranscriptionRepository(database), journal)
+    repo.insert(_row("task-1"))
+    repo.flush_once()
+    repo.insert(_row("task-1", corrected_text="반영 전"))
+    repo.insert(_row("task-2"))
+
+    repo.delete("task-1", "user-1")
+
+    assert repo.get("task-1", "user-1") is None
+    assert _count(database, "task-1") == 0
+    assert [row["task_id"] for row in repo.list_for_user("user-1", "task_id, created_at", 10)] == ["task-2"]
+
+
+def test_repository_interface_requires_every_method():
+    class Partial(TranscriptionRepository):
+        def insert(self, row: dict) -> None:
+            pass
+
+    with pytest.raises(TypeError):
+        Partial()
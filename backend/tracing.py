@@ -0,0 +1,367 @@
+"""
+작업 추적 - 작업(task_id)별 구조화 로그와 부모/자식 시간 구간(span)
+
+- log(): 작업 안에서는 task_id/trace_id/span_id 를 자동으로 붙임.
+  LOG_FORMAT=text(기본, "[task_id] 메시지") / json (한 줄에 JSON 하나)
+- span: upload → transcription → split / stt.chunk / diarize / correct.window / postprocess / save
+  구간마다 시작·끝 시각, 속성, 오류를 기록하고 contextvars 로 부모를 찾음 (asyncio.to_thread 안에서도 이어짐)
+- 한 작업의 구간은 API(업로드)와 워커(파이프라인) 프로세스에 나뉘므로, 작업 큐 payload 에 추적 문맥을 실어 같은 trace_id 로 이어 붙임
+- 내보내기: TRACE_EXPORT_FILE (구간마다 JSON 한 줄) / TRACE_EXPORT_URL (로컬 OpenTelemetry 수집기 OTLP/HTTP JSON)
+  둘 다 없으면 구간을 만들지 않음 (작업당 contextvar 조회 몇 번)
+- 샘플링: 작업 단위 확률(TRACE_SAMPLE_RATE) + 초당 상한(TRACE_MAX_PER_SECOND), 작업당 구간 수 상한.
+  내보내기는 백그라운드 스레드가 처리하고, 대기열이 차면 버림 (처리 경로는 기다리지 않음)
+"""
+
+import contextvars
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timezone
+
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # text | json
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "")
+# 예: http://localhost:4318/v1/traces
+TRACE_EXPORT_URL = os.getenv("TRACE_EXPORT_URL", "")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1"))
+TRACE_MAX_PER_SECOND = float(os.getenv("TRACE_MAX_PER_SECOND", "5"))
+TRACE_MAX_SPANS = 2000
+TRACE_EXPORT_QUEUE_SIZE = 1000
+SERVICE_NAME = "mallog24-api"
+
+TRACING_ENABLED = bool(TRACE_EXPORT_FILE or TRACE_EXPORT_URL)
+
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar("current_span", default=None)
+_current_task: contextvars.ContextVar[str | None] = contextvars.ContextVar("current_task", default=None)
+
+stats = {"traces_started": 0, "traces_sampled_out": 0, "spans_dropped": 0, "batches_dropped": 0, "export_errors": 0}
+
+
+# ===== 로그 =====
+
+def log(message: str, level: str = "info", task_id: str | None = None, exc_info: bool = False, **fields) -> None:
+    """구조화 로그 한 줄 (작업/구간 문맥 자동 포함). exc_info=True 면 처리 중인 예외의 traceback 포함"""
+    task_id = task_id or _current_task.get()
+    if exc_info:
+        fields["traceback"] = traceback.format_exc()
+    if LOG_FORMAT == "json":
+        record = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "level": level,
+            "msg": message,
+        }
+        if task_id:
+            record["task_id"] = task_id
+        current = _current_span.get()
+        if current is not None:
+            record["trace_id"] = current.trace.trace_id
+            record["span_id"] = current.span_id
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+    else:
+        trace_text = fields.pop("traceback", None)
+        line = f"[{task_id}] {message}" if task_id else message
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if trace_text:
+            line += "\n" + trace_text.rstrip()
+    print(line, file=sys.stderr if level == "error" else sys.stdout, flush=level == "error")
+
+
+# ===== 구간 =====
+
+def _new_id(nbytes: int) -> str:
+    return random.getrandbits(nbytes * 8).to_bytes(nbytes, "big").hex()
+
+
+class _Trace:
+    """이 프로세스에서 기록 중인 한 작업의 구간들 (로컬 최상위 구간이 끝나면 한꺼번에 내보냄)"""
+
+    __slots__ = ("trace_id", "task_id", "spans", "lock")
+
+    def __init__(self, trace_id: str, task_id: str | None):
+        self.trace_id = trace_id
+        self.task_id = task_id
+        self.spans: list[Span] = []
+        self.lock = threading.Lock()
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes", "start_ns", "end_ns", "error", "_token")
+
+    def __init__(self, trace: _Trace, name: str, parent_id: str | None, attributes: dict):
+        self.trace = trace
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+        self._token = None
+
+    def set(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end_ns = time.time_ns()
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        trace = self.trace
+        with trace.lock:
+            if len(trace.spans) < TRACE_MAX_SPANS:
+                trace.spans.append(self)
+            else:
+                stats["spans_dropped"] += 1
+        return False
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "task_id": self.trace.task_id,
+            "start": self.start_ns / 1e9,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """샘플링되지 않았거나 추적이 꺼졌을 때 (아무것도 기록하지 않음)"""
+
+    def set(self, key: str, value) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _RootSpan(Span):
+    """이 프로세스에서 작업의 첫 구간 - 끝나면 작업 문맥을 되돌리고 모인 구간을 내보냄"""
+
+    __slots__ = ("_task_token",)
+
+    def __enter__(self) -> "Span":
+        self._task_token = _current_task.set(self.trace.task_id)
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        super().__exit__(exc_type, exc, tb)
+        _current_task.reset(self._task_token)
+        with self.trace.lock:
+            spans, self.trace.spans = self.trace.spans, []
+        _exporter.submit(spans)
+        return False
+
+
+class _TaskContext:
+    """샘플링되지 않은 작업: 구간 없이 로그용 task_id 문맥만"""
+
+    __slots__ = ("task_id", "_token")
+
+    def __init__(self, task_id: str | None):
+        self.task_id = task_id
+        self._token = None
+
+    def set(self, key: str, value) -> None:
+        pass
+
+    def __enter__(self) -> "_TaskContext":
+        self._token = _current_task.set(self.task_id)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        _current_task.reset(self._token)
+        return False
+
+
+class _Sampler:
+    """확률 샘플링 + 초당 상한 (토큰 버킷)"""
+
+    def __init__(self, rate: float = TRACE_SAMPLE_RATE, max_per_second: float = TRACE_MAX_PER_SECOND):
+        self.rate = rate
+        self.max_per_second = max_per_second
+        self._tokens = max(max_per_second, 1.0)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def sample(self) -> bool:
+        if self.rate <= 0 or random.random() >= self.rate:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(max(self.max_per_second, 1.0), self._tokens + (now - self._updated) * self.max_per_second)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+_sampler = _Sampler()
+
+
+def start_trace(name: str, task_id: str | None = None, parent: dict | None = None, **attributes):
+    """
+    작업 구간 시작 (with 문). parent 는 다른 프로세스에서 넘겨받은 current_context() 값 -
+    있으면 그 샘플링 결정과 trace_id 를 따르고, 없으면 새로 샘플링
+    """
+    stats["traces_started"] += 1
+    if not TRACING_ENABLED:
+        return _TaskContext(task_id)
+    if parent is not None:
+        sampled = bool(parent.get("sampled"))
+    else:
+        sampled = _sampler.sample()
+    if not sampled:
+        stats["traces_sampled_out"] += 1
+        return _TaskContext(task_id)
+    trace = _Trace(parent["trace_id"] if parent else _new_id(16), task_id)
+    return _RootSpan(trace, name, parent.get("span_id") if parent else None, attributes)
+
+
+def span(name: str, **attributes):
+    """현재 구간의 자식 구간 (with 문). 추적 중이 아니면 아무것도 하지 않음"""
+    parent = _current_span.get()
+    if parent is None:
+        return _NOOP
+    return Span(parent.trace, name, parent.span_id, attributes)
+
+
+def current_context() -> dict | None:
+    """다른 프로세스로 넘길 추적 문맥 (작업 큐 payload 에 저장)"""
+    current = _current_span.get()
+    if current is not None:
+        return {"trace_id": current.trace.trace_id, "span_id": current.span_id, "sampled": True}
+    if TRACING_ENABLED and _current_task.get():
+        return {"sampled": False}
+    return None
+
+
+# ===== 내보내기 =====
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_payload(spans: list[Span]) -> dict:
+    otlp_spans = []
+    for item in spans:
+        attributes = dict(item.attributes)
+        if item.trace.task_id:
+            attributes["task_id"] = item.trace.task_id
+        entry = {
+            "traceId": item.trace.trace_id,
+            "spanId": item.span_id,
+            "name": item.name,
+            "kind": 1,
+            "startTimeUnixNano": str(item.start_ns),
+            "endTimeUnixNano": str(item.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()],
+            "status": {"code": 2, "message": item.error} if item.error else {"code": 1},
+        }
+        if item.parent_id:
+            entry["parentSpanId"] = item.parent_id
+        otlp_spans.append(entry)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "mallog24.tracing"}, "spans": otlp_spans}],
+        }]
+    }
+
+
+class _Exporter:
+    """내보내기 전용 스레드 (처음 쓸 때 시작). 대기열이 차면 묶음을 버림"""
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue(maxsize=TRACE_EXPORT_QUEUE_SIZE)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, spans: list[Span]) -> None:
+        if not spans:
+            return
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            stats["batches_dropped"] += 1
+
+    def _run(self) -> None:
+        while True:
+            spans = self._queue.get()
+            try:
+                self._export(spans)
+            except Exception as e:
+                stats["export_errors"] += 1
+                log(f"Trace export failed: {e}", level="warning")
+            finally:
+                self._queue.task_done()
+
+    def _export(self, spans: list[Span]) -> None:
+        if TRACE_EXPORT_FILE:
+            lines = "".join(json.dumps(item.to_dict(), ensure_ascii=False, default=str) + "\n" for item in spans)
+            # O_APPEND 한 번 쓰기 - API/워커 프로세스가 같은 파일에 써도 줄이 섞이지 않음
+            fd = os.open(TRACE_EXPORT_FILE, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, lines.encode("utf-8"))
+            finally:
+                os.close(fd)
+        if TRACE_EXPORT_URL:
+            import http_client
+
+            response = http_client.get_sync_client().post(TRACE_EXPORT_URL, json=_otlp_payload(spans))
+            response.raise_for_status()
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """대기 중인 묶음을 다 내보낼 때까지 (종료/테스트용)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+_exporter = _Exporter()
+
+
+def flush(timeout: float = 5.0) -> None:
+    _exporter.flush(timeout)
+
+
+def tracing_metrics() -> dict:
+    return {
+        "enabled": TRACING_ENABLED,
+        "sample_rate": TRACE_SAMPLE_RATE,
+        "max_per_second": TRACE_MAX_PER_SECOND,
+        "export_queue": _exporter._queue.qsize(),
+        **stats,
+    }
+
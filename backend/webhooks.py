@@ -0,0 +1,364 @@
+"""
+완료 웹훅 - 변환 작업이 끝나면 등록된 URL로 서명된 결과를 POST
+
+- 등록: 계정 단위(POST /api/webhooks) 또는 작업 단위(/api/transcribe 의 webhook_url)
+- 서명: X-Mallog24-Signature: sha256=HMAC(secret, "{timestamp}.{body}") (계정별 서명 키)
+- 전송: 워커 프로세스의 WebhookDispatcher가 발송, 실패 시 지수 백오프로 재시도
+- 전송 기록: webhook_deliveries 테이블 (GET /api/webhooks/deliveries)
+- SSRF 방지: 등록 시와 전송 시 모두 호스트를 조회해 루프백/사설/링크 로컬/예약 주소면 거부하고,
+  확인한 주소로만 접속(DNS 재바인딩 차단). 리다이렉트는 따라가지 않음 (3xx = 실패)
+
+테스트 (로컬 HTTP 대역 서버로 서명·재시도·전송 기록·SSRF 차단): tests/test_webhooks.py
+"""
+
+import asyncio
+import hashlib
+import hmac
+import http.client
+import ipaddress
+import json
+import os
+import random
+import secrets
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import urllib.parse
+import uuid
+
+import tracing
+
+WEBHOOK_DB_PATH = os.getenv("WEBHOOK_DB_PATH") or os.path.join(tempfile.gettempdir(), "mallog24_webhooks.db")
+WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", "10"))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "6"))
+WEBHOOK_RETRY_BASE_SECONDS = float(os.getenv("WEBHOOK_RETRY_BASE_SECONDS", "10"))
+WEBHOOK_RETRY_MAX_SECONDS = float(os.getenv("WEBHOOK_RETRY_MAX_SECONDS", "3600"))
+WEBHOOK_POLL_INTERVAL = float(os.getenv("WEBHOOK_POLL_INTERVAL", "2"))
+# 로컬 개발/테스트용: 1 이면 http:// 와 루프백·사설 주소 대상 허용 (운영에서는 켜지 말 것)
+WEBHOOK_ALLOW_PRIVATE = os.getenv("WEBHOOK_ALLOW_PRIVATE", "0") == "1"
+
+SIGNATURE_HEADER = "X-Mallog24-Signature"
+TIMESTAMP_HEADER = "X-Mallog24-Timestamp"
+EVENT_HEADER = "X-Mallog24-Event"
+DELIVERY_HEADER = "X-Mallog24-Delivery"
+
+
+def _is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def resolve_webhook_host(host: str, port: int, allow_private: bool | None = None) -> str:
+    """호스트 → 접속할 IP. 조회된 주소 중 하나라도 공인 주소가 아니면 ValueError"""
+    if allow_private is None:
+        allow_private = WEBHOOK_ALLOW_PRIVATE
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError):
+        raise ValueError("웹훅 주소의 호스트를 찾을 수 없습니다.")
+    addresses = list(dict.fromkeys(info[4][0] for info in infos))
+    if not addresses:
+        raise ValueError("웹훅 주소의 호스트를 찾을 수 없습니다.")
+    if not allow_private and not all(_is_public_address(address) for address in addresses):
+        raise ValueError("내부/사설 네트워크 주소로는 웹훅을 보낼 수 없습니다.")
+    return addresses[0]
+
+
+def _url_port(parsed: urllib.parse.ParseResult) -> int:
+    try:
+        port = parsed.port
+    except ValueError:
+        raise ValueError("웹훅 URL의 포트가 올바르지 않습니다.")
+    return port or (443 if parsed.scheme == "https" else 80)
+
+
+def validate_webhook_url(url: str, allow_private: bool | None = None) -> str:
+    """
+    https URL이고 호스트가 공인 주소일 때만 허용 (WEBHOOK_ALLOW_PRIVATE=1 이면 http/내부 주소도 허용).
+    잘못된 URL이면 ValueError. 호스트 조회(DNS)가 있으므로 비동기 코드에서는 스레드로 호출
+    """
+    if allow_private is None:
+        allow_private = WEBHOOK_ALLOW_PRIVATE
+    parsed = urllib.parse.urlparse((url or "").strip())
+    if not parsed.hostname or parsed.scheme not in (("https", "http") if allow_private else ("https",)):
+        raise ValueError("웹훅 URL은 https:// 주소여야 합니다.")
+    if parsed.username or parsed.password:
+        raise ValueError("웹훅 URL에 사용자 정보를 넣을 수 없습니다.")
+    resolve_webhook_host(parsed.hostname, _url_port(parsed), allow_private)
+    return parsed.geturl()
+
+
+def sign_payload(secret: str, timestamp: str, body: bytes) -> str:
+    digest = hmac.new(secret.encode("utf-8"), timestamp.encode("utf-8") + b"." + body, hashlib.sha256)
+    return f"sha256={digest.hexdigest()}"
+
+
+def verify_signature(secret: str, timestamp: str, body: bytes, signature: str) -> bool:
+    """수신 측 검증 예시 (연동 문서/자체 확인용)"""
+    return hmac.compare_digest(sign_payload(secret, timestamp, body), signature or "")
+
+
+def retry_delay(attempts: int) -> float:
+    """n번째 실패 후 대기 시간: base * 2^(n-1), 상한 적용 + ±20% 지터"""
+    delay = min(WEBHOOK_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)), WEBHOOK_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class WebhookStore:
+    """웹훅 등록 정보 + 전송 기록 (SQLite, 작업 큐와 같은 방식으로 여러 프로세스가 공유)"""
+
+    def __init__(self, db_path: str = WEBHOOK_DB_PATH, max_attempts: int = WEBHOOK_MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._connect().executescript(
+            """
+            create table if not exists webhook_endpoints (
+              user_id text primary key,
+              url text,
+              secret text not null,
+              created_at real not null,
+              updated_at real not null
+            );
+            create table if not exists webhook_deliveries (
+              id text primary key,
+              task_id text not null,
+              user_id text not null,
+              url text not null,
+              event text not null,
+              payload text not null,
+              status text not null,
+              attempts integer not null default 0,
+              next_attempt_at real not null,
+              last_status_code integer,
+              last_error text,
+              created_at real not null,
+              updated_at real not null
+            );
+            create index if not exists idx_webhook_deliveries_due on webhook_deliveries (status, next_attempt_at);
+            create index if not exists idx_webhook_deliveries_user on webhook_deliveries (user_id, created_at);
+            """
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ===== 등록 =====
+
+    def get_endpoint(self, user_id: str) -> dict | None:
+        row = self._connect().execute("select * from webhook_endpoints where user_id = ?", (user_id,)).fetchone()
+        return dict(row) if row else None
+
+    def get_secret(self, user_id: str) -> str:
+        """계정 서명 키 (없으면 생성). 작업 단위 웹훅도 같은 키로 서명"""
+        now = time.time()
+        self._connect().execute(
+            """
+            insert into webhook_endpoints (user_id, url, secret, created_at, updated_at) values (?, null, ?, ?, ?)
+            on conflict(user_id) do nothing
+            """,
+            (user_id, secrets.token_hex(32), now, now),
+        )
+        return self.get_endpoint(user_id)["secret"]
+
+    def set_endpoint(self, user_id: str, url: str | None, rotate_secret: bool = False) -> dict:
+        secret = self.get_secret(user_id)
+        if rotate_secret:
+            secret = secrets.token_hex(32)
+        self._connect().execute(
+            "update webhook_endpoints set url = ?, secret = ?, updated_at = ? where user_id = ?",
+            (url, secret, time.time(), user_id),
+        )
+        return self.get_endpoint(user_id)
+
+    # ===== 전송 기록 =====
+
+    def enqueue(self, task_id: str, user_id: str, event: str, payload: dict, url: str | None = None) -> list[str]:
+        """작업 단위 URL과 계정 URL(중복 제외)로 전송 예약. 생성된 delivery id 목록 반환"""
+        self.get_secret(user_id)
+        endpoint = self.get_endpoint(user_id)
+        urls = [target for target in dict.fromkeys([url, endpoint and endpoint["url"]]) if target]
+        now = time.time()
+        body = json.dumps(payload, ensure_ascii=False)
+        delivery_ids = []
+        for target in urls:
+            delivery_id = str(uuid.uuid4())
+            self._connect().execute(
+                """
+                insert into webhook_deliveries
+                  (id, task_id, user_id, url, event, payload, status, next_attempt_at, created_at, updated_at)
+                values (?, ?, ?, ?, ?, ?, 'pending', ?, ?, ?)
+                """,
+                (delivery_id, task_id, user_id, target, event, body, now, now, now),
+            )
+            delivery_ids.append(delivery_id)
+        return delivery_ids
+
+    def claim_due(self, limit: int = 10, lease_seconds: float = WEBHOOK_TIMEOUT * 3) -> list[dict]:
+        """전송할 차례인 기록을 가져가고, 다음 시도 시각을 리스만큼 미뤄 다른 프로세스와 중복 전송 방지"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("begin immediate")
+        try:
+            rows = conn.execute(
+                """
+                select d.*, e.secret from webhook_deliveries d
+                join webhook_endpoints e on e.user_id = d.user_id
+                where d.status = 'pending' and d.next_attempt_at <= ?
+                order by d.next_attempt_at limit ?
+                """,
+                (now, limit),
+            ).fetchall()
+            for row in rows:
+                conn.execute(
+                    "update webhook_deliveries set next_attempt_at = ?, updated_at = ? where id = ?",
+                    (now + lease_seconds, now, row["id"]),
+                )
+            conn.execute("commit")
+        except Exception:
+            conn.execute("rollback")
+            raise
+        return [dict(row) for row in rows]
+
+    def record_attempt(self, delivery_id: str, ok: bool, status_code: int | None, error: str | None) -> dict:
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute("select attempts from webhook_deliveries where id = ?", (delivery_id,)).fetchone()
+        attempts = (row["attempts"] if row else 0) + 1
+        if ok:
+            status, next_attempt_at = "delivered", now
+        elif attempts >= self.max_attempts:
+            status, next_attempt_at = "failed", now
+        else:
+            status, next_attempt_at = "pending", now + retry_delay(attempts)
+        conn.execute(
+            """
+            update webhook_deliveries set status = ?, attempts = ?, next_attempt_at = ?,
+              last_status_code = ?, last_error = ?, updated_at = ?
+            where id = ?
+            """,
+            (status, attempts, next_attempt_at, status_code, error, now, delivery_id),
+        )
+        return {"status": status, "attempts": attempts, "next_attempt_at": next_attempt_at}
+
+    def list_deliveries(self, user_id: str, limit: int = 50) -> list[dict]:
+        rows = self._connect().execute(
+            """
+            select id, task_id, url, event, status, attempts, next_attempt_at, last_status_code, last_error,
+              created_at, updated_at
+            from webhook_deliveries where user_id = ? order by created_at desc limit ?
+            """,
+            (user_id, limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def _pinned_connection(parsed: urllib.parse.ParseResult, address: str, timeout: float) -> http.client.HTTPConnection:
+    """확인한 IP 로만 접속 (Host 헤더/TLS SNI·인증서 확인은 원래 호스트 이름 그대로)"""
+    port = _url_port(parsed)
+    if parsed.scheme == "https":
+        connection = http.client.HTTPSConnection(parsed.hostname, port, timeout=timeout)
+    else:
+        connection = http.client.HTTPConnection(parsed.hostname, port, timeout=timeout)
+    connection._create_connection = lambda _address, *args, **kwargs: socket.create_connection(
+        (address, port), *args, **kwargs
+    )
+    return connection
+
+
+def send_webhook(
+    delivery: dict, timeout: float = WEBHOOK_TIMEOUT, allow_private: bool | None = None
+) -> tuple[bool, int | None, str | None]:
+    """
+    서명 헤더를 붙여 POST. (성공 여부, HTTP 상태 코드, 오류 메시지) 반환. 2xx만 성공.
+    전송 직전에 호스트를 다시 확인하고(등록 후 DNS 변경 대비) 리다이렉트는 따라가지 않음
+    """
+    body = delivery["payload"].encode("utf-8")
+    timestamp = str(int(time.time()))
+    headers = {
+        "Content-Type": "application/json",
+        "User-Agent": "mallog24-webhook/1",
+        EVENT_HEADER: delivery["event"],
+        DELIVERY_HEADER: delivery["id"],
+        TIMESTAMP_HEADER: timestamp,
+        SIGNATURE_HEADER: sign_payload(delivery["secret"], timestamp, body),
+    }
+    try:
+        validate_webhook_url(delivery["url"], allow_private)
+        parsed = urllib.parse.urlparse(delivery["url"])
+        address = resolve_webhook_host(parsed.hostname, _url_port(parsed), allow_private)
+        connection = _pinned_connection(parsed, address, timeout)
+        try:
+            path = (parsed.path or "/") + (f"?{parsed.query}" if parsed.query else "")
+            connection.request("POST", path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read(65536)
+            status = response.status
+        finally:
+            connection.close()
+    except ValueError as e:
+        return False, None, f"blocked: {e}"
+    except Exception as e:
+        return False, None, str(e)[:500]
+    if 200 <= status < 300:
+        return True, status, None
+    if 300 <= status < 400:
+        return False, status, f"HTTP {status} (redirect not followed)"
+    return False, status, f"HTTP {status}"
+
+
+class WebhookDispatcher:
+    """전송 예약된 웹훅을 주기적으로 가져가 발송 (워커 프로세스에서 실행)"""
+
+    def __init__(self, store: WebhookStore, poll_interval: float = WEBHOOK_POLL_INTERVAL, sender=send_webhook):
+        self.store = store
+        self.poll_interval = poll_interval
+        self.sender = sender
+        self._task: asyncio.Task | None = None
+
+    async def _deliver(self, delivery: dict) -> None:
+        ok, status_code, error = await asyncio.to_thread(self.sender, delivery)
+        result = await asyncio.to_thread(self.store.record_attempt, delivery["id"], ok, status_code, error)
+        if not ok:
+            tracing.log(
+                f"Webhook {delivery['event']} -> {delivery['url']} failed "
+                f"({error}); attempt {result['attempts']}, now {result['status']}",
+                level="warning",
+                task_id=delivery["task_id"],
+            )
+
+    async def run_once(self) -> int:
+        deliveries = await asyncio.to_thread(self.store.claim_due)
+        await asyncio.gather(*(self._deliver(delivery) for delivery in deliveries))
+        return len(deliveries)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                if await self.run_once():
+                    continue
+            except Exception as e:
+                tracing.log(f"Webhook dispatch error: {e}", level="error")
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
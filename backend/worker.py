@@ -0,0 +1,227 @@
+"""
+변환 워커 - 작업 큐에서 작업을 가져와 Whisper/pydub/Gemini 파이프라인 실행 (+ 완료 웹훅 전송)
+
+API 서버와 분리해 실행:
+    python -m worker                      # 워커 1프로세스, 동시 작업 WORKER_CONCURRENCY개
+    python -m worker --processes 2 --concurrency 3
+
+API 서버는 EMBEDDED_WORKERS=0 으로 실행하면 HTTP 처리만 담당한다.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import uuid
+
+import metrics
+import tracing
+from job_queue import JobQueue, JOB_LEASE_SECONDS
+from webhooks import WebhookDispatcher
+from write_behind import WriteBehindFlusher
+
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "2"))
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "1"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+JOB_CANCEL_POLL_INTERVAL = float(os.getenv("JOB_CANCEL_POLL_INTERVAL", "1"))
+# 분리 실행 워커의 /metrics 포트 (0이면 노출 안 함, 여러 프로세스면 프로세스마다 +1)
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "0"))
+
+
+def make_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class JobWorker:
+    """
+    큐 claim → handler(job) 실행 → 완료 기록.
+    handler는 최종 상태("completed"/"error")를 반환하는 코루틴.
+    on_exhausted(job)는 재시도 한도를 넘기거나 handler 예외로 오류 처리된 작업마다 호출된다 (job["error"]에 사유).
+    on_cancel(task_id)는 처리 중인 작업의 취소가 확인되면 호출된다 (파이프라인이 다음 확인 지점에서 중단).
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler,
+        concurrency: int = WORKER_CONCURRENCY,
+        worker_id: str | None = None,
+        on_exhausted=None,
+        on_cancel=None,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.on_exhausted = on_exhausted
+        self.on_cancel = on_cancel
+        self.concurrency = concurrency
+        self.worker_id = worker_id or make_worker_id()
+        self._tasks: list[asyncio.Task] = []
+
+    async def _heartbeat(self, task_id: str) -> None:
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            if not await asyncio.to_thread(self.queue.heartbeat, task_id, self.worker_id):
+                tracing.log("Lease lost (claimed by another worker?)", level="warning", task_id=task_id)
+                return
+
+    async def _watch_cancel(self, task_id: str) -> None:
+        while True:
+            await asyncio.sleep(JOB_CANCEL_POLL_INTERVAL)
+            if await asyncio.to_thread(self.queue.is_cancelled, task_id):
+                tracing.log("Cancellation requested", task_id=task_id)
+                if self.on_cancel:
+                    self.on_cancel(task_id)
+                return
+
+    async def _run_job(self, job: dict) -> None:
+        task_id = job["task_id"]
+        tracing.log(f"Claimed by {self.worker_id} (attempt {job['attempts']})", task_id=task_id)
+
+        heartbeat = asyncio.create_task(self._heartbeat(task_id))
+        cancel_watch = asyncio.create_task(self._watch_cancel(task_id))
+        error = None
+        try:
+            final_status = await self.handler(job)
+        except asyncio.CancelledError:
+            # 종료 중: 다른 워커/재시작 후 바로 이어받도록 대기열로 되돌림
+            try:
+                await asyncio.to_thread(self.queue.release, task_id, self.worker_id)
+            except Exception as e:
+                tracing.log(f"Job release failed: {e}", level="error", task_id=task_id)
+            raise
+        except Exception as e:
+            # handler 가 처리하지 못한 예외: 작업은 오류로 끝내고 슬롯은 계속 돈다
+            tracing.log(f"Job handler failed: {e}", level="error", task_id=task_id, exc_info=True)
+            final_status, error = "error", str(e)
+            if self.on_exhausted:
+                try:
+                    self.on_exhausted({**job, "error": error})
+                except Exception as callback_error:
+                    tracing.log(f"Failure callback failed: {callback_error}", level="error", task_id=task_id)
+        finally:
+            heartbeat.cancel()
+            cancel_watch.cancel()
+
+        try:
+            await asyncio.to_thread(self.queue.complete, task_id, self.worker_id, final_status, error)
+        except Exception as e:
+            # 기록 실패 시 리스 만료 후 다른 워커가 다시 가져감
+            tracing.log(f"Job complete failed ({final_status}): {e}", level="error", task_id=task_id)
+
+    async def _loop(self, slot: int) -> None:
+        """큐에서 작업을 가져와 처리하는 루프 (리스 만료 작업도 자동 회수)"""
+        while True:
+            try:
+                for failed in await asyncio.to_thread(self.queue.fail_exhausted):
+                    tracing.log(f"Giving up after {failed['attempts']} attempts", level="error", task_id=failed["task_id"])
+                    if self.on_exhausted:
+                        self.on_exhausted(failed)
+                job = await asyncio.to_thread(self.queue.claim, self.worker_id)
+            except Exception as e:
+                tracing.log(f"Job claim error (slot {slot}): {e}", level="error")
+                job = None
+
+            if not job:
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+                continue
+
+            try:
+                await self._run_job(job)
+            except Exception as e:
+                tracing.log(f"Job slot error (slot {slot}): {e}", level="error", task_id=job["task_id"], exc_info=True)
+
+    def start(self) -> None:
+        for slot in range(self.concurrency):
+            self._tasks.append(asyncio.create_task(self._loop(slot)))
+        tracing.log(f"Job workers started: {self.concurrency} ({self.worker_id})")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+
+async def _serve(concurrency: int, metrics_port: int = 0) -> None:
+    # 파이프라인(main)은 워커 프로세스 안에서만 불러온다
+    import main
+
+    metrics_server = metrics.start_http_server(metrics_port) if metrics_port else None
+    lag_monitor = metrics.start_event_loop_monitor()
+
+    main._cleanup_orphan_uploads()
+    worker = JobWorker(
+        main.job_queue,
+        main.run_transcription_job,
+        concurrency,
+        on_exhausted=main.mark_exhausted_job_failed,
+        on_cancel=main.request_cancel,
+    )
+    worker.start()
+    webhook_dispatcher = WebhookDispatcher(main.webhook_store)
+    webhook_dispatcher.start()
+    write_behind_flusher = WriteBehindFlusher(main.transcription_writer) if main.transcription_writer else None
+    if write_behind_flusher:
+        write_behind_flusher.start()
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            pass
+
+    await stop_event.wait()
+    tracing.log(f"Stopping worker {worker.worker_id}...")
+    await worker.stop()
+    await webhook_dispatcher.stop()
+    if write_behind_flusher:
+        await write_behind_flusher.stop()
+    if lag_monitor:
+        lag_monitor.cancel()
+    if metrics_server:
+        metrics_server.shutdown()
+
+
+def _run_process(concurrency: int, metrics_port: int = 0) -> None:
+    asyncio.run(_serve(concurrency, metrics_port))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="말로그24 변환 워커")
+    parser.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY, help="프로세스당 동시 작업 수")
+    parser.add_argument("--processes", type=int, default=WORKER_PROCESSES, help="워커 프로세스 수")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        _run_process(args.concurrency, WORKER_METRICS_PORT)
+        return
+
+    processes = [
+        multiprocessing.Process(
+            target=_run_process,
+            args=(args.concurrency, WORKER_METRICS_PORT + index if WORKER_METRICS_PORT else 0),
+            daemon=False,
+        )
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def _forward_signal(signum, frame):
+        # 자식 워커에 종료 신호 전달 → 각자 처리 중 작업을 대기열로 되돌림
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, _forward_signal)
+    signal.signal(signal.SIGINT, _forward_signal)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
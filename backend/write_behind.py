@@ -0,0 +1,352 @@
+"""
+변환 기록 write-behind - 작업 완료/오류 행을 로컬 저널에 먼저 기록하고 모아서 일괄 저장
+
+예배 직후처럼 작업이 몰려 끝나면 작업마다 Supabase insert 왕복을 기다리던 것을,
+- 저장: 로컬 SQLite 저널(WAL, synchronous=FULL)에 추가하고 바로 반환 → 프로세스가 죽어도 유실 없음
+- 반영: WriteBehindFlusher 가 WRITE_BEHIND_FLUSH_INTERVAL 마다(가득 차면 즉시) 최대 WRITE_BEHIND_MAX_BATCH 행씩 일괄 insert
+- 조회: 아직 반영 전인 행도 저널에서 함께 읽어 get/목록에 보인다
+- 여러 프로세스(API/워커)가 같은 저널을 공유하며, 가져간 묶음은 리스 동안 다른 프로세스가 건드리지 않음
+- 일괄 저장이 실패하면 행별로 다시 시도해 문제 행만 지수 백오프로 재시도
+- WRITE_BEHIND_MAX_ATTEMPTS 번 실패한 행은 dead-letter 로 옮겨 더 시도하지 않음 (저널에 남아 조회는 됨,
+  대기 행 수에서는 빠짐). 원인을 고친 뒤 requeue_dead() 로 다시 반영
+
+리스가 끝난 뒤 재시도하는 경우가 있어 반영은 최소 1회(at-least-once)다.
+저장소 쓰기는 task_id 기준 upsert 라서 같은 행을 다시 반영해도 중복 행이 생기지 않는다.
+상태 전이(status_store)는 비교-교체 결과가 필요해 일괄 처리하지 않는다.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import tracing
+from repository import TranscriptionRepository, parse_columns, TRANSCRIPTION_COLUMNS
+
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "1") != "0"
+WRITE_BEHIND_DB_PATH = os.getenv("WRITE_BEHIND_DB_PATH") or os.path.join(tempfile.gettempdir(), "mallog24_write_journal.db")
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "0.5"))
+WRITE_BEHIND_MAX_BATCH = int(os.getenv("WRITE_BEHIND_MAX_BATCH", "50"))
+WRITE_BEHIND_LEASE_SECONDS = 60.0
+WRITE_BEHIND_RETRY_BASE_SECONDS = 2.0
+WRITE_BEHIND_RETRY_MAX_SECONDS = 300.0
+# 이 횟수만큼 실패하면 dead-letter (백오프 상한 기준 약 20분)
+WRITE_BEHIND_MAX_ATTEMPTS = int(os.getenv("WRITE_BEHIND_MAX_ATTEMPTS", "10"))
+# 종료 시 남은 행을 비우는 최대 시간 (초과분은 다음 시작 때 반영)
+WRITE_BEHIND_DRAIN_SECONDS = 10.0
+
+
+class WriteJournal:
+    """반영 대기 행 저널 (SQLite). 행 하나 = 저장할 transcriptions 행 하나"""
+
+    def __init__(self, db_path: str = WRITE_BEHIND_DB_PATH, max_attempts: int = WRITE_BEHIND_MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._connect().executescript(
+            """
+            create table if not exists write_journal (
+              id integer primary key autoincrement,
+              task_id text not null,
+              user_id text,
+              created_at text,
+              row text not null,
+              attempts integer not null default 0,
+              next_attempt_at real not null,
+              last_error text,
+              enqueued_at real not null,
+              dead_at real
+            );
+            create index if not exists idx_write_journal_due on write_journal (next_attempt_at, id);
+            create index if not exists idx_write_journal_task on write_journal (task_id);
+            create index if not exists idx_write_journal_user on write_journal (user_id, created_at);
+            """
+        )
+        columns = {row["name"] for row in self._connect().execute("pragma table_info(write_journal)")}
+        if "dead_at" not in columns:  # 이전 버전 저널
+            self._connect().execute("alter table write_journal add column dead_at real")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            # 커밋이 디스크에 닿은 뒤 반환 (저장 직후 죽어도 유실 없음)
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, row: dict) -> int:
+        now = time.time()
+        cursor = self._connect().execute(
+            """
+            insert into write_journal (task_id, user_id, created_at, row, next_attempt_at, enqueued_at)
+            values (?, ?, ?, ?, ?, ?)
+            """,
+            (row["task_id"], row.get("user_id"), row.get("created_at"), json.dumps(row, ensure_ascii=False), now, now),
+        )
+        return cursor.lastrowid
+
+    def claim(self, limit: int = WRITE_BEHIND_MAX_BATCH, lease_seconds: float = WRITE_BEHIND_LEASE_SECONDS) -> list[dict]:
+        """반영할 차례인 행을 가져가고, 다음 시도 시각을 리스만큼 미뤄 다른 프로세스와 중복 반영 방지"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("begin immediate")
+        try:
+            rows = conn.execute(
+                """
+                select id, row, attempts from write_journal
+                where dead_at is null and next_attempt_at <= ? order by id limit ?
+                """,
+                (now, limit),
+            ).fetchall()
+            if rows:
+                placeholders = ", ".join("?" for _ in rows)
+                conn.execute(
+                    f"update write_journal set next_attempt_at = ? where id in ({placeholders})",
+                    (now + lease_seconds, *(row["id"] for row in rows)),
+                )
+            conn.execute("commit")
+        except Exception:
+            conn.execute("rollback")
+            raise
+        return [{"id": row["id"], "attempts": row["attempts"], "row": json.loads(row["row"])} for row in rows]
+
+    def ack(self, entry_ids: list[int]) -> None:
+        if not entry_ids:
+            return
+        placeholders = ", ".join("?" for _ in entry_ids)
+        self._connect().execute(f"delete from write_journal where id in ({placeholders})", tuple(entry_ids))
+
+    def retry_later(self, entry_id: int, attempts: int, error: str) -> bool:
+        """실패 기록 + 백오프. max_attempts 에 닿으면 dead-letter 로 옮기고 True 반환"""
+        now = time.time()
+        if attempts >= self.max_attempts:
+            self._connect().execute(
+                "update write_journal set attempts = ?, last_error = ?, dead_at = ? where id = ?",
+                (attempts, error[:500], now, entry_id),
+            )
+            return True
+        delay = min(WRITE_BEHIND_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)), WRITE_BEHIND_RETRY_MAX_SECONDS)
+        self._connect().execute(
+            "update write_journal set attempts = ?, next_attempt_at = ?, last_error = ? where id = ?",
+            (attempts, now + delay, error[:500], entry_id),
+        )
+        return False
+
+    def discard(self, task_id: str, user_id: str) -> int:
+        """아직 반영 전인 작업 행 버리기 (dead-letter 포함). 지운 행 수 반환"""
+        cursor = self._connect().execute(
+            "delete from write_journal where task_id = ? and user_id = ?", (task_id, user_id)
+        )
+        return cursor.rowcount
+
+    def requeue_dead(self) -> int:
+        """dead-letter 행을 다시 반영 대상으로 (시도 횟수 초기화). 옮긴 행 수 반환"""
+        cursor = self._connect().execute(
+            "update write_journal set dead_at = null, attempts = 0, next_attempt_at = ? where dead_at is not null",
+            (time.time(),),
+        )
+        return cursor.rowcount
+
+    def pending_for_task(self, task_id: str, user_id: str) -> list[dict]:
+        """반영 전 행 (dead-letter 포함), 최신 행부터"""
+        rows = self._connect().execute(
+            "select row from write_journal where task_id = ? and user_id = ? order by id desc",
+            (task_id, user_id),
+        ).fetchall()
+        return [json.loads(row["row"]) for row in rows]
+
+    def pending_for_user(self, user_id: str) -> list[dict]:
+        """사용자의 반영 전 행 (dead-letter 포함), 작업마다 최신 행 하나"""
+        rows = self._connect().execute(
+            "select row from write_journal where user_id = ? order by id", (user_id,)
+        ).fetchall()
+        latest = {}
+        for row in rows:
+            record = json.loads(row["row"])
+            latest[record["task_id"]] = record
+        return list(latest.values())
+
+    def metrics(self) -> dict:
+        row = self._connect().execute(
+            """
+            select count(*) filter (where dead_at is null) as pending,
+              count(*) filter (where dead_at is not null) as dead,
+              min(enqueued_at) filter (where dead_at is null) as oldest,
+              max(attempts) filter (where dead_at is null) as max_attempts
+            from write_journal
+            """
+        ).fetchone()
+        return {
+            "pending": row["pending"],
+            "dead_letter": row["dead"],
+            "oldest_age_seconds": round(time.time() - row["oldest"], 3) if row["oldest"] else None,
+            "max_attempts": row["max_attempts"] or 0,
+        }
+
+
+def _project(row: dict, columns: str) -> dict:
+    return {column: row.get(column) for column in parse_columns(columns, TRANSCRIPTION_COLUMNS)}
+
+
+def _sort_key(row: dict) -> tuple[str, str]:
+    return (row.get("created_at") or "", row.get("task_id") or "")
+
+
+class WriteBehindTranscriptionRepository(TranscriptionRepository):
+    """insert 는 저널에 기록하고 반환, 반영은 flush_once (WriteBehindFlusher) 가 일괄로"""
+
+    def __init__(self, backend: TranscriptionRepository, journal: WriteJournal | None = None,
+                 max_batch: int = WRITE_BEHIND_MAX_BATCH):
+        self.backend = backend
+        self.journal = journal or WriteJournal()
+        self.max_batch = max_batch
+        self.stats = {"enqueued": 0, "flushed": 0, "batches": 0, "failures": 0, "dead_lettered": 0}
+
+    def has_column(self, column: str) -> bool:
+        return self.backend.has_column(column)
+
+    def insert(self, row: dict) -> None:
+        self.journal.append(row)
+        self.stats["enqueued"] += 1
+
+    def insert_many(self, rows: list[dict]) -> None:
+        for row in rows:
+            self.insert(row)
+
+    def delete(self, task_id: str, user_id: str) -> None:
+        # 다른 프로세스가 이미 가져가 반영 중인 묶음은 막지 못함 (반영 주기 안의 짧은 구간)
+        self.journal.discard(task_id, user_id)
+        self.backend.delete(task_id, user_id)
+
+    def get(self, task_id: str, user_id: str, columns: str = "*") -> dict | None:
+        pending = self.journal.pending_for_task(task_id, user_id)
+        if pending:
+            return _project(pending[0], columns)
+        return self.backend.get(task_id, user_id, columns)
+
+    def list_for_user(
+        self, user_id: str, columns: str, limit: int, cursor: tuple[str, str] | None = None
+    ) -> list[dict]:
+        """저장소 목록 + 반영 전 행을 (created_at, task_id) 순으로 합침 (columns 에 두 컬럼 포함 필요)"""
+        rows = self.backend.list_for_user(user_id, columns, limit, cursor)
+        pending = self.journal.pending_for_user(user_id)
+        if cursor:
+            pending = [row for row in pending if _sort_key(row) < tuple(cursor)]
+        if not pending:
+            return rows
+        # 반영 도중(이미 저장됐지만 저널에서 아직 안 지운) 행은 한 번만
+        stored_ids = {row.get("task_id") for row in rows}
+        merged = rows + [_project(row, columns) for row in pending if row["task_id"] not in stored_ids]
+        merged.sort(key=_sort_key, reverse=True)
+        return merged[:limit]
+
+    # ===== 반영 =====
+
+    def flush_once(self) -> int:
+        """저널에서 한 묶음을 가져가 일괄 저장. 반영한 행 수 반환"""
+        entries = self.journal.claim(self.max_batch)
+        if not entries:
+            return 0
+        # 같은 작업 행이 여러 개면(오류 후 재시도 등) 마지막 행만 보냄 - 한 upsert 안에 같은 키가 두 번이면 실패
+        latest = {entry["row"]["task_id"]: entry for entry in entries}
+        superseded = [entry["id"] for entry in entries if latest[entry["row"]["task_id"]] is not entry]
+        if superseded:
+            self.journal.ack(superseded)
+            entries = list(latest.values())
+        try:
+            self.backend.insert_many([entry["row"] for entry in entries])
+            self.journal.ack([entry["id"] for entry in entries])
+            self.stats["flushed"] += len(entries)
+            self.stats["batches"] += 1
+            return len(entries)
+        except Exception as e:
+            if len(entries) == 1:
+                self._fail(entries[0], e)
+                return 0
+            tracing.log(f"Write-behind batch of {len(entries)} failed, retrying row by row: {e}", level="warning")
+
+        flushed = 0
+        for entry in entries:
+            try:
+                self.backend.insert(entry["row"])
+            except Exception as e:
+                self._fail(entry, e)
+                continue
+            self.journal.ack([entry["id"]])
+            flushed += 1
+        self.stats["flushed"] += flushed
+        return flushed
+
+    def _fail(self, entry: dict, error: Exception) -> None:
+        attempts = entry["attempts"] + 1
+        self.stats["failures"] += 1
+        tracing.log(
+            f"Write-behind insert failed (attempt {attempts}): {error}",
+            level="warning",
+            task_id=entry["row"].get("task_id"),
+        )
+        if self.journal.retry_later(entry["id"], attempts, str(error)):
+            self.stats["dead_lettered"] += 1
+            tracing.log(
+                f"Write-behind row moved to dead-letter after {attempts} attempts",
+                level="error",
+                task_id=entry["row"].get("task_id"),
+            )
+
+    def metrics(self) -> dict:
+        return {**self.stats, **self.journal.metrics()}
+
+
+def find_write_behind(repository) -> WriteBehindTranscriptionRepository | None:
+    """캐시 등으로 감싼 저장소에서 write-behind 계층 찾기"""
+    while repository is not None:
+        if isinstance(repository, WriteBehindTranscriptionRepository):
+            return repository
+        repository = getattr(repository, "backend", None)
+    return None
+
+
+class WriteBehindFlusher:
+    """저널을 주기적으로 비우는 백그라운드 작업 (API/워커 프로세스마다 하나)"""
+
+    def __init__(self, repository: WriteBehindTranscriptionRepository,
+                 flush_interval: float = WRITE_BEHIND_FLUSH_INTERVAL):
+        self.repository = repository
+        self.flush_interval = flush_interval
+        self._task: asyncio.Task | None = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                flushed = await asyncio.to_thread(self.repository.flush_once)
+                if flushed >= self.repository.max_batch:
+                    continue  # 밀린 행이 더 있음
+            except Exception as e:
+                tracing.log(f"Write-behind flush error: {e}", level="error")
+            await asyncio.sleep(self.flush_interval)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # 종료 전에 남은 행을 최대한 반영 (남으면 저널에 그대로 있다가 다음 시작 때 반영)
+        deadline = time.monotonic() + WRITE_BEHIND_DRAIN_SECONDS
+        while time.monotonic() < deadline:
+            try:
+                if not await asyncio.to_thread(self.repository.flush_once):
+                    break
+            except Exception as e:
+                tracing.log(f"Write-behind drain error: {e}", level="error")
+                break
+
@@ -79,6 +79,10 @@ export default function Home({ darkMode, setDarkMode }) {
   const [error, setError] = useState(null)
   const [notice, setNotice] = useState(null)
   const [history, setHistory] = useState([])
+  const [historyCursor, setHistoryCursor] = useState(null)
+  const [searchQuery, setSearchQuery] = useState('')
+  const [searchResults, setSearchResults] = useState(null)
+  const [searching, setSearching] = useState(false)
   const [currentStep, setCurrentStep] = useState(0)
   const [dragOver, setDragOver] = useState(false)
   const [showHistory, setShowHistory] = useState(false)
@@ -93,11 +97,18 @@ export default function Home({ darkMode, setDarkMode }) {
   const [authToken, setAuthToken] = useState('')
   const [authUser, setAuthUser] = useState(null)
   const [savedRecords, setSavedRecords] = useState([])
+  const [recordsCursor, setRecordsCursor] = useState(null)
+  const [openRecordId, setOpenRecordId] = useState(null)
+  const [recordContents, setRecordContents] = useState({})
   const [recordDrafts, setRecordDrafts] = useState({})
   const [draftLoadingCategory, setDraftLoadingCategory] = useState('')
   const [savingCategory, setSavingCategory] = useState('')
 
   const pollInterval = useRef(null)
+  const statusStream = useRef(null)
+  const currentTaskId = useRef(null)
+  const partialState = useRef({ revision: null, segments: [] })
+  const [partialText, setPartialText] = useState('')
   const fileInputRef = useRef(null)
   const pollStartTime = useRef(null)
   const API_URL = process.env.NEXT_PUBLIC_API_URL || 'https://darakbang-transcription-production.up.railway.app'
@@ -143,22 +154,61 @@ export default function Home({ darkMode, setDarkMode }) {
     return { Authorization: `Bearer ${token}` }
   }
 
-  const fetchHistory = async (token = authToken) => {
+  const fetchHistory = async (token = authToken, cursor = null) => {
     if (!token) {
       setHistory([])
+      setHistoryCursor(null)
       return
     }
     try {
-      const res = await fetch(`${API_URL}/api/history`, {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : ''
+      const res = await fetch(`${API_URL}/api/history${query}`, {
         headers: getAuthHeaders(token),
       })
       if (!res.ok) throw new Error('변환 기록을 불러오지 못했습니다.')
-      setHistory(await res.json())
+      const data = await res.json()
+      setHistory((prev) => (cursor ? [...prev, ...data.items] : data.items))
+      setHistoryCursor(data.next_cursor)
     } catch (e) {
       console.error("Failed to fetch history", e)
     }
   }
 
+  const handleSearch = async (e) => {
+    e.preventDefault()
+    const query = searchQuery.trim()
+    if (!query) {
+      setSearchResults(null)
+      return
+    }
+    setSearching(true)
+    try {
+      const res = await fetch(`${API_URL}/api/search?q=${encodeURIComponent(query)}`, {
+        headers: getAuthHeaders(),
+      })
+      const data = await res.json()
+      if (!res.ok) throw new Error(data.detail || '검색하지 못했습니다.')
+      setSearchResults(data.items)
+    } catch (e) {
+      setError(e.message)
+    } finally {
+      setSearching(false)
+    }
+  }
+
+  const renderSnippet = (item) => {
+    const parts = []
+    let position = 0
+    item.highlights.forEach(([start, end]) => {
+      if (start < position) return
+      parts.push(item.snippet.slice(position, start))
+      parts.push(<mark key={start} className="bg-amber-100 dark:bg-amber-500/30 text-inherit rounded px-0.5">{item.snippet.slice(start, end)}</mark>)
+      position = end
+    })
+    parts.push(item.snippet.slice(position))
+    return parts
+  }
+
   const fetchCurrentUser = async (token = authToken) => {
     if (!token) return
     try {
@@ -173,7 +223,10 @@ export default function Home({ darkMode, setDarkMode }) {
       setAuthToken('')
       setAuthUser(null)
       setSavedRecords([])
+      setRecordsCursor(null)
+      setRecordContents({})
       setHistory([])
+      setHistoryCursor(null)
       setResult(null)
       setRecordDrafts({})
       setShowHistory(false)
@@ -183,25 +236,51 @@ export default function Home({ darkMode, setDarkMode }) {
     }
   }
 
-  const fetchSavedRecords = async (token = authToken) => {
+  const fetchSavedRecords = async (token = authToken, cursor = null) => {
     if (!token) return
     try {
-      const res = await fetch(`${API_URL}/api/records`, {
+      const params = new URLSearchParams({ view: 'list' })
+      if (cursor) params.set('cursor', cursor)
+      const res = await fetch(`${API_URL}/api/records?${params}`, {
         headers: getAuthHeaders(token),
       })
       if (!res.ok) throw new Error('저장 기록을 불러오지 못했습니다.')
       const data = await res.json()
-      setSavedRecords(Array.isArray(data) ? data : [])
+      setSavedRecords((prev) => (cursor ? [...prev, ...data.items] : data.items))
+      setRecordsCursor(data.next_cursor)
     } catch (e) {
       console.error("Failed to fetch saved records", e)
     }
   }
 
+  const handleToggleRecord = async (recordId) => {
+    if (openRecordId === recordId) {
+      setOpenRecordId(null)
+      return
+    }
+    setOpenRecordId(recordId)
+    if (recordContents[recordId] !== undefined) return
+    try {
+      const res = await fetch(`${API_URL}/api/records/${recordId}`, {
+        headers: getAuthHeaders(),
+      })
+      if (!res.ok) throw new Error('저장 기록을 불러오지 못했습니다.')
+      const record = await res.json()
+      setRecordContents((prev) => ({ ...prev, [recordId]: record.content }))
+    } catch (e) {
+      console.error("Failed to fetch saved record", e)
+    }
+  }
+
   const stopPolling = () => {
     if (pollInterval.current) {
       clearInterval(pollInterval.current)
       pollInterval.current = null
     }
+    if (statusStream.current) {
+      statusStream.current.close()
+      statusStream.current = null
+    }
   }
 
   const validateAndSetFile = (selectedFile) => {
@@ -237,6 +316,74 @@ export default function Home({ darkMode, setDarkMode }) {
     setDragOver(false)
   }, [])
 
+  // 부분 결과: since_revision 이후 바뀐 구간만 받아 index 위치에 덮어씀
+  const mergePartial = (partial) => {
+    if (!partial) return
+    const segments = partialState.current.segments.slice(0, partial.segment_count)
+    partial.segments.forEach((segment) => {
+      segments[segment.index] = segment
+    })
+    partialState.current = { revision: partial.revision, segments }
+    setPartialText(segments.filter(Boolean).map((segment) => segment.text).join('\n\n'))
+  }
+
+  const resetPartial = () => {
+    partialState.current = { revision: null, segments: [] }
+    setPartialText('')
+  }
+
+  const handleStatusUpdate = (data) => {
+    if (data.status === 'completed' || data.status === 'error' || data.status === 'not_found') resetPartial()
+    mergePartial(data.partial)
+    if (data.status === 'completed') {
+      stopPolling()
+      setCurrentStep(3)
+      setTimeout(() => {
+        setResult(data)
+        setLoading(false)
+        setCurrentStep(0)
+        fetchHistory()
+      }, 800)
+    } else if (data.status === 'error') {
+      stopPolling()
+      setError(data.error || '변환 중 오류가 발생했습니다.')
+      setLoading(false)
+      setCurrentStep(0)
+    } else if (data.status === 'not_found') {
+      stopPolling()
+      setError('작업을 찾을 수 없습니다. 다시 업로드해 주세요.')
+      setLoading(false)
+      setCurrentStep(0)
+    } else if (data.status === 'cancelled') {
+      stopPolling()
+      resetPartial()
+      setNotice('변환 작업이 취소되었습니다.')
+      setLoading(false)
+      setCurrentStep(0)
+    } else if (data.status === 'processing') {
+      setCurrentStep(3)
+    }
+  }
+
+  const handleCancelTask = async () => {
+    const taskId = currentTaskId.current
+    if (!taskId) return
+    try {
+      const res = await fetch(`${API_URL}/api/tasks/${taskId}`, {
+        method: 'DELETE',
+        headers: getAuthHeaders(),
+      })
+      if (res.ok) {
+        handleStatusUpdate({ task_id: taskId, status: 'cancelled' })
+      } else {
+        const data = await res.json()
+        setError(data.detail || '작업을 취소하지 못했습니다.')
+      }
+    } catch (e) {
+      setError('작업을 취소하지 못했습니다.')
+    }
+  }
+
   const startPolling = (taskId) => {
     stopPolling()
     pollStartTime.current = Date.now()
@@ -247,36 +394,70 @@ export default function Home({ darkMode, setDarkMode }) {
         const elapsed = Date.now() - pollStartTime.current
         if (elapsed > 3000) setCurrentStep(prev => Math.max(prev, 2))
 
-        const res = await fetch(`${API_URL}/api/status/${taskId}`, {
+        const revision = partialState.current.revision
+        const query = revision === null ? '' : `?since_revision=${revision}`
+        const res = await fetch(`${API_URL}/api/status/${taskId}${query}`, {
           headers: getAuthHeaders(),
         })
         if (!res.ok) return
 
-        const data = await res.json()
-
-        if (data.status === 'completed') {
-          stopPolling()
-          setCurrentStep(3)
-          setTimeout(() => {
-            setResult(data)
-            setLoading(false)
-            setCurrentStep(0)
-            fetchHistory()
-          }, 800)
-        } else if (data.status === 'error') {
-          stopPolling()
-          setError(data.error || '변환 중 오류가 발생했습니다.')
-          setLoading(false)
-          setCurrentStep(0)
-        } else if (data.status === 'processing') {
-          setCurrentStep(3)
-        }
+        handleStatusUpdate(await res.json())
       } catch (e) {
         console.error("Polling error", e)
       }
     }, 2000)
   }
 
+  // 상태 스트림(SSE): 연결당 1회 인증, 끊기면 브라우저가 Last-Event-ID로 자동 재연결
+  const startStatusStream = async (taskId) => {
+    resetPartial()
+    if (typeof window === 'undefined' || !window.EventSource) {
+      startPolling(taskId)
+      return
+    }
+
+    stopPolling()
+    setCurrentStep(2)
+    // 사용자 토큰 대신 이 작업 전용 단기 스트림 토큰을 URL에 사용
+    let streamToken = null
+    try {
+      const res = await fetch(`${API_URL}/api/status/${taskId}/stream-token`, {
+        method: 'POST',
+        headers: getAuthHeaders(),
+      })
+      if (res.ok) streamToken = (await res.json()).stream_token
+    } catch (e) {
+      console.error("Stream token error", e)
+    }
+    if (!streamToken) {
+      startPolling(taskId)
+      return
+    }
+    const source = new EventSource(
+      `${API_URL}/api/status/${taskId}/stream?stream_token=${encodeURIComponent(streamToken)}`
+    )
+    statusStream.current = source
+
+    source.addEventListener('status', (event) => {
+      try {
+        handleStatusUpdate(JSON.parse(event.data))
+      } catch (e) {
+        console.error("Status stream error", e)
+      }
+    })
+    source.addEventListener('end', () => {
+      source.close()
+      if (statusStream.current === source) statusStream.current = null
+    })
+    source.onerror = () => {
+      // 인증 실패 등으로 재연결을 포기한 경우 폴링으로 전환
+      if (source.readyState === EventSource.CLOSED && statusStream.current === source) {
+        statusStream.current = null
+        startPolling(taskId)
+      }
+    }
+  }
+
   const handleSubmit = async (e) => {
     e.preventDefault()
     if (!authToken) {
@@ -317,7 +498,8 @@ export default function Home({ darkMode, setDarkMode }) {
 
       if (data.status === 'queued') {
         setCurrentStep(2)
-        startPolling(data.task_id)
+        currentTaskId.current = data.task_id
+        startStatusStream(data.task_id)
       } else {
         setResult(data)
         setLoading(false)
@@ -431,7 +613,10 @@ export default function Home({ darkMode, setDarkMode }) {
     setAuthToken('')
     setAuthUser(null)
     setSavedRecords([])
+    setRecordsCursor(null)
+    setRecordContents({})
     setHistory([])
+    setHistoryCursor(null)
     setResult(null)
     setFile(null)
     setRecordDrafts({})
@@ -933,6 +1118,21 @@ export default function Home({ darkMode, setDarkMode }) {
               {currentStep === 2 && 'AI가 음성을 인식하고 있습니다...'}
               {currentStep === 3 && '텍스트를 교정하고 구조화하고 있습니다...'}
             </p>
+            <div className="flex justify-center mt-3">
+              <button
+                type="button"
+                onClick={handleCancelTask}
+                className="px-3 py-1.5 text-xs font-medium text-slate-500 dark:text-slate-400 hover:text-red-500 dark:hover:text-red-400 transition-colors"
+              >
+                작업 취소
+              </button>
+            </div>
+            {partialText && (
+              <div className="mt-4 bg-slate-50/80 dark:bg-slate-900/40 p-4 rounded-xl border border-slate-100 dark:border-slate-800/50 max-h-[40vh] overflow-y-auto">
+                <p className="text-[11px] font-medium text-slate-400 dark:text-slate-500 mb-2">작성 중인 초안 (교정이 끝난 부분부터 바뀝니다)</p>
+                <p className="text-sm leading-relaxed text-slate-600 dark:text-slate-300 whitespace-pre-wrap">{partialText}</p>
+              </div>
+            )}
           </div>
         )}
 
@@ -1129,51 +1329,109 @@ export default function Home({ darkMode, setDarkMode }) {
               <svg className={`w-3.5 h-3.5 transition-transform duration-200 ${showHistory ? 'rotate-90' : ''}`} fill="none" stroke="currentColor" viewBox="0 0 24 24">
                 <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M9 5l7 7-7 7" />
               </svg>
-              최근 변환 기록 ({history.length})
+              최근 변환 기록 ({history.length}{historyCursor ? '+' : ''})
             </button>
 
             {showHistory && (
               <div className="bg-white dark:bg-slate-800/60 rounded-2xl shadow-sm border border-slate-200/80 dark:border-slate-700/50 overflow-hidden animate-slide-up">
-                <ul className="divide-y divide-slate-100/80 dark:divide-slate-800/50">
-                  {history.map((item) => (
-                    <li key={item.task_id}>
-                      <button
-                        onClick={() => handleLoadHistory(item.task_id)}
-                        className="w-full text-left p-4 hover:bg-slate-50/80 dark:hover:bg-slate-700/30 transition-colors group"
-                      >
-                        <div className="flex items-center justify-between">
-                          <div className="flex-1 min-w-0 pr-4">
-                            <div className="flex items-center gap-2 mb-1">
-                              <span className={`w-1.5 h-1.5 rounded-full shrink-0 ${
-                                item.status === 'completed' ? 'bg-green-500' :
-                                item.status === 'error' ? 'bg-red-500' : 'bg-amber-500'
-                              }`} />
-                              <span className="text-[11px] text-slate-400 dark:text-slate-500">
-                                {new Date(item.created_at).toLocaleString('ko-KR', { month: 'short', day: 'numeric', hour: '2-digit', minute: '2-digit' })}
-                              </span>
-                              {item.transcription_type && item.transcription_type !== 'sermon' && (
-                                <span className="text-[10px] px-1.5 py-0.5 rounded-md bg-slate-100 dark:bg-slate-700 text-slate-500 dark:text-slate-400 font-medium">
-                                  {item.transcription_type === 'phonecall' ? '통화' : '회의'}
-                                </span>
-                              )}
-                              {item.characters > 0 && (
+                <form onSubmit={handleSearch} className="flex gap-2 p-3 border-b border-slate-100/80 dark:border-slate-800/50">
+                  <input
+                    type="search"
+                    value={searchQuery}
+                    onChange={(e) => setSearchQuery(e.target.value)}
+                    placeholder="기록 내용 검색 (예: 7이정표)"
+                    className="flex-1 min-w-0 px-3 py-2 text-sm rounded-xl bg-slate-50 dark:bg-slate-900/60 border border-slate-200 dark:border-slate-700 text-slate-700 dark:text-slate-200 focus:outline-none focus:ring-2 focus:ring-blue-500/40"
+                  />
+                  <button
+                    type="submit"
+                    disabled={searching}
+                    className="px-4 py-2 text-sm font-medium rounded-xl bg-blue-600 text-white hover:bg-blue-700 disabled:opacity-50 transition-colors"
+                  >
+                    {searching ? '검색 중...' : '검색'}
+                  </button>
+                  {searchResults !== null && (
+                    <button
+                      type="button"
+                      onClick={() => { setSearchResults(null); setSearchQuery('') }}
+                      className="px-3 py-2 text-sm text-slate-400 hover:text-slate-600 dark:hover:text-slate-300 transition-colors"
+                    >
+                      검색 닫기
+                    </button>
+                  )}
+                </form>
+                {searchResults !== null ? (
+                  <ul className="divide-y divide-slate-100/80 dark:divide-slate-800/50">
+                    {searchResults.length === 0 && (
+                      <li className="p-4 text-sm text-slate-400 dark:text-slate-500">검색 결과가 없습니다.</li>
+                    )}
+                    {searchResults.map((item) => (
+                      <li key={item.task_id}>
+                        <button
+                          onClick={() => handleLoadHistory(item.task_id)}
+                          className="w-full text-left p-4 hover:bg-slate-50/80 dark:hover:bg-slate-700/30 transition-colors"
+                        >
+                          <span className="text-[11px] text-slate-400 dark:text-slate-500">
+                            {new Date(item.created_at).toLocaleString('ko-KR', { month: 'short', day: 'numeric', hour: '2-digit', minute: '2-digit' })}
+                          </span>
+                          <p className="mt-1 text-sm text-slate-600 dark:text-slate-300 line-clamp-2">
+                            {item.offset > 0 && '…'}{renderSnippet(item)}
+                          </p>
+                        </button>
+                      </li>
+                    ))}
+                  </ul>
+                ) : (
+                  <>
+                  <ul className="divide-y divide-slate-100/80 dark:divide-slate-800/50">
+                    {history.map((item) => (
+                      <li key={item.task_id}>
+                        <button
+                          onClick={() => handleLoadHistory(item.task_id)}
+                          className="w-full text-left p-4 hover:bg-slate-50/80 dark:hover:bg-slate-700/30 transition-colors group"
+                        >
+                          <div className="flex items-center justify-between">
+                            <div className="flex-1 min-w-0 pr-4">
+                              <div className="flex items-center gap-2 mb-1">
+                                <span className={`w-1.5 h-1.5 rounded-full shrink-0 ${
+                                  item.status === 'completed' ? 'bg-green-500' :
+                                  item.status === 'error' ? 'bg-red-500' : 'bg-amber-500'
+                                }`} />
                                 <span className="text-[11px] text-slate-400 dark:text-slate-500">
-                                  {item.characters?.toLocaleString()}자
+                                  {new Date(item.created_at).toLocaleString('ko-KR', { month: 'short', day: 'numeric', hour: '2-digit', minute: '2-digit' })}
                                 </span>
-                              )}
+                                {item.transcription_type && item.transcription_type !== 'sermon' && (
+                                  <span className="text-[10px] px-1.5 py-0.5 rounded-md bg-slate-100 dark:bg-slate-700 text-slate-500 dark:text-slate-400 font-medium">
+                                    {item.transcription_type === 'phonecall' ? '통화' : '회의'}
+                                  </span>
+                                )}
+                                {item.characters > 0 && (
+                                  <span className="text-[11px] text-slate-400 dark:text-slate-500">
+                                    {item.characters?.toLocaleString()}자
+                                  </span>
+                                )}
+                              </div>
+                              <p className="text-sm text-slate-600 dark:text-slate-300 truncate group-hover:text-blue-600 dark:group-hover:text-blue-400 transition-colors">
+                                {item.summary_preview || "내용 없음"}
+                              </p>
                             </div>
-                            <p className="text-sm text-slate-600 dark:text-slate-300 truncate group-hover:text-blue-600 dark:group-hover:text-blue-400 transition-colors">
-                              {item.summary_preview || "내용 없음"}
-                            </p>
+                            <svg className="w-4 h-4 text-slate-300 dark:text-slate-600 group-hover:text-blue-400 shrink-0 transition-colors" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+                              <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M9 5l7 7-7 7" />
+                            </svg>
                           </div>
-                          <svg className="w-4 h-4 text-slate-300 dark:text-slate-600 group-hover:text-blue-400 shrink-0 transition-colors" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                            <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M9 5l7 7-7 7" />
-                          </svg>
-                        </div>
-                      </button>
-                    </li>
-                  ))}
-                </ul>
+                        </button>
+                      </li>
+                    ))}
+                  </ul>
+                  {historyCursor && (
+                    <button
+                      onClick={() => fetchHistory(authToken, historyCursor)}
+                      className="w-full p-3 text-sm font-medium text-slate-500 dark:text-slate-400 hover:text-blue-600 dark:hover:text-blue-400 hover:bg-slate-50/80 dark:hover:bg-slate-700/30 border-t border-slate-100/80 dark:border-slate-800/50 transition-colors"
+                    >
+                      더 보기
+                    </button>
+                  )}
+                  </>
+                )}
               </div>
             )}
           </div>
@@ -1189,7 +1447,7 @@ export default function Home({ darkMode, setDarkMode }) {
               <svg className={`w-3.5 h-3.5 transition-transform duration-200 ${showRecords ? 'rotate-90' : ''}`} fill="none" stroke="currentColor" viewBox="0 0 24 24">
                 <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M9 5l7 7-7 7" />
               </svg>
-              내 저장 기록본 ({savedRecords.length})
+              내 저장 기록본 ({savedRecords.length}{recordsCursor ? '+' : ''})
             </button>
 
             {showRecords && (
@@ -1200,8 +1458,11 @@ export default function Home({ darkMode, setDarkMode }) {
                   <ul className="divide-y divide-slate-100/80 dark:divide-slate-800/50">
                     {savedRecords.map((item) => (
                       <li key={item.id} className="p-4">
-                        <div className="flex items-center justify-between gap-3 mb-1.5">
-                          <p className="text-sm font-semibold text-slate-700 dark:text-slate-200">
+                        <button
+                          onClick={() => handleToggleRecord(item.id)}
+                          className="w-full flex items-center justify-between gap-3 text-left group"
+                        >
+                          <p className="text-sm font-semibold text-slate-700 dark:text-slate-200 group-hover:text-blue-600 dark:group-hover:text-blue-400 transition-colors">
                             {recordTypeLabels[item.category] || item.title || item.category}
                           </p>
                           <span className="text-[11px] text-slate-400 dark:text-slate-500">
@@ -1209,14 +1470,24 @@ export default function Home({ darkMode, setDarkMode }) {
                               ? new Date(item.created_at).toLocaleString('ko-KR', { month: 'short', day: 'numeric', hour: '2-digit', minute: '2-digit' })
                               : ''}
                           </span>
-                        </div>
-                        <p className="text-xs text-slate-500 dark:text-slate-400 whitespace-pre-wrap leading-relaxed">
-                          {item.content}
-                        </p>
+                        </button>
+                        {openRecordId === item.id && (
+                          <p className="mt-1.5 text-xs text-slate-500 dark:text-slate-400 whitespace-pre-wrap leading-relaxed">
+                            {recordContents[item.id] ?? '불러오는 중...'}
+                          </p>
+                        )}
                       </li>
                     ))}
                   </ul>
                 )}
+                {recordsCursor && (
+                  <button
+                    onClick={() => fetchSavedRecords(authToken, recordsCursor)}
+                    className="w-full p-3 text-sm font-medium text-slate-500 dark:text-slate-400 hover:text-blue-600 dark:hover:text-blue-400 hover:bg-slate-50/80 dark:hover:bg-slate-700/30 border-t border-slate-100/80 dark:border-slate-800/50 transition-colors"
+                  >
+                    더 보기
+                  </button>
+                )}
               </div>
             )}
           </div>